@@ -1,8 +1,6 @@
 import streamlit as st
 import pandas as pd
-import math
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+from antenna_calc import calculate_patch_dimensions, conductor_efficiency, dielectric_loss
 
 # Antenna Material Restrictions (Design Mode Only)
 component_materials = {
@@ -22,52 +20,6 @@ def load_materials(csv_path):
         st.error(f"❌ Failed to load material data: {e}")
         return None
 
-# Patch Dimension Calculation
-def calculate_patch_dimensions(fr, h, epsilon):
-    c = 3e8  # Speed of light in m/s
-
-    # Patch width (W)
-    W = c / (2 * fr * math.sqrt(epsilon))
-
-    # Effective dielectric constant
-    eff_er = (epsilon + 1) / 2 + (epsilon - 1) / 2 * (1 + 12 * h / W) ** -0.5
-
-    # Effective length and extension
-    leff = c / (2 * fr * math.sqrt(eff_er))
-    delta_L = 0.412 * h * ((eff_er + 0.3) * (W / h + 0.264)) / ((eff_er - 0.258) * (W / h + 0.8))
-    L = leff - 2 * delta_L
-
-    # Ground plane dimensions
-    ground_plane_length = 6 * h + L
-    ground_plane_width = 6 * h + W
-
-    # Feed point (inset feed for simple rectangular patch)
-    feed_location_x = W / 2
-    feed_location_y = L / 2
-
-    # Convert to mm and round
-    return round(L * 1000, 3), round(W * 1000, 3), round(ground_plane_length * 1000, 3), round(ground_plane_width * 1000, 3), round(feed_location_x * 1000, 3), round(feed_location_y * 1000, 3)
-
-# Conductor Efficiency Calculation
-def conductor_efficiency(frequency_hz, metal_sigma, patch_W_m, patch_L_m):
-    """Compute approximate conductor efficiency for rectangular patch"""
-    if metal_sigma <= 0:
-        return None, None, None  # Cannot compute
-
-    mu0 = 4 * math.pi * 1e-7
-    Rs = 1 / (metal_sigma * math.sqrt(math.pi * frequency_hz * mu0))
-    
-    # Approximate radiation resistance for fundamental mode
-    Rr = 90 * (patch_L_m / patch_W_m) ** 2
-    
-    eta_c = Rr / (Rr + Rs)
-    return Rs, Rr, eta_c
-
-# Dielectric Loss Factor
-def dielectric_loss(tand, epsilon_r):
-    """Approximate dielectric loss factor for patch"""
-    return tand / math.sqrt(epsilon_r)
-
 # Streamlit UI Layout
 st.set_page_config(page_title="Antenna Designer", page_icon="📡", layout="centered")
 st.title("📡 Microstrip Patch Antenna Dimension Calculator")
@@ -113,6 +65,7 @@ if mode == "Standard Patch Calculator Mode":
         st.write(f"📍 Feed Point: `({fx}, {fy}) mm`")
 
         # Plot geometry
+        import matplotlib.pyplot as plt  # loaded on the first plot, not at app start
         fig, ax = plt.subplots()
         ax.set_title("Antenna Geometry")
         ax.add_patch(plt.Rectangle((0, 0), g_wid, g_len, fill=False, edgecolor='black', linewidth=2, label='Ground Plane'))
@@ -194,6 +147,7 @@ elif mode == "Design-Oriented Mode":
             st.warning("Conductor efficiency cannot be computed (σ missing or zero).")
 
         # Plot geometry
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots()
         ax.set_title("Antenna Geometry")
         ax.add_patch(plt.Rectangle((0, 0), g_wid, g_len, fill=False, edgecolor='black', linewidth=2, label='Ground Plane'))
@@ -1,27 +1,42 @@
-import pandas as pd
+import argparse
+import csv
 import math
+import sys
+from antenna_calc import calculate_patch_dimensions
 
-# Function to load material data from CSV
+MATERIAL_FIELDS = ['Filename', 'Epsilon', 'Mu', 'TanD', 'Sigma']
+
+def _to_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return math.nan  # blank or "N/A"
+
+# Function to load material data from CSV (plain csv module: no pandas needed for a CLI)
 def get_material_data(csv_path):
     try:
-        df = pd.read_csv(csv_path)
-        df = df[['Filename', 'Epsilon', 'Mu', 'TanD', 'Sigma']]  # Only required fields
-        return df
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = []
+            for row in csv.DictReader(f):
+                material = {field: _to_float(row.get(field)) for field in MATERIAL_FIELDS[1:]}
+                material['Filename'] = row['Filename']
+                rows.append(material)
+        return rows
     except Exception as e:
         print(f"Error reading CSV: {e}")
         return None
 
 # Function to select material from the list
-def select_material(df):
+def select_material(materials):
     print("\nAvailable Materials:\n")
-    for i, name in enumerate(df['Filename']):
-        print(f"{i + 1}. {name}")
+    for i, material in enumerate(materials):
+        print(f"{i + 1}. {material['Filename']}")
 
     try:
         index = int(input("\nSelect material by number: ")) - 1
-        if index not in range(len(df)):
+        if index not in range(len(materials)):
             raise ValueError
-        return df.iloc[index]
+        return materials[index]
     except:
         print("Invalid selection.")
         return None
@@ -36,37 +51,8 @@ def get_user_inputs():
         print("Invalid input.")
         return None, None
 
-# Function to calculate the antenna patch dimensions (L, W) and other parameters
-def calculate_patch_dimensions(fr, h, epsilon):
-    c = 3e8  # Speed of light in m/s
-
-    # Patch width (W) using standard formula
-    W = c / (2 * fr * math.sqrt(epsilon))
-
-    # Effective permittivity calculation for the patch
-    eff_er = (epsilon + 1) / 2 + (epsilon - 1) / 2 * (1 + 12 * h / W) ** -0.5
-
-    # Effective length (Leff) calculation for the patch
-    leff = c / (2 * fr * math.sqrt(eff_er))
-
-    # Length extension (delta L) calculation
-    delta_L = 0.412 * h * ((eff_er + 0.3) * (W / h + 0.264)) / ((eff_er - 0.258) * (W / h + 0.8))
-
-    # Actual length (L) after applying the length extension
-    L = leff - 2 * delta_L
-
-    # Ground plane dimensions (larger than the patch)
-    ground_plane_length = 6 * h + L
-    ground_plane_width = 6 * h + W
-
-    # Feed location calculation (usually at the center of the patch)
-    feed_location_x = W / 2  # Center of the patch along width
-    feed_location_y = L / 2  # Center of the patch along length
-
-    return round(L * 1000, 3), round(W * 1000, 3), round(ground_plane_length * 1000, 3), round(ground_plane_width * 1000, 3), feed_location_x, feed_location_y
-
-# Main function to run the program
-def main():
+# Interactive calculator
+def interactive(materials_csv):
     print("📡 CST Material-based Antenna Dimension Calculator 📡")
     print("\n📚 Recommended Materials for Fabrication:")
     print("🔹 Substrate Materials:")
@@ -83,11 +69,11 @@ def main():
     print("   - Copper traces on the same PCB")
     print("   - Coaxial connectors (SMA, etc., for external feed)")
 
-    df = get_material_data("data/cst_materials_extracted.csv")
-    if df is None:
+    materials = get_material_data(materials_csv)
+    if materials is None:
         return
 
-    material = select_material(df)
+    material = select_material(materials)
     if material is None:
         return
 
@@ -106,13 +92,46 @@ def main():
     print(f"Calculated Patch Width (W): {W} mm")
     print(f"Ground Plane Length: {ground_length} mm")
     print(f"Ground Plane Width: {ground_width} mm")
-    print(f"Feed Location: ({feed_x} (x), {feed_y} (y))")
+    print(f"Feed Location: ({feed_x} mm (x), {feed_y} mm (y))")
 
-    if pd.notna(material['TanD']):
+    if not math.isnan(material['TanD']):
         print(f"Loss Tangent (tanδ): {material['TanD']}")
-    if pd.notna(material['Sigma']):
+    if not math.isnan(material['Sigma']):
         print(f"Conductivity (σ): {material['Sigma']} S/m")
 
+# -----------------------------------
+# CLI: interactive, or batch over a job file
+# -----------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CST material-based patch antenna calculator. "
+                                                 "Without a job file it asks for inputs interactively.")
+    parser.add_argument("jobs", nargs='?', help="CSV or JSON-lines job file with freq_ghz, h_mm and material "
+                                                "(exact name or name pattern) and/or epsilon columns")
+    parser.add_argument("-o", "--out", help="Output .csv, .jsonl/.json/.ndjson or .parquet (required with a job file)")
+    parser.add_argument("--materials-csv", default="cst_materials_extracted.csv")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes for multi-block jobs (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="Job rows per block")
+    args = parser.parse_args(argv)
+
+    if args.jobs is None:
+        interactive(args.materials_csv)
+        return 0
+    if not args.out:
+        parser.error("--out is required with a job file")
+
+    from batch_jobs import run_jobs  # pandas is only needed for batch runs
+    try:
+        rows_in, rows_out, failed = run_jobs(args.jobs, args.out, args.materials_csv, args.workers, args.chunk_size)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Designed {rows_in} job rows -> {rows_out} designs in {args.out}")
+    if failed:
+        # Non-zero exit so cron/CI notice bad rows; they are still written with their status
+        print(f"⚠️ {failed} designs failed (unknown material or invalid input); see the 'status' column", file=sys.stderr)
+        return 1
+    return 0
+
 # Run the main function if the script is executed
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,195 @@
+import math
+import numpy as np
+
+c = 3e8  # Speed of light in m/s
+mu0 = 4 * math.pi * 1e-7
+
+# Output fields of the batch engine (all in mm, rounded like the scalar path)
+PATCH_FIELDS = ['L', 'W', 'ground_length', 'ground_width', 'feed_x', 'feed_y']
+PATCH_DTYPE = np.dtype([(name, np.float64) for name in PATCH_FIELDS])
+# Inputs of the model, in Jacobian column order
+PATCH_INPUTS = ('fr', 'h', 'epsilon')
+
+# -----------------------------------
+# Patch Dimension Calculation
+# -----------------------------------
+def calculate_patch_dimensions(fr, h, epsilon):
+    # Patch width (W)
+    W = c / (2 * fr * math.sqrt(epsilon))
+
+    # Effective dielectric constant
+    eff_er = (epsilon + 1) / 2 + (epsilon - 1) / 2 * (1 + 12 * h / W) ** -0.5
+
+    # Effective length and extension
+    leff = c / (2 * fr * math.sqrt(eff_er))
+    delta_L = 0.412 * h * ((eff_er + 0.3) * (W / h + 0.264)) / ((eff_er - 0.258) * (W / h + 0.8))
+    L = leff - 2 * delta_L
+
+    # Ground plane dimensions
+    ground_plane_length = 6 * h + L
+    ground_plane_width = 6 * h + W
+
+    # Feed point (centre of the patch)
+    feed_location_x = W / 2
+    feed_location_y = L / 2
+
+    # Convert to mm and round
+    return round(L * 1000, 3), round(W * 1000, 3), round(ground_plane_length * 1000, 3), round(ground_plane_width * 1000, 3), round(feed_location_x * 1000, 3), round(feed_location_y * 1000, 3)
+
+# -----------------------------------
+# Vectorized Batch Engine
+# -----------------------------------
+def _round3(x):
+    """Round to 3 decimals exactly like Python's built-in round()"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.round(x, 3)
+    # np.round scales by 1000 and can land on the wrong side of a tie;
+    # re-round the few values sitting near a half-way point in pure Python.
+    scaled = x * 1000
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    near_tie &= np.isfinite(x)
+    if near_tie.any():
+        out[near_tie] = [round(v, 3) for v in x[near_tie].tolist()]
+    return out
+
+def patch_dimensions_raw(fr, h, epsilon, derivatives=False):
+    """Unrounded patch model in metres, broadcast over NumPy arrays.
+
+    With derivatives=True the result also holds 'jacobian': for every output,
+    its exact partial derivatives {'fr', 'h', 'epsilon'} (SI units, e.g. m/Hz).
+    """
+    fr, h, epsilon = np.broadcast_arrays(
+        np.asarray(fr, dtype=np.float64),
+        np.asarray(h, dtype=np.float64),
+        np.asarray(epsilon, dtype=np.float64),
+    )
+
+    # Same operation order as calculate_patch_dimensions so results match bit for bit
+    W = c / (2 * fr * np.sqrt(epsilon))
+    eff_er = (epsilon + 1) / 2 + (epsilon - 1) / 2 * np.power(1 + 12 * h / W, -0.5)
+    leff = c / (2 * fr * np.sqrt(eff_er))
+    delta_L = 0.412 * h * ((eff_er + 0.3) * (W / h + 0.264)) / ((eff_er - 0.258) * (W / h + 0.8))
+    L = leff - 2 * delta_L
+
+    result = {
+        'L': L,
+        'W': W,
+        'ground_length': 6 * h + L,
+        'ground_width': 6 * h + W,
+        'feed_x': W / 2,
+        'feed_y': L / 2,
+        'eff_er': eff_er,
+        'L_eff': leff,
+    }
+    if derivatives:
+        result['jacobian'] = _patch_partials(fr, h, epsilon, result)
+    return result
+
+def _patch_partials(fr, h, epsilon, v):
+    """Exact partials of patch_dimensions_raw's outputs, chain rule through the same steps as the model"""
+    W, eff_er, leff, L = v['W'], v['eff_er'], v['L_eff'], v['L']
+    zero = np.zeros_like(W)
+    W_d = {'fr': -W / fr, 'h': zero, 'epsilon': -W / (2 * epsilon)}
+
+    # eff_er = (εr + 1)/2 + (εr - 1)/2 · s with s = (1 + 12h/W)^-1/2
+    s = np.power(1 + 12 * h / W, -0.5)
+    k = 3 * (epsilon - 1) * s ** 3 * h / W  # -∂eff_er/∂ln(h/W)
+    eff_d = {'fr': -k / fr, 'h': -k / h, 'epsilon': (1 + s) / 2 - k / (2 * epsilon)}
+
+    leff_d = {x: -leff * eff_d[x] / (2 * eff_er) for x in PATCH_INPUTS}
+    leff_d['fr'] -= leff / fr
+
+    # ln ΔL = ln h + ln(eff_er + 0.3) - ln(eff_er - 0.258) + ln(W/h + 0.264) - ln(W/h + 0.8)
+    delta_L = (leff - L) / 2
+    r = W / h
+    g_eff = 1 / (eff_er + 0.3) - 1 / (eff_er - 0.258)
+    g_r = (1 / (r + 0.264) - 1 / (r + 0.8)) / h
+    L_d = {}
+    for x in PATCH_INPUTS:
+        log_d = g_eff * eff_d[x] + g_r * W_d[x]
+        if x == 'h':
+            log_d += 1 / h - g_r * r
+        L_d[x] = leff_d[x] - 2 * delta_L * log_d
+
+    return {
+        'L': L_d,
+        'W': W_d,
+        'ground_length': {x: L_d[x] + 6 if x == 'h' else L_d[x] for x in PATCH_INPUTS},
+        'ground_width': {x: W_d[x] + 6 if x == 'h' else W_d[x] for x in PATCH_INPUTS},
+        'feed_x': {x: W_d[x] / 2 for x in PATCH_INPUTS},
+        'feed_y': {x: L_d[x] / 2 for x in PATCH_INPUTS},
+        'eff_er': eff_d,
+        'L_eff': leff_d,
+    }
+
+def patch_jacobian(fr, h, epsilon, outputs=PATCH_FIELDS):
+    """Jacobian of the unrounded outputs (m) w.r.t. (fr, h, εr) as an array of shape (..., len(outputs), 3)"""
+    jacobian = patch_dimensions_raw(fr, h, epsilon, derivatives=True)['jacobian']
+    return np.stack([np.stack([jacobian[name][x] for x in PATCH_INPUTS], axis=-1) for name in outputs], axis=-2)
+
+def fringe_extension(h, W, eff_er):
+    """Length extension ΔL (m) of each radiating edge (Hammerstad)"""
+    return 0.412 * h * ((eff_er + 0.3) * (W / h + 0.264)) / ((eff_er - 0.258) * (W / h + 0.8))
+
+def resonant_frequency(L, W, h, epsilon, eff_er=None):
+    """Resonance (Hz) of a built patch: the same model solved for fr given L, W (m), h (m) and εr.
+
+    Inverse of patch_dimensions_raw: the nominal design returns its fr. Pass
+    eff_er to override the open-air effective permittivity (e.g. a loaded patch).
+    """
+    if eff_er is None:
+        eff_er = (epsilon + 1) / 2 + (epsilon - 1) / 2 * np.power(1 + 12 * h / W, -0.5)
+    return c / (2 * (L + 2 * fringe_extension(h, W, eff_er)) * np.sqrt(eff_er))
+
+def calculate_patch_dimensions_batch(fr, h, epsilon, as_frame=False):
+    """Vectorized calculate_patch_dimensions over broadcastable arrays of fr (Hz), h (m) and εr.
+
+    Returns a structured array with the fields in PATCH_FIELDS (mm, rounded to
+    3 decimals), or a pandas DataFrame when as_frame=True.
+    """
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    shape = raw['L'].shape
+
+    result = np.empty(shape, dtype=PATCH_DTYPE)
+    for name in PATCH_FIELDS:
+        result[name] = _round3(raw[name] * 1000)
+
+    if as_frame:
+        import pandas as pd
+        return pd.DataFrame({name: result[name].ravel() for name in PATCH_FIELDS})
+    return result
+
+# -----------------------------------
+# Bandwidth Estimate
+# -----------------------------------
+def fractional_bandwidth(fr, h, epsilon, W, L):
+    """Approximate VSWR < 2 fractional bandwidth (Jackson & Alexopoulos), all lengths in metres"""
+    lambda0 = c / np.asarray(fr, dtype=np.float64)
+    epsilon = np.asarray(epsilon, dtype=np.float64)
+    return 3.771 * (epsilon - 1) / epsilon ** 2 * (h / lambda0) * (W / L)
+
+# -----------------------------------
+# Loss Estimates
+# -----------------------------------
+def surface_resistance(frequency_hz, metal_sigma):
+    """Conductor surface resistance Rs = sqrt(π f μ0 / σ) in Ω, broadcast over arrays"""
+    return np.sqrt(np.pi * frequency_hz * mu0 / metal_sigma)
+
+# Conductor Efficiency Calculation
+def conductor_efficiency(frequency_hz, metal_sigma, patch_W_m, patch_L_m):
+    """Compute approximate conductor efficiency for rectangular patch"""
+    if metal_sigma <= 0:
+        return None, None, None  # Cannot compute
+
+    Rs = float(surface_resistance(frequency_hz, metal_sigma))
+
+    # Approximate radiation resistance for fundamental mode
+    Rr = 90 * (patch_L_m / patch_W_m) ** 2
+
+    eta_c = Rr / (Rr + Rs)
+    return Rs, Rr, eta_c
+
+# Dielectric Loss Factor
+def dielectric_loss(tand, epsilon_r):
+    """Approximate dielectric loss factor for patch"""
+    return tand / math.sqrt(epsilon_r)
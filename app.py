@@ -1,8 +1,8 @@
+import os
 import streamlit as st
 import pandas as pd
-import math
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+from antenna_calc import calculate_patch_dimensions
+from result_cache import ResultCache
 
 # -----------------------------------
 # Antenna Material Restrictions (Design Mode Only)
@@ -26,34 +26,6 @@ def load_materials(csv_path):
         st.error(f"❌ Failed to load material data: {e}")
         return None
 
-# -----------------------------------
-# Patch Dimension Calculation
-# -----------------------------------
-def calculate_patch_dimensions(fr, h, epsilon):
-    c = 3e8  # Speed of light in m/s
-
-    # Patch width (W)
-    W = c / (2 * fr * math.sqrt(epsilon))
-
-    # Effective dielectric constant
-    eff_er = (epsilon + 1) / 2 + (epsilon - 1) / 2 * (1 + 12 * h / W) ** -0.5
-
-    # Effective length and extension
-    leff = c / (2 * fr * math.sqrt(eff_er))
-    delta_L = 0.412 * h * ((eff_er + 0.3) * (W / h + 0.264)) / ((eff_er - 0.258) * (W / h + 0.8))
-    L = leff - 2 * delta_L
-
-    # Ground plane dimensions
-    ground_plane_length = 6 * h + L
-    ground_plane_width = 6 * h + W
-
-    # Feed point (inset feed for simple rectangular patch)
-    feed_location_x = W / 2
-    feed_location_y = L / 2
-
-    # Convert to mm and round
-    return round(L * 1000, 3), round(W * 1000, 3), round(ground_plane_length * 1000, 3), round(ground_plane_width * 1000, 3), round(feed_location_x * 1000, 3), round(feed_location_y * 1000, 3)
-
 # -----------------------------------
 # Streamlit UI Layout
 # -----------------------------------
@@ -65,6 +37,18 @@ if df is None:
     st.warning("CSV file not found or failed to load.")
     st.stop()
 
+# Dimensions memoized per (frequency, height, εr) across sessions; see result_cache.py.
+# Keyed by the material's εr, not its name, so edits to the CSV never serve stale designs.
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    return ResultCache(maxsize=512, disk_dir=os.environ.get("ANTENNA_CACHE_DIR"))
+
+results = get_result_cache()
+
+@results.memoize("patch_dimensions")
+def patch_dimensions(freq_ghz, h_mm, epsilon):
+    return calculate_patch_dimensions(freq_ghz * 1e9, h_mm / 1000, epsilon)
+
 # -----------------------------------
 # Mode Selection
 # -----------------------------------
@@ -93,10 +77,7 @@ if mode == "Standard Patch Calculator Mode":
     h_mm = st.number_input("Substrate Height (mm)", min_value=0.1, max_value=10.0, value=1.6, step=0.1)
 
     if st.button("  Calculate"):
-        fr = freq * 1e9  # Hz
-        h = h_mm / 1000  # meters
-
-        L, W, g_len, g_wid, fx, fy = calculate_patch_dimensions(fr, h, epsilon)
+        L, W, g_len, g_wid, fx, fy = patch_dimensions(freq, h_mm, epsilon)
 
         st.success("📐 Patch Dimensions")
         st.write(f"📏 Width (W): `{W} mm`")
@@ -105,6 +86,7 @@ if mode == "Standard Patch Calculator Mode":
         st.write(f"📍 Feed Point: `({fx}, {fy}) mm`")
 
         # Plot geometry
+        import matplotlib.pyplot as plt  # loaded on the first plot, not at app start
         fig, ax = plt.subplots()
         ax.set_title("Antenna Geometry")
         ax.add_patch(plt.Rectangle((0, 0), g_wid, g_len, fill=False, edgecolor='black', linewidth=2, label='Ground Plane'))
@@ -160,10 +142,7 @@ elif mode == "Design-Oriented Mode":
     h_mm = st.number_input("Substrate Height (mm)", min_value=0.5, max_value=5.0, value=1.6, step=0.1)
 
     if st.button("  Calculate Design"):
-        fr = freq * 1e9
-        h = h_mm / 1000
-        epsilon_sub = df[df['Filename'] == substrate_choice].iloc[0]['Epsilon']
-        L, W, g_len, g_wid, fx, fy = calculate_patch_dimensions(fr, h, epsilon_sub)
+        L, W, g_len, g_wid, fx, fy = patch_dimensions(freq, h_mm, df[df['Filename'] == substrate_choice].iloc[0]['Epsilon'])
 
         patch_x = (g_wid - W) / 2
         patch_y = (g_len - L) / 2
@@ -195,6 +174,7 @@ elif mode == "Design-Oriented Mode":
         patch_height = 0.035  # metal layer thickness in mm
         substrate_height = h_mm  # user input in mm
         patch_z = [[substrate_height, substrate_height], [substrate_height, substrate_height]]
+        import plotly.graph_objects as go
         fig = go.Figure()
 
         fig.add_trace(go.Surface(
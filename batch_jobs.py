@@ -0,0 +1,258 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from antenna_calc import calculate_patch_dimensions_batch, PATCH_FIELDS
+from material_data import MaterialDB
+
+# Accepted job-file column names (case-insensitive) for each input
+JOB_COLUMNS = {
+    'freq_ghz': ('freq_ghz', 'frequency', 'frequency_ghz', 'freq'),
+    'h_mm': ('h_mm', 'height', 'height_mm', 'h'),
+    'material': ('material', 'filename'),
+    'epsilon': ('epsilon', 'eps', 'epsilon_r'),
+}
+JSON_LINES = ('.json', '.jsonl', '.ndjson')
+CHUNK_ROWS = 200_000
+
+# -----------------------------------
+# Job rows -> designs (runs in each worker process)
+# -----------------------------------
+_state = {}
+
+def _init_worker(materials_csv):
+    _state['db'] = MaterialDB.load(materials_csv)
+    _state['resolved'] = {}
+
+def resolve_material(db, text):
+    """Row indices for an exact material name ('.mtd' optional), else every name containing text"""
+    text = text.strip()
+    for name in (text, text + '.mtd'):
+        if name in db:
+            return np.array([db.index_of(name)])
+    return db.search([text]) if text else np.array([], dtype=int)
+
+def _job_columns(frame):
+    lower = {str(col).strip().lower(): col for col in frame.columns}
+    columns = {}
+    for key, aliases in JOB_COLUMNS.items():
+        found = next((lower[a] for a in aliases if a in lower), None)
+        if found is not None:
+            columns[key] = frame[found]
+    missing = {'freq_ghz', 'h_mm'} - set(columns)
+    if missing or not {'material', 'epsilon'} & set(columns):
+        raise ValueError("Job files need frequency (GHz) and height (mm) columns, and material and/or epsilon")
+    return columns
+
+def design_jobs(frame, first_row=0):
+    """Patch designs for one block of job rows.
+
+    A material that is not an exact name is treated as a pattern and expands
+    to one output row per matching material; rows without a material use
+    their epsilon. 'job' is the input row number and 'status' is 'ok',
+    'unknown material' or 'invalid input'.
+    """
+    import pandas as pd
+    db, resolved = _state['db'], _state['resolved']
+    columns = _job_columns(frame)
+    n = len(frame)
+    freq = pd.to_numeric(columns['freq_ghz'], errors='coerce').to_numpy(dtype=np.float64)
+    h = pd.to_numeric(columns['h_mm'], errors='coerce').to_numpy(dtype=np.float64)
+    eps_in = (pd.to_numeric(columns['epsilon'], errors='coerce').to_numpy(dtype=np.float64)
+              if 'epsilon' in columns else np.full(n, np.nan))
+
+    if 'material' in columns:
+        # Strip once per distinct spelling, then merge spellings that strip to the same name
+        raw_codes, raw = pd.factorize(columns['material'].astype('string'))
+        stripped = [text.strip() or None for text in raw.astype(object).tolist()]
+        codes, uniques = pd.factorize(np.array(stripped + [None], dtype=object)[raw_codes])
+        uniques = uniques.tolist()
+    else:
+        codes, uniques = np.full(n, -1), []
+    matches = []
+    for text in uniques:
+        if text not in resolved:
+            resolved[text] = resolve_material(db, text)
+        matches.append(resolved[text])
+
+    # Expand pattern rows: row i repeats once per material it matched (at least once).
+    # Per-unique arrays get a trailing slot so code -1 (no material) indexes safely.
+    per_unique = np.array([len(m) for m in matches] + [0], dtype=np.int64)
+    unique_start = np.concatenate([[0], np.cumsum(per_unique)])
+    flat = np.concatenate(matches + [np.array([-1])]).astype(np.int64)
+    counts = np.maximum(per_unique[codes], 1)
+    row = np.repeat(np.arange(n), counts)
+    k = np.arange(len(row)) - np.repeat(np.cumsum(counts) - counts, counts)
+    code = codes[row]
+    has_match = per_unique[code] > 0
+    mat_row = np.where(has_match, flat[unique_start[code] + k], -1)
+
+    eps = np.where(has_match, db.column('Epsilon')[mat_row], eps_in[row])
+    fr, hh = freq[row], h[row]
+    unknown = (code >= 0) & ~has_match
+    valid = ~unknown & np.isfinite(fr) & np.isfinite(hh) & np.isfinite(eps) & (fr > 0) & (hh > 0) & (eps >= 1)
+
+    out = pd.DataFrame({
+        'job': first_row + row,
+        'freq_ghz': fr,
+        'h_mm': hh,
+        'material': np.array(uniques + [None], dtype=object)[code],
+        'Filename': np.where(has_match, db.names[mat_row], ''),
+        'Epsilon': eps,
+    })
+    with np.errstate(all='ignore'):
+        dims = calculate_patch_dimensions_batch(np.where(valid, fr, 1.0) * 1e9, np.where(valid, hh, 1.0) / 1000,
+                                                np.where(valid, eps, 1.0))
+    for name in PATCH_FIELDS:
+        out[name] = np.where(valid, dims[name], np.nan)
+    out['status'] = np.where(valid, 'ok', np.where(unknown, 'unknown material', 'invalid input'))
+    return out
+
+def _csv_field(text):
+    if text is None or text != text:  # None / NaN
+        return ''
+    text = str(text)
+    if any(ch in text for ch in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def csv_bytes(frame, header=True):
+    """Same text as frame.to_csv(index=False), about twice as fast on numeric blocks.
+
+    Floats use repr (pandas' default formatting); text columns are
+    formatted once per distinct value.
+    """
+    import pandas as pd
+    columns = []
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if values.dtype.kind == 'f':
+            text = list(map(repr, values.tolist()))
+            for i in np.flatnonzero(np.isnan(values)).tolist():
+                text[i] = ''
+        elif values.dtype.kind in 'iub':
+            text = list(map(str, values.tolist()))
+        else:
+            codes, uniques = pd.factorize(values)
+            text = np.array([_csv_field(v) for v in uniques] + [''], dtype=object)[codes].tolist()
+        columns.append(text)
+    lines = [','.join(_csv_field(name) for name in frame.columns)] if header else []
+    lines.extend(map(','.join, zip(*columns)))
+    return ('\n'.join(lines) + '\n').encode() if lines else b''
+
+def _encode(frame, fmt, header):
+    """Serialize a result block in the worker, so text formatting runs in parallel too"""
+    if fmt == 'csv':
+        return csv_bytes(frame, header)
+    if fmt == 'jsonl':
+        return frame.to_json(orient='records', lines=True).encode()
+    return frame
+
+def _run_block(frame, first_row, fmt, header):
+    result = design_jobs(frame, first_row)
+    return _encode(result, fmt, header), len(result), int((result['status'] != 'ok').sum())
+
+# -----------------------------------
+# Streaming job runner
+# -----------------------------------
+def read_jobs(job_path, chunk_rows=CHUNK_ROWS):
+    """DataFrame blocks of a CSV or JSON-lines job file"""
+    import pandas as pd
+    if job_path.endswith(JSON_LINES):
+        return pd.read_json(job_path, lines=True, chunksize=chunk_rows, dtype=False)
+    return pd.read_csv(job_path, chunksize=chunk_rows, dtype={'material': str, 'Material': str})
+
+def output_format(out_path):
+    if out_path.endswith('.parquet'):
+        return 'parquet'
+    if out_path.endswith(JSON_LINES):
+        return 'jsonl'
+    if out_path.endswith('.csv'):
+        return 'csv'
+    raise ValueError(f"Unsupported output '{out_path}' (use .csv, .jsonl/.json/.ndjson or .parquet)")
+
+class _Writer:
+    def __init__(self, out_path, fmt):
+        self.out_path, self.fmt = out_path, fmt
+        self._file = None
+        self._parquet = None
+
+    def write(self, block):
+        if self.fmt != 'parquet':
+            if self._file is None:
+                self._file = open(self.out_path, 'wb')
+            self._file.write(block)
+            return
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        # Fixed string types so blocks with all-empty text columns share one schema
+        block = block.astype({'material': 'string', 'Filename': 'string', 'status': 'string'})
+        table = pa.Table.from_pandas(block, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.out_path, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        elif self._parquet is not None:
+            self._parquet.close()
+        elif self.fmt != 'parquet':
+            open(self.out_path, 'wb').close()
+
+def run_jobs(job_path, out_path, materials_csv="cst_materials_extracted.csv", workers=None, chunk_rows=CHUNK_ROWS):
+    """Design every row of a job file and stream the results to out_path.
+
+    Blocks of chunk_rows rows are designed and serialized on a process pool
+    (workers, default all cores) once the file spans more than one block;
+    smaller jobs run in-process. Output keeps input order. Returns
+    (input rows, output rows, rows whose status is not 'ok').
+    """
+    fmt = output_format(out_path)
+    blocks = iter(read_jobs(job_path, chunk_rows))
+    first = next(blocks, None)
+    second = next(blocks, None) if first is not None else None
+    workers = workers or os.cpu_count() or 1
+
+    writer = _Writer(out_path, fmt)
+    rows_in = rows_out = failed = 0
+
+    def collect(result):
+        nonlocal rows_out, failed
+        writer.write(result[0])
+        rows_out += result[1]
+        failed += result[2]
+
+    try:
+        if first is None:
+            return 0, 0, 0
+        if second is None or workers == 1:
+            _init_worker(materials_csv)
+            for frame in (b for b in (first, second) if b is not None):
+                collect(_run_block(frame, rows_in, fmt, rows_in == 0))
+                rows_in += len(frame)
+            for frame in blocks:
+                collect(_run_block(frame, rows_in, fmt, False))
+                rows_in += len(frame)
+            return rows_in, rows_out, failed
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(materials_csv,)) as pool:
+            pending = []
+            for frame in _chain(first, second, blocks):
+                pending.append(pool.submit(_run_block, frame, rows_in, fmt, rows_in == 0))
+                rows_in += len(frame)
+                # Bounded read-ahead keeps memory flat on multi-million-row files
+                if len(pending) >= 2 * workers:
+                    collect(pending.pop(0).result())
+            for future in pending:
+                collect(future.result())
+        return rows_in, rows_out, failed
+    finally:
+        writer.close()
+
+def _chain(first, second, rest):
+    yield first
+    yield second
+    yield from rest
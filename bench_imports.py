@@ -0,0 +1,59 @@
+import argparse
+import subprocess
+import sys
+
+# Modules that must import with NumPy (and the standard library) only
+CORE_MODULES = [
+    'antenna_calc', 'dispersion', 'radiation', 'impedance', 'inverse_design', 'optimizer',
+    'table_cache', 'material_data', 'tissue_index', 'tissue_search', 'tissue_checker',
+    'tissue_model', 'forest_scorer', 'patch_array', 'tolerance', 'body_worn', 'batch_jobs', 'Main',
+]
+# Loaded on first use only; none may appear after importing a core module
+HEAVY_MODULES = ['pandas', 'matplotlib', 'plotly', 'sklearn', 'scipy', 'joblib', 'streamlit', 'pyarrow']
+BUDGET_MS = 250.0
+
+# -----------------------------------
+# Cold-start measurement
+# -----------------------------------
+def measure_import(module):
+    """Cumulative import time (ms) of module in a fresh interpreter, and the heavy modules it pulled in"""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, check=True)
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        # "import time:      self [us] |   cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    heavy = [name for name in proc.stdout.strip().split(',') if name]
+    return cumulative_us / 1000, heavy
+
+def check_imports(modules=CORE_MODULES, budget_ms=BUDGET_MS, repeat=3):
+    """Best-of-repeat import time per module; returns rows and whether every module met the budget"""
+    rows = []
+    for module in modules:
+        runs = [measure_import(module) for _ in range(repeat)]
+        ms = min(run[0] for run in runs)
+        heavy = runs[0][1]
+        rows.append({'module': module, 'ms': ms, 'heavy': heavy, 'ok': ms <= budget_ms and not heavy})
+    return rows, all(row['ok'] for row in rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark with a time budget (python -X importtime)")
+    parser.add_argument("modules", nargs='*', default=CORE_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Maximum cumulative import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module (best time is kept)")
+    args = parser.parse_args(argv)
+
+    rows, ok = check_imports(args.modules, args.budget_ms, args.repeat)
+    for row in rows:
+        status = "✅" if row['ok'] else "❌"
+        heavy = f"  pulls in: {', '.join(row['heavy'])}" if row['heavy'] else ""
+        print(f"{status} {row['module']:<16} {row['ms']:8.1f} ms{heavy}")
+    print(f"Budget: {args.budget_ms:.0f} ms per module, no {', '.join(HEAVY_MODULES)} at import")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
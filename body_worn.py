@@ -0,0 +1,206 @@
+import argparse
+import numpy as np
+from antenna_calc import c, mu0, patch_dimensions_raw, resonant_frequency, fringe_extension
+from impedance import quality_factors
+
+eps0 = 1 / (mu0 * c ** 2)
+
+# The patch's radiating side faces the body across a gap (air, clothing or
+# encapsulation), then tissue layers; the last layer is semi-infinite.
+# Partial-capacitance split: Hammerstad's eff_er = 1 + q (εr - 1) leaves a
+# fraction 1 - q = (1 - s) / 2 of the field above the patch, s = (1 + 12h/W)^-1/2.
+# That upper field is shared between the layers by its decay with height,
+# exp(-z / h): the edge fringing that sets eff_er spreads over about one
+# substrate height. With no tissue the model reduces to the open-air patch.
+DEFAULT_STACK = [('Skin', 2.0), ('Fat', 5.0), ('Muscle', None)]  # (tissue, thickness mm; None = semi-infinite)
+
+# -----------------------------------
+# Multilayer effective permittivity
+# -----------------------------------
+def complex_permittivity(permittivity, elec_cond, freq_hz):
+    """ε' - jσ/(ωε0)"""
+    return permittivity - 1j * elec_cond / (2 * np.pi * freq_hz * eps0)
+
+def layer_weights(h, thicknesses, gap):
+    """Share of the upper field in the gap, each layer (thicknesses in m, None = semi-infinite) and beyond.
+
+    Returns (gap weight, list of layer weights, weight of the air beyond a
+    finite stack); they sum to 1.
+    """
+    z = gap
+    weights = []
+    for t in thicknesses:
+        top = np.inf if t is None else z + t
+        weights.append(np.exp(-z / h) - np.exp(-top / h))
+        z = top
+    return 1 - np.exp(-gap / h), weights, np.exp(-z / h)
+
+def _upper_permittivity(index, stack, weights, freq_hz, method):
+    """Effective complex permittivity of the region above the patch at freq_hz"""
+    w_gap, w_layers, w_beyond = weights
+    eps_up = w_gap * stack['gap_eps'] + w_beyond
+    for tissue_ids, w in zip(stack['tissue_ids'], w_layers):
+        props = index.lookup_many(tissue_ids, freq_hz / 1e9, method)
+        # Tissues listed without dielectric data carry permittivity 0
+        permittivity = np.where(props['permittivity'] >= 1, props['permittivity'], np.nan)
+        eps_up = eps_up + w * complex_permittivity(permittivity, props['elec_cond'], freq_hz)
+    return eps_up
+
+def resolve_stack(index, layers):
+    """[(tissue name, thickness mm or None)] -> tissue ids and thicknesses (m); unknown names raise ValueError"""
+    ids, thicknesses = [], []
+    for i, (name, thickness_mm) in enumerate(layers):
+        tissue_id = index.tissue_id(name)
+        if tissue_id is None:
+            raise ValueError(f"Unknown tissue '{name}'")
+        if not (index.values['permittivity'][index.offsets[tissue_id]:index.offsets[tissue_id + 1]] >= 1).all():
+            raise ValueError(f"Tissue '{name}' has no dielectric data")
+        if thickness_mm is None and i < len(layers) - 1:
+            raise ValueError("Only the last layer can be semi-infinite")
+        ids.append(tissue_id)
+        thicknesses.append(None if thickness_mm is None else thickness_mm / 1000)
+    return ids, thicknesses
+
+# -----------------------------------
+# Detuning and pre-compensation
+# -----------------------------------
+def detuned_patch(fr, h, epsilon, index, tissue_ids, thicknesses, gap=2e-3, gap_eps=1.0, tand=0.0,
+                  metal_sigma=5.8e7, method='linear', iterations=6):
+    """Resonance, effective permittivity and efficiency of the open-air design worn over a tissue stack.
+
+    fr (Hz), h (m), εr and the entries of tissue_ids broadcast together, so
+    one call covers every tissue × frequency. Tissue properties follow the
+    detuned resonance (fixed-point iteration over their dispersion, clamped
+    to the table's frequency range). 'L_compensated' is the length that
+    resonates at fr when worn; 'fr_compensated' is the open-air frequency to
+    design that patch for.
+    """
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    W, L, eff_free = raw['W'], raw['L'], raw['eff_er']
+    q = (1 + np.power(1 + 12 * h / W, -0.5)) / 2
+    stack = {'tissue_ids': tissue_ids, 'gap_eps': gap_eps}
+    weights = layer_weights(h, thicknesses, gap)
+
+    def eff_at(f):
+        return q * epsilon + (1 - q) * _upper_permittivity(index, stack, weights, f, method)
+
+    f_worn = np.asarray(fr, dtype=np.float64) + 0 * W
+    for _ in range(iterations):
+        eff = eff_at(f_worn)
+        f_worn = resonant_frequency(L, W, h, epsilon, eff.real)
+    eff = eff_at(f_worn)
+
+    # Tissue absorption adds to the substrate loss: 1/Q_d = tanδ + (1 - q) ε''_up / ε'_eff
+    tand = np.nan_to_num(np.asarray(tand, dtype=np.float64))
+    tand_worn = tand - eff.imag / eff.real
+    Q_rad, _, _, Q_t = quality_factors(f_worn, h, eff.real, tand_worn, metal_sigma)
+    Q_rad_free, _, _, Q_t_free = quality_factors(fr, h, eff_free, tand, metal_sigma)
+
+    # eff_er does not depend on L, so the worn patch resonates at fr with L solved directly
+    eff_target = eff_at(np.asarray(fr, dtype=np.float64) + 0 * W).real
+    L_comp = c / (2 * fr * np.sqrt(eff_target)) - 2 * fringe_extension(h, W, eff_target)
+    return {
+        'fr': fr + 0 * W,
+        'W': W,
+        'L': L,
+        'eff_er_free': eff_free,
+        'eff_er_worn': eff.real,
+        'loss_tangent_worn': tand_worn,
+        'f_worn': f_worn,
+        'shift_pct': (f_worn - fr) / fr * 100,
+        'efficiency_free': Q_t_free / Q_rad_free,
+        'efficiency_worn': Q_t / Q_rad,
+        'L_compensated': L_comp,
+        'fr_compensated': resonant_frequency(L_comp, W, h, epsilon),
+    }
+
+def tissue_sweep(index, h, epsilon, gap=2e-3, gap_eps=1.0, tand=0.0, metal_sigma=5.8e7, freq_ghz=None):
+    """Every tissue as a semi-infinite body behind the gap, at every tabulated frequency, in one pass.
+
+    Returns a DataFrame with one row per tissue and design frequency (the
+    table's frequencies unless freq_ghz is given); tissues without
+    dielectric data are left out.
+    """
+    import pandas as pd
+    freq = np.unique(index.frequency) if freq_ghz is None else np.atleast_1d(np.asarray(freq_ghz, dtype=np.float64))
+    ids = np.arange(len(index))[:, None]
+    with np.errstate(invalid='ignore'):
+        result = detuned_patch(freq[None, :] * 1e9, h, epsilon, index, [ids], [None], gap, gap_eps, tand, metal_sigma)
+    shape = (len(index), len(freq))
+    frame = pd.DataFrame({
+        'tissue': np.repeat(np.array(index.names, dtype=object), len(freq)),
+        'freq_ghz': np.broadcast_to(freq, shape).ravel(),
+    })
+    frame['freq_worn_ghz'] = np.broadcast_to(result['f_worn'], shape).ravel() / 1e9
+    frame['fr_compensated_ghz'] = np.broadcast_to(result['fr_compensated'], shape).ravel() / 1e9
+    for name in ('shift_pct', 'eff_er_worn', 'loss_tangent_worn', 'efficiency_free', 'efficiency_worn'):
+        frame[name] = np.broadcast_to(result[name], shape).ravel()
+    frame['L_mm'] = np.broadcast_to(result['L'], shape).ravel() * 1000
+    frame['L_compensated_mm'] = np.broadcast_to(result['L_compensated'], shape).ravel() * 1000
+    return frame[np.isfinite(frame['freq_worn_ghz'])].reset_index(drop=True)
+
+def main(argv=None):
+    import time
+    from material_data import MaterialDB
+    from tissue_checker import build_tissue_index
+    parser = argparse.ArgumentParser(description="Detuning of a patch worn over tissue layers, with pre-compensation")
+    parser.add_argument("--freq", type=float, required=True, help="Target frequency in GHz")
+    parser.add_argument("--height", type=float, required=True, help="Substrate height in mm")
+    parser.add_argument("--material", help="Substrate name in the materials CSV (εr and tanδ)")
+    parser.add_argument("--epsilon", type=float, help="Substrate εr (instead of --material)")
+    parser.add_argument("--tand", type=float, default=0.0, help="Substrate loss tangent (with --epsilon)")
+    parser.add_argument("--gap", type=float, default=2.0, help="Gap between patch and skin in mm")
+    parser.add_argument("--gap-eps", type=float, default=1.0, help="Gap permittivity (1 = air)")
+    parser.add_argument("--layer", nargs='+', action='append', metavar=("TISSUE", "MM"),
+                        help="Tissue layer from the body surface inward; omit MM on the last for semi-infinite "
+                             "(default: Skin 2, Fat 5, Muscle)")
+    parser.add_argument("--all-tissues", action="store_true",
+                        help="Also sweep every tissue (as the whole body) at every tabulated frequency")
+    parser.add_argument("--materials-csv", default="cst_materials_extracted.csv")
+    parser.add_argument("--tissue-csv", default="tissue_properties.csv")
+    parser.add_argument("-o", "--out", default="body_worn_sweep.csv", help="CSV for --all-tissues")
+    args = parser.parse_args(argv)
+
+    if args.material:
+        material = MaterialDB.load(args.materials_csv).get(args.material)
+        epsilon, tand = material['Epsilon'], material['TanD']
+    elif args.epsilon:
+        epsilon, tand = args.epsilon, args.tand
+    else:
+        parser.error("give --material or --epsilon")
+
+    layers = DEFAULT_STACK
+    if args.layer:
+        layers = []
+        for layer in args.layer:
+            if len(layer) > 2:
+                parser.error(f"--layer takes a tissue and an optional thickness, got {layer}")
+            layers.append((layer[0], float(layer[1]) if len(layer) > 1 else None))
+
+    index = build_tissue_index(args.tissue_csv)
+    try:
+        ids, thicknesses = resolve_stack(index, layers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    fr, h, gap = args.freq * 1e9, args.height / 1000, args.gap / 1000
+    r = detuned_patch(fr, h, epsilon, index, ids, thicknesses, gap, args.gap_eps, tand)
+    stack = ", ".join(f"{name} {t:g} mm" if t is not None else f"{name} (semi-infinite)" for name, t in layers)
+    print(f"Stack: gap {args.gap:g} mm, {stack}")
+    print(f"Open-air design: L = {float(r['L']) * 1000:.3f} mm, W = {float(r['W']) * 1000:.3f} mm, "
+          f"εeff {float(r['eff_er_free']):.3f}, efficiency {float(r['efficiency_free']) * 100:.1f}%")
+    print(f"Worn: resonance {float(r['f_worn']) / 1e9:.4f} GHz ({float(r['shift_pct']):+.2f}%), "
+          f"εeff {float(r['eff_er_worn']):.3f}, efficiency {float(r['efficiency_worn']) * 100:.1f}%")
+    print(f"✅ Pre-compensated: L = {float(r['L_compensated']) * 1000:.3f} mm "
+          f"(design for {float(r['fr_compensated']) / 1e9:.4f} GHz in open air) resonates at {args.freq:g} GHz when worn")
+
+    if args.all_tissues:
+        start = time.perf_counter()
+        frame = tissue_sweep(index, h, epsilon, gap, args.gap_eps, tand)
+        elapsed = time.perf_counter() - start
+        frame.to_csv(args.out, index=False)
+        print(f"Swept {len(index)} tissues x {frame['freq_ghz'].nunique()} frequencies in {elapsed * 1000:.0f} ms; "
+              f"saved to: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import numpy as np
+
+eps0 = 8.854e-12
+
+# Dispersion models understood by the engine (CST DispModelEps names)
+NON_DISPERSIVE = ('', 'None')
+SUPPORTED_MODELS = NON_DISPERSIVE + ('Debye1st', 'Drude')
+
+# -----------------------------------
+# Complex permittivity models (e^{jωt} convention: ε = ε' - jε'')
+# -----------------------------------
+def _constant(omega, eps, tand):
+    return eps * (1 - 1j * tand) + 0 * omega
+
+def _debye1st(omega, eps_inf, eps_static, tau):
+    # DispCoeff1Eps = static permittivity, DispCoeff2Eps = relaxation time (s)
+    return eps_inf + (eps_static - eps_inf) / (1 + 1j * omega * tau)
+
+def _drude(omega, eps_inf, omega_p, nu):
+    # DispCoeff1Eps = plasma frequency (rad/s), DispCoeff2Eps = collision frequency (1/s)
+    return eps_inf - omega_p ** 2 / (omega * (omega - 1j * nu))
+
+def complex_permittivity(freq_hz, model, eps, tand=0.0, sigma=0.0, eps_inf=np.nan, coeff1=np.nan, coeff2=np.nan):
+    """Complex relative permittivity ε(f) for one dispersion model, broadcast over arrays.
+
+    Static conductivity σ adds σ/(ωε0) to the loss term for every model.
+    """
+    if model not in SUPPORTED_MODELS:
+        raise ValueError(f"Unsupported dispersion model '{model}' (supported: {', '.join(SUPPORTED_MODELS[1:])})")
+
+    omega = 2 * np.pi * np.asarray(freq_hz, dtype=np.float64)
+    tand = np.nan_to_num(np.asarray(tand, dtype=np.float64))
+    sigma = np.nan_to_num(np.asarray(sigma, dtype=np.float64))
+    eps_inf = np.where(np.isnan(eps_inf), 1.0, eps_inf)
+
+    if model in NON_DISPERSIVE:
+        eps_c = _constant(omega, eps, tand)
+    elif model == 'Debye1st':
+        eps_c = _debye1st(omega, eps_inf, coeff1, coeff2)
+    else:
+        eps_c = _drude(omega, eps_inf, coeff1, coeff2)
+
+    return eps_c - 1j * sigma / (omega * eps0)
+
+def loss_tangent(eps_c):
+    # + 0.0 turns -0.0 from lossless materials into 0.0
+    return -eps_c.imag / eps_c.real + 0.0
+
+# -----------------------------------
+# Per-material model
+# -----------------------------------
+class MaterialModel:
+    """Frequency-dependent εr(f) and tanδ(f) for one material row"""
+
+    def __init__(self, row):
+        self.name = row['Filename']
+        self.model = str(row.get('DispModelEps', '') or '')
+        if self.model == 'nan':
+            self.model = ''
+        self.eps = float(row['Epsilon'])
+        self.tand = float(row.get('TanD', 0.0))
+        self.sigma = float(row.get('Sigma', 0.0))
+        self.eps_inf = float(row.get('EpsInfinity', np.nan))
+        self.coeff1 = float(row.get('DispCoeff1Eps', np.nan))
+        self.coeff2 = float(row.get('DispCoeff2Eps', np.nan))
+
+    @property
+    def dispersive(self):
+        return self.model not in NON_DISPERSIVE
+
+    def permittivity(self, freq_hz):
+        return complex_permittivity(freq_hz, self.model, self.eps, self.tand, self.sigma,
+                                    self.eps_inf, self.coeff1, self.coeff2)
+
+    def relative_permittivity(self, freq_hz):
+        return self.permittivity(freq_hz).real
+
+    def loss_tangent(self, freq_hz):
+        return loss_tangent(self.permittivity(freq_hz))
+
+# -----------------------------------
+# Whole-table evaluation
+# -----------------------------------
+def _column(materials, name, default):
+    if name in materials:
+        return np.asarray(materials[name], dtype=np.float64)
+    return np.full(len(materials), default)
+
+def permittivity_table(materials, freq_hz):
+    """Complex εr for every material × frequency, shape (n_materials, n_freqs).
+
+    Rows are grouped by dispersion model so each group is one broadcast
+    evaluation; materials without dispersion columns are treated as constant.
+    """
+    freq_hz = np.atleast_1d(np.asarray(freq_hz, dtype=np.float64))
+    n = len(materials)
+    if 'DispModelEps' in materials:
+        models = np.array(['' if m != m else str(m) for m in materials['DispModelEps']], dtype=object)
+    else:
+        models = np.full(n, '', dtype=object)
+    models[models == 'None'] = ''
+
+    eps = _column(materials, 'Epsilon', np.nan)
+    tand = _column(materials, 'TanD', 0.0)
+    sigma = _column(materials, 'Sigma', 0.0)
+    eps_inf = _column(materials, 'EpsInfinity', np.nan)
+    coeff1 = _column(materials, 'DispCoeff1Eps', np.nan)
+    coeff2 = _column(materials, 'DispCoeff2Eps', np.nan)
+
+    table = np.empty((n, len(freq_hz)), dtype=np.complex128)
+    for model in set(models.tolist()):
+        rows = np.flatnonzero(models == model)
+        col = lambda values: values[rows][:, None]
+        table[rows] = complex_permittivity(freq_hz[None, :], model, col(eps), col(tand), col(sigma),
+                                           col(eps_inf), col(coeff1), col(coeff2))
+    return table
@@ -0,0 +1,423 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from antenna_calc import c, mu0, patch_dimensions_raw
+from impedance import inset_fed_design
+
+eps0 = 1 / (mu0 * c ** 2)
+eta0 = mu0 * c
+
+# Yee grid of Nx × Ny × Nz cells (spacing dx, dy, dz), fields stored on their staggered nodes:
+#   Ex (Nx, Ny+1, Nz+1)   Ey (Nx+1, Ny, Nz+1)   Ez (Nx+1, Ny+1, Nz)
+#   Hx (Nx+1, Ny, Nz)     Hy (Nx, Ny+1, Nz)     Hz (Nx, Ny, Nz+1)
+# Tangential E on the outer faces stays zero (PEC behind the CPML).
+#
+# Each component's curl has a "+" and a "-" term, each the difference of
+# another component along one axis; the third ("free") axis is the same
+# length in all three arrays, so threads split updates along it and every
+# CPML slab stays whole within a thread's chunk.
+_ALL = slice(None)
+_INNER = slice(1, -1)
+_HI, _LO = slice(1, None), slice(None, -1)
+
+def _slices(free_axis, target, plus, minus):
+    return {'free': free_axis, 'target': target, 'plus': plus, 'minus': minus}
+
+# component: (free axis, target region, (+ source, axis, hi, lo), (- source, axis, hi, lo))
+UPDATES = {
+    'Ex': _slices(0, (_ALL, _INNER, _INNER),
+                  ('Hz', 1, (_ALL, _HI, _INNER), (_ALL, _LO, _INNER)),
+                  ('Hy', 2, (_ALL, _INNER, _HI), (_ALL, _INNER, _LO))),
+    'Ey': _slices(1, (_INNER, _ALL, _INNER),
+                  ('Hx', 2, (_INNER, _ALL, _HI), (_INNER, _ALL, _LO)),
+                  ('Hz', 0, (_HI, _ALL, _INNER), (_LO, _ALL, _INNER))),
+    'Ez': _slices(2, (_INNER, _INNER, _ALL),
+                  ('Hy', 0, (_HI, _INNER, _ALL), (_LO, _INNER, _ALL)),
+                  ('Hx', 1, (_INNER, _HI, _ALL), (_INNER, _LO, _ALL))),
+    'Hx': _slices(0, (_ALL, _ALL, _ALL),
+                  ('Ez', 1, (_ALL, _HI, _ALL), (_ALL, _LO, _ALL)),
+                  ('Ey', 2, (_ALL, _ALL, _HI), (_ALL, _ALL, _LO))),
+    'Hy': _slices(1, (_ALL, _ALL, _ALL),
+                  ('Ex', 2, (_ALL, _ALL, _HI), (_ALL, _ALL, _LO)),
+                  ('Ez', 0, (_HI, _ALL, _ALL), (_LO, _ALL, _ALL))),
+    'Hz': _slices(2, (_ALL, _ALL, _ALL),
+                  ('Ey', 0, (_HI, _ALL, _ALL), (_LO, _ALL, _ALL)),
+                  ('Ex', 1, (_ALL, _HI, _ALL), (_ALL, _LO, _ALL))),
+}
+
+def _with_free(slices, axis, chunk):
+    slices = list(slices)
+    s = slices[axis]
+    start = s.start or 0
+    slices[axis] = slice(start + chunk.start, start + chunk.stop)
+    return tuple(slices)
+
+# -----------------------------------
+# Yee FDTD engine
+# -----------------------------------
+class YeeFDTD:
+    """3D Yee FDTD on a uniform grid with CPML boundaries and one resistive lumped port.
+
+    Fields and coefficients are float32 and every update runs in place on
+    preallocated buffers. With threads > 1 each component update is split
+    into slabs along its free axis and run on a thread pool (NumPy releases
+    the GIL inside the array kernels).
+    """
+
+    def __init__(self, shape, spacing, npml=8, threads=1, courant=0.99):
+        self.shape = Nx, Ny, Nz = shape
+        self.spacing = dx, dy, dz = spacing
+        self.npml = npml
+        self.dt = courant / (c * np.sqrt(1 / dx ** 2 + 1 / dy ** 2 + 1 / dz ** 2))
+        self.threads = threads
+        self.fields = {
+            'Ex': np.zeros((Nx, Ny + 1, Nz + 1), np.float32),
+            'Ey': np.zeros((Nx + 1, Ny, Nz + 1), np.float32),
+            'Ez': np.zeros((Nx + 1, Ny + 1, Nz), np.float32),
+            'Hx': np.zeros((Nx + 1, Ny, Nz), np.float32),
+            'Hy': np.zeros((Nx, Ny + 1, Nz), np.float32),
+            'Hz': np.zeros((Nx, Ny, Nz + 1), np.float32),
+        }
+        self.eps_r = np.ones(shape)  # per cell
+        self.sigma = np.zeros(shape)
+        self.pec = []
+        self.port = None
+        self._ready = False
+
+    # ---------------- Geometry ----------------
+    def add_box(self, lo, hi, eps_r, sigma=0.0):
+        """Fill cells lo <= (i, j, k) < hi with a dielectric"""
+        box = tuple(slice(a, b) for a, b in zip(lo, hi))
+        self.eps_r[box] = eps_r
+        self.sigma[box] = sigma
+
+    def add_pec_sheet(self, k, i0, i1, j0, j1):
+        """Perfectly conducting z-normal sheet at node plane k spanning nodes i0..i1 × j0..j1"""
+        self.pec.append((k, i0, i1, j0, j1))
+
+    def add_port(self, i, j, k0, k1, resistance, waveform):
+        """Resistive voltage source along z on the Ez edges (i, j, k0..k1-1); waveform(t) in volts"""
+        self.port = {'i': i, 'j': j, 'k': slice(k0, k1), 'R': resistance, 'waveform': waveform}
+
+    # ---------------- Setup ----------------
+    def _edge_average(self, cells):
+        """Average a per-cell quantity onto the E edges (mean of the four cells sharing each edge)"""
+        P = np.pad(cells, 1, mode='edge')
+        return {
+            'Ex': 0.25 * (P[1:-1, :-1, :-1] + P[1:-1, 1:, :-1] + P[1:-1, :-1, 1:] + P[1:-1, 1:, 1:]),
+            'Ey': 0.25 * (P[:-1, 1:-1, :-1] + P[1:, 1:-1, :-1] + P[:-1, 1:-1, 1:] + P[1:, 1:-1, 1:]),
+            'Ez': 0.25 * (P[:-1, :-1, 1:-1] + P[1:, :-1, 1:-1] + P[:-1, 1:, 1:-1] + P[1:, 1:, 1:-1]),
+        }
+
+    def _cpml_profile(self, n_cells, positions, d):
+        """CPML b, c coefficients (κ = 1) at node positions (in cells) along an axis of n_cells"""
+        m, npml = 3, self.npml
+        depth = np.maximum(np.maximum(npml - positions, positions - (n_cells - npml)), 0) / npml
+        sigma_max = 0.8 * (m + 1) / (eta0 * d)
+        alpha_max = 0.05
+        sigma = sigma_max * depth ** m
+        alpha = alpha_max * (1 - depth)
+        b = np.exp(-(sigma + alpha) * self.dt / eps0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cc = np.where(sigma > 0, sigma / (sigma + alpha) * (b - 1), 0.0)
+        return b.astype(np.float32), cc.astype(np.float32)
+
+    def _setup(self):
+        dt = self.dt
+        eps = self._edge_average(self.eps_r)
+        sig = self._edge_average(self.sigma)
+        self.coeff = {}
+        for name in ('Ex', 'Ey', 'Ez'):
+            e = eps[name] * eps0
+            loss = sig[name] * dt / (2 * e)
+            self.coeff[name] = [((1 - loss) / (1 + loss)), (dt / e) / (1 + loss)]
+
+        # PEC sheets: tangential E never updates
+        for k, i0, i1, j0, j1 in self.pec:
+            for name, region in (('Ex', (slice(i0, i1), slice(j0, j1 + 1), k)),
+                                 ('Ey', (slice(i0, i1 + 1), slice(j0, j1), k))):
+                for arr in self.coeff[name]:
+                    arr[region] = 0.0
+
+        # Lumped port: Taflove's resistive voltage source, split evenly over the port's cells
+        if self.port is not None:
+            port = self.port
+            dx, dy, dz = self.spacing
+            n_cells = port['k'].stop - port['k'].start
+            R_cell = port['R'] / n_cells
+            region = (port['i'], port['j'], port['k'])
+            e = eps['Ez'][region] * eps0
+            beta = dt * dz / (2 * R_cell * e * dx * dy)
+            self.coeff['Ez'][0][region] = (1 - beta) / (1 + beta)
+            self.coeff['Ez'][1][region] = (dt / e) / (1 + beta)
+            port['source_coeff'] = ((dt / (R_cell * e * dx * dy)) / (1 + beta) / n_cells).astype(np.float32)
+
+        for name in ('Ex', 'Ey', 'Ez'):
+            target = UPDATES[name]['target']
+            self.coeff[name] = [np.ascontiguousarray(a[target], dtype=np.float32) for a in self.coeff[name]]
+
+        # Slab tasks: per component and chunk, preallocated derivative and CPML buffers
+        self.tasks = {}
+        for name, spec in UPDATES.items():
+            target_shape = self.fields[name][spec['target']].shape
+            n_free = target_shape[spec['free']]
+            bounds = np.linspace(0, n_free, min(self.threads, n_free) + 1).astype(int)
+            chunks = [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+            self.tasks[name] = [self._make_task(name, spec, chunk) for chunk in chunks]
+
+        self.pool = ThreadPoolExecutor(self.threads) if self.threads > 1 else None
+        self._ready = True
+
+    def _make_task(self, name, spec, chunk):
+        free = spec['free']
+        is_e = name.startswith('E')
+        local = tuple(chunk if axis == free else _ALL for axis in range(3))
+        task = {
+            'name': name,
+            'field': self.fields[name][_with_free(spec['target'], free, chunk)],
+            'terms': [],
+        }
+        if is_e:
+            task['Ca'], task['Cb'] = (a[local] for a in self.coeff[name])
+        for sign, (source, axis, hi, lo) in (('+', spec['plus']), ('-', spec['minus'])):
+            src = self.fields[source]
+            view_hi = src[_with_free(hi, free, chunk)]
+            view_lo = src[_with_free(lo, free, chunk)]
+            buffer = np.empty(view_hi.shape, np.float32)
+            n_cells = self.shape[axis]
+            # E nodes sit at integer positions 1..N-1 along the derivative axis, H nodes at 0.5..N-0.5
+            positions = np.arange(1, n_cells) if is_e else np.arange(n_cells) + 0.5
+            b, cc = self._cpml_profile(n_cells, positions, self.spacing[axis])
+            slabs = []
+            n = buffer.shape[axis]
+            for sl in (slice(0, self.npml), slice(n - self.npml, n)):
+                index = tuple(sl if a == axis else _ALL for a in range(3))
+                bshape = [1, 1, 1]
+                bshape[axis] = self.npml
+                slabs.append({
+                    'index': index,
+                    'b': b[sl].reshape(bshape),
+                    'c': cc[sl].reshape(bshape),
+                    'psi': np.zeros(buffer[index].shape, np.float32),
+                    'tmp': np.empty(buffer[index].shape, np.float32),
+                })
+            task['terms'].append({'hi': view_hi, 'lo': view_lo, 'buffer': buffer,
+                                  'scale': np.float32(1 / self.spacing[axis]), 'slabs': slabs})
+        return task
+
+    # ---------------- Time stepping ----------------
+    def _run_task(self, task):
+        terms = task['terms']
+        for term in terms:
+            d = term['buffer']
+            np.subtract(term['hi'], term['lo'], out=d)
+            d *= term['scale']
+            for slab in term['slabs']:
+                psi, view = slab['psi'], d[slab['index']]
+                psi *= slab['b']
+                np.multiply(slab['c'], view, out=slab['tmp'])
+                psi += slab['tmp']
+                view += psi
+        curl = terms[0]['buffer']
+        curl -= terms[1]['buffer']
+        field = task['field']
+        if 'Ca' in task:
+            curl *= task['Cb']
+            field *= task['Ca']
+            field += curl
+        else:
+            curl *= np.float32(self.dt / mu0)
+            field -= curl
+
+    def _half_step(self, names):
+        tasks = [task for name in names for task in self.tasks[name]]
+        if self.pool is None:
+            for task in tasks:
+                self._run_task(task)
+        else:
+            for future in [self.pool.submit(self._run_task, task) for task in tasks]:
+                future.result()
+
+    def port_voltage(self):
+        port = self.port
+        return float(self.fields['Ez'][port['i'], port['j'], port['k']].sum()) * self.spacing[2]
+
+    def run(self, max_steps, decay=1e-3, check_every=200, min_time=0.0):
+        """Leapfrog until max_steps or until the port voltage has rung down below decay × its peak.
+
+        Returns the port voltage and current, both at the half steps
+        (n + 1/2) dt, and the source voltage at the same times.
+        """
+        if not self._ready:
+            self._setup()
+        port = self.port
+        Ez = self.fields['Ez']
+        region = (port['i'], port['j'], port['k'])
+        V_half = np.zeros(max_steps)
+        I_half = np.zeros(max_steps)
+        Vs_half = np.zeros(max_steps)
+        V_prev = self.port_voltage()
+        peak = 0.0
+        n = 0
+        try:
+            for n in range(max_steps):
+                t_half = (n + 0.5) * self.dt
+                self._half_step(('Hx', 'Hy', 'Hz'))
+                self._half_step(('Ex', 'Ey', 'Ez'))
+                Vs = port['waveform'](t_half)
+                Ez[region] += port['source_coeff'] * np.float32(Vs)
+
+                V = self.port_voltage()
+                V_half[n] = 0.5 * (V + V_prev)
+                I_half[n] = (Vs - V_half[n]) / port['R']
+                Vs_half[n] = Vs
+                V_prev = V
+                peak = max(peak, abs(V_half[n]))
+                if (n + 1) % check_every == 0 and t_half > min_time:
+                    if np.abs(V_half[n + 1 - check_every:n + 1]).max() < decay * peak:
+                        break
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+                self._ready = False
+        steps = n + 1
+        return {'t': (np.arange(steps) + 0.5) * self.dt, 'V': V_half[:steps], 'I': I_half[:steps],
+                'Vs': Vs_half[:steps], 'steps': steps}
+
+# -----------------------------------
+# Patch model
+# -----------------------------------
+def gaussian_pulse(f_max):
+    """Gaussian voltage pulse whose spectrum is 40 dB down at f_max"""
+    tau = np.sqrt(np.log(100)) / (np.pi * f_max)
+    t0 = 4 * tau
+    return (lambda t: float(np.exp(-((t - t0) / tau) ** 2))), t0
+
+def dft(signal, t, freq_hz, chunk=256):
+    """Σ signal(t) e^{-j2πft} dt at arbitrary frequencies"""
+    dt = t[1] - t[0]
+    out = np.empty(len(freq_hz), complex)
+    for start in range(0, len(freq_hz), chunk):
+        f = freq_hz[start:start + chunk, None]
+        out[start:start + chunk] = np.exp(-2j * np.pi * f * t[None, :]) @ signal * dt
+    return out
+
+def build_patch_model(fr, h, epsilon, tand=0.0, feed_inset=None, cells_per_patch=40, substrate_cells=4,
+                      air_cells=(8, 20), margin_cells=10, npml=8, threads=1, Z0=50.0):
+    """YeeFDTD model of the closed-form patch on its finite substrate and ground plane.
+
+    The cell size makes L and W whole numbers of cells (cells_per_patch along
+    each) and the substrate substrate_cells thick, so the patch is meshed
+    exactly. The ground plane and substrate are 6h larger than the patch like
+    calculate_patch_dimensions. The port is a Z0 lumped source between ground
+    and patch at the probe position, feed_inset from the radiating edge
+    (default: the 50 Ω inset depth from inset_fed_design), centred in W.
+    Substrate loss is tanδ at fr. air_cells are the air layers below the
+    ground and above the patch; margin_cells pad the sides before the CPML.
+    """
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    L, W = float(raw['L']), float(raw['W'])
+    if feed_inset is None:
+        feed_inset = float(inset_fed_design(fr, h, epsilon, tand)['inset'])
+    nL = nW = cells_per_patch
+    dx, dy, dz = L / nL, W / nW, h / substrate_cells
+    # Ground extends 3h beyond the patch on each side
+    gx, gy = int(round(3 * h / dx)), int(round(3 * h / dy))
+    pad_x, pad_y = npml + margin_cells + gx, npml + margin_cells + gy
+    below, above = air_cells
+    Nx, Ny = 2 * pad_x + nL, 2 * pad_y + nW
+    kg = npml + below
+    Nz = kg + substrate_cells + above + npml
+
+    model = YeeFDTD((Nx, Ny, Nz), (dx, dy, dz), npml=npml, threads=threads)
+    model.add_box((pad_x - gx, pad_y - gy, kg), (pad_x + nL + gx, pad_y + nW + gy, kg + substrate_cells),
+                  epsilon, 2 * np.pi * fr * eps0 * epsilon * tand)
+    model.add_pec_sheet(kg, pad_x - gx, pad_x + nL + gx, pad_y - gy, pad_y + nW + gy)
+    model.add_pec_sheet(kg + substrate_cells, pad_x, pad_x + nL, pad_y, pad_y + nW)
+    i_feed = pad_x + int(round(feed_inset / dx))
+    j_feed = pad_y + nW // 2
+    waveform, t0 = gaussian_pulse(2 * fr)
+    model.add_port(i_feed, j_feed, kg, kg + substrate_cells, Z0, waveform)
+    info = {'L': L, 'W': W, 'feed_inset': (i_feed - pad_x) * dx, 'cells': Nx * Ny * Nz,
+            'shape': (Nx, Ny, Nz), 'dt': model.dt, 'pulse_t0': t0}
+    return model, info
+
+def simulate_patch(fr, h, epsilon, tand=0.0, max_steps=40_000, decay=1e-3, n_freqs=1001, Z0=50.0, **mesh):
+    """FDTD check of the closed-form patch: S11 and input impedance over 0.7–1.3 fr, and the resonance.
+
+    Returns a dict with the swept 'freq_hz', 'S11_db', 'Z_in', 'resonance_hz'
+    (minimum |S11|), 'resonance_re_z_hz' (peak input resistance, independent
+    of the feed match), and the closed-form error in percent.
+    """
+    model, info = build_patch_model(fr, h, epsilon, tand, Z0=Z0, **mesh)
+    start = time.perf_counter()
+    result = model.run(max_steps, decay, min_time=3 * info['pulse_t0'])
+    elapsed = time.perf_counter() - start
+
+    freq = np.linspace(0.7 * fr, 1.3 * fr, n_freqs)
+    V = dft(result['V'], result['t'], freq)
+    I = dft(result['I'], result['t'], freq)
+    Z_in = V / I
+    S11 = (Z_in - Z0) / (Z_in + Z0)
+    S11_db = 20 * np.log10(np.maximum(np.abs(S11), 1e-12))
+    f_res = freq[np.argmin(S11_db)]
+    return {
+        **info,
+        'steps': result['steps'],
+        'elapsed_s': elapsed,
+        'freq_hz': freq,
+        'S11_db': S11_db,
+        'Z_in': Z_in,
+        'resonance_hz': f_res,
+        'resonance_re_z_hz': freq[np.argmax(Z_in.real)],
+        's11_min_db': float(S11_db.min()),
+        # Simulated resonance relative to the design target (negative: the built patch resonates low)
+        'offset_pct': (f_res - fr) / fr * 100,
+    }
+
+def main(argv=None):
+    from material_data import MaterialDB
+    parser = argparse.ArgumentParser(description="Verify a closed-form patch design with a 3D FDTD simulation")
+    parser.add_argument("--freq", type=float, required=True, help="Design frequency in GHz")
+    parser.add_argument("--height", type=float, required=True, help="Substrate height in mm")
+    parser.add_argument("--material", help="Substrate name in the materials CSV (εr and tanδ)")
+    parser.add_argument("--epsilon", type=float, help="Substrate εr (instead of --material)")
+    parser.add_argument("--tand", type=float, default=0.0, help="Substrate loss tangent (with --epsilon)")
+    parser.add_argument("--materials-csv", default="cst_materials_extracted.csv")
+    parser.add_argument("--cells", type=int, default=40, help="Cells along the patch length and width")
+    parser.add_argument("--substrate-cells", type=int, default=4, help="Cells through the substrate")
+    parser.add_argument("--threads", type=int, default=1, help="Threads for the slab-parallel update")
+    parser.add_argument("--max-steps", type=int, default=40_000)
+    parser.add_argument("--out", help="Write frequency, S11 and input impedance to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.material:
+        material = MaterialDB.load(args.materials_csv).get(args.material)
+        epsilon, tand = material['Epsilon'], np.nan_to_num(material['TanD'])
+    elif args.epsilon:
+        epsilon, tand = args.epsilon, args.tand
+    else:
+        parser.error("give --material or --epsilon")
+
+    fr, h = args.freq * 1e9, args.height / 1000
+    result = simulate_patch(fr, h, epsilon, tand, args.max_steps, cells_per_patch=args.cells,
+                            substrate_cells=args.substrate_cells, threads=args.threads)
+    Nx, Ny, Nz = result['shape']
+    print(f"Mesh {Nx} x {Ny} x {Nz} ({result['cells']:,} cells), {result['steps']} steps "
+          f"in {result['elapsed_s']:.1f} s")
+    print(f"Patch {result['L'] * 1000:.3f} x {result['W'] * 1000:.3f} mm, "
+          f"probe {result['feed_inset'] * 1000:.2f} mm from the radiating edge")
+    print(f"Simulated resonance: {result['resonance_hz'] / 1e9:.4f} GHz (|S11| min {result['s11_min_db']:.1f} dB); "
+          f"peak Re(Zin) at {result['resonance_re_z_hz'] / 1e9:.4f} GHz")
+    print(f"Simulated resonance is {result['offset_pct']:+.2f}% from the {args.freq:.4f} GHz target")
+
+    if args.out:
+        Z = result['Z_in']
+        np.savetxt(args.out, np.column_stack([result['freq_hz'] / 1e9, result['S11_db'], Z.real, Z.imag]),
+                   delimiter=',', header='freq_ghz,s11_db,re_z,im_z', comments='', fmt='%.6g')
+        print(f"S11 saved to {args.out}")
+
+if __name__ == "__main__":
+    main()
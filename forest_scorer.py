@@ -0,0 +1,119 @@
+import numpy as np
+
+FOREST_FORMAT = 1
+
+# -----------------------------------
+# Export (needs the fitted scikit-learn model, not scikit-learn itself)
+# -----------------------------------
+def export_forest(model, path, feature_names=None):
+    """Flatten a fitted RandomForestClassifier into a .npz of plain NumPy arrays.
+
+    All trees are concatenated into one node table with global child indices;
+    leaves point at themselves (left == right == own index).
+    """
+    features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        own = np.arange(n) + offset
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(leaf, own, tree.children_left + offset))
+        rights.append(np.where(leaf, own, tree.children_right + offset))
+        missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(n, dtype=np.uint8)) | leaf)
+        values.append(tree.value[:, 0, :])
+        roots.append(offset)
+        offset += n
+
+    if feature_names is None:
+        feature_names = getattr(model, 'feature_names_in_', [f"x{i}" for i in range(model.n_features_in_)])
+    np.savez(
+        path,
+        format=np.array(FOREST_FORMAT),
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        missing_left=np.concatenate(missing_left).astype(bool),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.int32),
+        classes=np.asarray(model.classes_).astype(str),
+        feature_names=np.asarray(feature_names).astype(str),
+    )
+
+# -----------------------------------
+# Scorer (NumPy only)
+# -----------------------------------
+class CompiledForest:
+    """Vectorized traversal of an exported forest; reproduces RandomForestClassifier.predict exactly.
+
+    Every sample walks every tree at once, dropping (sample, tree) pairs as
+    they reach a leaf. Features are rounded to float32 first, as scikit-learn
+    does before comparing against the float64 thresholds, and tree
+    probabilities are summed in tree order.
+    """
+
+    def __init__(self, arrays):
+        if int(arrays['format']) != FOREST_FORMAT:
+            raise ValueError(f"Unsupported forest format {int(arrays['format'])} (expected {FOREST_FORMAT})")
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self._leaf = self.left == np.arange(len(self.left))
+        self.classes_ = arrays['classes'].astype(object)
+        self.feature_names = arrays['feature_names'].tolist()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right,
+                                      self.missing_left, self.value, self.roots))
+
+    def apply(self, X):
+        """Leaf node (global index) reached in every tree, shape (n_samples, n_trees)"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32)).astype(np.float64)
+        n, n_features = X.shape
+        flat = X.ravel()
+        node = np.tile(self.roots, n)
+        base = np.repeat(np.arange(n) * n_features, self.n_trees)
+        has_nan = np.isnan(flat).any()
+        # Only (sample, tree) pairs still at an internal node take another step
+        active = np.arange(n * self.n_trees)
+        while active.size:
+            current = node[active]
+            x = flat[base[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                missing = np.isnan(x)
+                go_left[missing] = self.missing_left[current[missing]]
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            active = active[~self._leaf[current]]
+        return node.reshape(n, self.n_trees)
+
+    def predict_proba(self, X, chunk_size=1024):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        proba = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            # Reducing over the leading (tree) axis adds trees one after another, like scikit-learn
+            proba[start:start + chunk_size] = self.value[leaves.T].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X, chunk_size=1024):
+        return self.classes_.take(np.argmax(self.predict_proba(X, chunk_size), axis=1))
@@ -0,0 +1,122 @@
+from functools import lru_cache
+import numpy as np
+from antenna_calc import c, mu0, patch_dimensions_raw, surface_resistance
+
+eta0 = 120 * np.pi  # Free-space wave impedance (Ω)
+
+# -----------------------------------
+# Quadrature tables
+# -----------------------------------
+@lru_cache(maxsize=4)
+def _theta_nodes(n=180):
+    # Midpoints over (0, π) avoid the removable 0/0 at θ = 90°
+    theta = (np.arange(n) + 0.5) * np.pi / n
+    return np.cos(theta), np.sin(theta) ** 3, np.pi / n
+
+@lru_cache(maxsize=4)
+def _bessel_nodes(n=32):
+    tau = (np.arange(n) + 0.5) * np.pi / n
+    return np.sin(tau)
+
+def _j0(x):
+    """Bessel J0 via J0(x) = (1/π) ∫₀^π cos(x sin τ) dτ (NumPy has no J0)"""
+    sin_tau = _bessel_nodes()
+    return np.cos(np.asarray(x)[..., None] * sin_tau).mean(axis=-1)
+
+# -----------------------------------
+# Transmission-line model
+# -----------------------------------
+def slot_conductances(fr, W, L):
+    """Self (G1) and mutual (G12) conductance of the two radiating slots, in S"""
+    cos_t, sin3_t, d = _theta_nodes()
+    k0 = 2 * np.pi * np.asarray(fr, dtype=np.float64) / c
+    W = np.asarray(W, dtype=np.float64)
+    L = np.asarray(L, dtype=np.float64)
+    a = (k0 * W / 2)[..., None]
+    slot = (np.sin(a * cos_t) / cos_t) ** 2 * sin3_t
+    G1 = slot.sum(axis=-1) * d / (120 * np.pi ** 2)
+    sin_t = np.sqrt(1 - cos_t ** 2)
+    G12 = (slot * _j0((k0 * L)[..., None] * sin_t)).sum(axis=-1) * d / (120 * np.pi ** 2)
+    return G1, G12
+
+def edge_resistance(fr, W, L):
+    """Radiation resistance at the radiating edge, Rin = 1 / (2 (G1 + G12))"""
+    G1, G12 = slot_conductances(fr, W, L)
+    return 1 / (2 * (G1 + G12))
+
+def inset_feed_depth(R_edge, L, Z0=50.0):
+    """Inset y0 with R_edge cos²(π y0 / L) = Z0; 0 where the edge is already below Z0"""
+    ratio = np.clip(Z0 / np.asarray(R_edge, dtype=np.float64), 0.0, 1.0)
+    return L / np.pi * np.arccos(np.sqrt(ratio))
+
+def quality_factors(fr, h, eff_er, tand, metal_sigma):
+    """Radiation, conductor and dielectric Q of the cavity (Balanis approximations)"""
+    fr = np.asarray(fr, dtype=np.float64)
+    Q_rad = c * np.sqrt(eff_er) / (4 * fr * h)
+    # Q_c = h sqrt(π f μ0 σ) = π f μ0 h / Rs, with Rs as in conductor_efficiency
+    sigma = np.nan_to_num(np.asarray(metal_sigma, dtype=np.float64))
+    Q_c = np.where(sigma > 0, np.pi * fr * mu0 * h / surface_resistance(fr, np.maximum(sigma, 1e-300)), np.inf)
+    tand = np.nan_to_num(np.asarray(tand, dtype=np.float64))
+    Q_d = np.where(tand > 0, 1 / np.maximum(tand, 1e-300), np.inf)
+    Q_t = 1 / (1 / Q_rad + 1 / Q_c + 1 / Q_d)
+    return Q_rad, Q_c, Q_d, Q_t
+
+def inset_fed_design(fr, h, epsilon, tand=0.0, metal_sigma=5.8e7, Z0=50.0):
+    """Patch geometry, losses and inset depth matched to Z0, broadcast over designs.
+
+    Lengths in metres. Conductor and dielectric loss lower the resonant
+    resistance by Q_t / Q_rad (the radiation efficiency), and the inset depth
+    is chosen against that loaded edge resistance.
+    """
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    W, L = raw['W'], raw['L']
+    Q_rad, Q_c, Q_d, Q_t = quality_factors(fr, h, raw['eff_er'], tand, metal_sigma)
+    efficiency = Q_t / Q_rad
+    R_edge = edge_resistance(fr, W, L) * efficiency
+    y0 = inset_feed_depth(R_edge, L, Z0)
+    return {
+        'fr': np.asarray(fr, dtype=np.float64) + 0 * W,
+        'W': W,
+        'L': L,
+        'R_edge': R_edge,
+        'inset': y0,
+        'R_in': R_edge * np.cos(np.pi * y0 / L) ** 2,
+        'Q_rad': Q_rad,
+        'Q_c': Q_c,
+        'Q_d': Q_d,
+        'Q_t': Q_t,
+        'efficiency': efficiency,
+    }
+
+def frequency_response(design, freq_hz, Z0=50.0):
+    """Input impedance, S11 and VSWR versus frequency (parallel RLC around fr).
+
+    design is a dict from inset_fed_design; scalar designs give 1-D curves,
+    batched designs give (n_designs, n_freqs) arrays.
+    """
+    f = np.asarray(freq_hz, dtype=np.float64)
+    fr = np.asarray(design['fr'])[..., None]
+    R = np.asarray(design['R_in'])[..., None]
+    Q_t = np.asarray(design['Q_t'])[..., None]
+    Z_in = R / (1 + 1j * Q_t * (f / fr - fr / f))
+    S11 = (Z_in - Z0) / (Z_in + Z0)
+    mag = np.abs(S11)
+    return {
+        'freq_hz': f,
+        'Z_in': Z_in,
+        'S11': S11,
+        'S11_db': 20 * np.log10(np.maximum(mag, 1e-12)),
+        'VSWR': (1 + mag) / np.maximum(1 - mag, 1e-12),
+    }
+
+def matched_bandwidth(R_in, Q_t, Z0=50.0, s11_db=-10.0):
+    """Fractional bandwidth where |S11| < s11_db, solved in closed form for the parallel RLC.
+
+    With r = R_in / Z0 and x = f/fr - fr/f, |Γ|² = ((r-1)² + (Q x)²) / ((r+1)² + (Q x)²);
+    the band edges sit at x = ±x_max, which are exactly x_max apart in f/fr.
+    """
+    s2 = 10 ** (s11_db / 10)
+    r = np.asarray(R_in, dtype=np.float64) / Z0
+    num = s2 * (r + 1) ** 2 - (r - 1) ** 2
+    Qx = np.sqrt(np.maximum(num, 0) / (1 - s2))
+    return Qx / Q_t
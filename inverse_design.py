@@ -0,0 +1,85 @@
+import numpy as np
+from antenna_calc import patch_dimensions_raw, fractional_bandwidth
+
+# -----------------------------------
+# Inverse Design Solver
+# -----------------------------------
+def _evaluate(fr, h, eps):
+    raw = patch_dimensions_raw(fr, h, eps)
+    bw = fractional_bandwidth(fr, h, eps, raw['W'], raw['L'])
+    return raw['L'], raw['W'], bw
+
+def _feasible(L, W, bw, max_L, max_W, min_bw):
+    ok = (L > 0) & (L <= max_L) & (W <= max_W)
+    if min_bw is not None:
+        ok &= bw >= min_bw
+    return ok
+
+def _refine(fr, eps, h_ok, h_bad, max_L, max_W, min_bw, iterations=40):
+    """Vectorized bisection between a feasible and an infeasible height per material"""
+    for _ in range(iterations):
+        mid = (h_ok + h_bad) / 2
+        ok = _feasible(*_evaluate(fr, mid, eps), max_L, max_W, min_bw)
+        h_ok = np.where(ok, mid, h_ok)
+        h_bad = np.where(ok, h_bad, mid)
+    return h_ok
+
+def inverse_design(freq_ghz, max_L_mm, max_W_mm, materials, h_range_mm=(0.1, 5.0),
+                   min_bandwidth=None, objective='bandwidth', grid_size=64, top_k=10):
+    """Find (material, height) pairs whose patch fits max_L_mm × max_W_mm at freq_ghz.
+
+    A coarse height grid is evaluated for every material at once, then the
+    edge of each material's feasible range is refined by bisection.
+    objective='bandwidth' picks the thickest feasible board per material and
+    ranks by bandwidth; objective='thin' picks the thinnest and ranks by height.
+    min_bandwidth is a fractional bandwidth (e.g. 0.02 for 2 %).
+    """
+    import pandas as pd
+    if objective not in ('bandwidth', 'thin'):
+        raise ValueError("objective must be 'bandwidth' or 'thin'")
+
+    fr = freq_ghz * 1e9
+    max_L = max_L_mm / 1000
+    max_W = max_W_mm / 1000
+    names = materials['Filename'].to_numpy()
+    eps = materials['Epsilon'].to_numpy(dtype=np.float64)
+
+    h_grid = np.linspace(h_range_mm[0], h_range_mm[1], grid_size) / 1000
+    L, W, bw = _evaluate(fr, h_grid[None, :], eps[:, None])
+    ok = _feasible(L, W, bw, max_L, max_W, min_bandwidth)
+
+    has_design = ok.any(axis=1)
+    if not has_design.any():
+        return pd.DataFrame(columns=['Filename', 'Epsilon', 'h_mm', 'L', 'W', 'bandwidth_pct'])
+
+    names, eps, ok = names[has_design], eps[has_design], ok[has_design]
+    if objective == 'bandwidth':
+        idx = grid_size - 1 - np.argmax(ok[:, ::-1], axis=1)
+        neighbour = np.minimum(idx + 1, grid_size - 1)
+    else:
+        idx = np.argmax(ok, axis=1)
+        neighbour = np.maximum(idx - 1, 0)
+
+    # Only refine where the neighbouring grid point actually crosses the boundary
+    h_ok = h_grid[idx]
+    h_bad = h_grid[neighbour]
+    crossing = ~ok[np.arange(len(idx)), neighbour]
+    h_best = h_ok.copy()
+    if crossing.any():
+        h_best[crossing] = _refine(fr, eps[crossing], h_ok[crossing], h_bad[crossing],
+                                   max_L, max_W, min_bandwidth)
+
+    L, W, bw = _evaluate(fr, h_best, eps)
+    result = pd.DataFrame({
+        'Filename': names,
+        'Epsilon': eps,
+        'h_mm': h_best * 1000,
+        'L': L * 1000,
+        'W': W * 1000,
+        'bandwidth_pct': bw * 100,
+    })
+    if objective == 'bandwidth':
+        result = result.sort_values('bandwidth_pct', ascending=False)
+    else:
+        result = result.sort_values('h_mm')
+    return result.head(top_k).reset_index(drop=True)
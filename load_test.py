@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# -----------------------------------
+# Request mixes
+# -----------------------------------
+def patch_paths(n, seed=0):
+    """Random single-design queries (frequency 0.5–10 GHz, height 0.2–3.2 mm, εr 2–12)"""
+    rng = np.random.default_rng(seed)
+    freq = rng.uniform(0.5, 10.0, n).round(3)
+    h = rng.uniform(0.2, 3.2, n).round(2)
+    eps = rng.uniform(2.0, 12.0, n).round(2)
+    return [f"/patch?freq_ghz={f}&h_mm={hh}&epsilon={e}" for f, hh, e in zip(freq, h, eps)]
+
+def tissue_paths(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tissues = ["Skin", "Fat", "Muscle", "Blood", "Bone (Cortical)"]
+    return [f"/tissue/check?tissue={urllib.parse.quote(tissues[i % len(tissues)])}"
+            f"&freq_ghz={f:.3f}&permittivity={p:.2f}&elec_cond={s:.3f}"
+            for i, (f, p, s) in enumerate(zip(rng.uniform(1, 6, n), rng.uniform(5, 60, n), rng.uniform(0.1, 4, n)))]
+
+MIXES = {'patch': patch_paths, 'tissue': tissue_paths}
+
+# -----------------------------------
+# Keep-alive HTTP/1.1 client (one process)
+# -----------------------------------
+async def _connection(host, port, paths, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors[0] += 1
+    finally:
+        writer.close()
+
+def _run_worker(host, port, mix, connections, duration, seed):
+    """Drive `connections` keep-alive connections for `duration` seconds; returns latencies and error count"""
+    paths = MIXES[mix](10_000, seed)
+    latencies, errors = [], [0]
+
+    async def run():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(_connection(host, port, paths[k::connections], deadline, latencies, errors)
+                               for k in range(connections)))
+
+    asyncio.run(run())
+    return np.array(latencies), errors[0]
+
+def load_test(url, mix='patch', connections=64, duration=10.0, processes=1):
+    """Closed-loop load test: every connection sends its next request as soon as the last one returns"""
+    parsed = urllib.parse.urlsplit(url)
+    per_process = max(1, connections // processes)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        runs = list(pool.map(_run_worker, [parsed.hostname] * processes, [parsed.port or 80] * processes,
+                             [mix] * processes, [per_process] * processes, [duration] * processes,
+                             range(processes)))
+    elapsed = time.perf_counter() - start
+    latencies = np.concatenate([run[0] for run in runs]) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': sum(run[1] for run in runs),
+        'requests_per_s': len(latencies) / duration,
+        'elapsed_s': elapsed,
+        **{f'p{q}_ms': float(np.percentile(latencies, q)) for q in (50, 95, 99)},
+        'max_ms': float(latencies.max()),
+    }
+
+# -----------------------------------
+# Streaming sweep throughput
+# -----------------------------------
+def sweep_test(url, body):
+    """Time one NDJSON sweep: time to first row and rows/s over the whole stream"""
+    request = urllib.request.Request(url.rstrip('/') + '/sweep', data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    first = None
+    rows = 0
+    with urllib.request.urlopen(request) as response:
+        for line in response:
+            if first is None:
+                first = time.perf_counter() - start
+            rows += 1
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'first_row_ms': (first or 0) * 1000, 'elapsed_s': elapsed, 'rows_per_s': rows / elapsed}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for service.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mix", choices=list(MIXES), default='patch', help="Single-request endpoint to hammer")
+    parser.add_argument("-c", "--connections", type=int, default=64, help="Concurrent keep-alive connections (total)")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("-j", "--processes", type=int, default=1, help="Client processes (use several when the client saturates a core)")
+    parser.add_argument("--sweep", action="store_true", help="Also time a streamed 1–10 GHz × 0.2–3.2 mm substrate sweep")
+    args = parser.parse_args(argv)
+
+    result = load_test(args.url, args.mix, args.connections, args.duration, args.processes)
+    print(f"{result['requests']:,} requests in {args.duration:.0f} s: {result['requests_per_s']:,.0f} req/s, "
+          f"{result['errors']} errors")
+    print(f"Latency p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+          f"p99 {result['p99_ms']:.2f} ms, max {result['max_ms']:.2f} ms")
+
+    if args.sweep:
+        result = sweep_test(args.url, {'freq': [1, 10, 0.01], 'height': [0.2, 3.2, 0.1], 'component': 'Substrate'})
+        print(f"Sweep: {result['rows']:,} rows in {result['elapsed_s']:.2f} s ({result['rows_per_s']:,.0f} rows/s), "
+              f"first row after {result['first_row_ms']:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,24 @@
 
 import streamlit as st
-import pandas as pd
-from material_data import load_materials, find_materials_by_names
-from antenna_calc import calculate_patch_dimensions
-from ui_components import show_material_props, filter_materials
-from plotting import plot_antenna_geometry, plot_antenna_3d
-from tissue_checker import load_tissue_data, check_compatibility
-
-# -----------------------------------
-# Component-specific restrictions
-# -----------------------------------
-component_materials = {
-    "Substrate": ["FR4", "Rogers RO4003C", "Taconic TLY-5", "Alumina", "PTFE", "Ceramic", "FR-4"],
-    "Patch": ["Copper", "Silver", "Gold", "Aluminum","FR-4"],
-    "Ground": ["Copper", "Silver", "Gold", "Aluminum","FR-4"]
-}
+import numpy as np
+import os
+from material_data import MaterialDB, component_materials
+from antenna_calc import calculate_patch_dimensions, patch_dimensions_raw
+from radiation import pattern_metrics, principal_plane_cuts
+from impedance import inset_fed_design, frequency_response
+from optimizer import optimize_design
+from inverse_design import inverse_design
+from ui_components import show_material_props, format_beamwidth
+from patch_array import design_array, array_metrics, beam_cuts, TAPERS
+from tolerance import tolerance_analysis, DISTRIBUTIONS
+from body_worn import detuned_patch, resolve_stack, tissue_sweep, DEFAULT_STACK
+from plotting import (antenna_geometry_figure, antenna_3d_figure, radiation_pattern_figure, s11_figure,
+                      figure_png, plot_pareto_front, array_layout_figure, array_3d_figure, beam_cuts_figure,
+                      tolerance_histogram_figure)
+from result_cache import ResultCache
+from tissue_checker import build_tissue_index, check_compatibility
+from tissue_search import TissueNeighbors
+from tissue_model import TissueClassifier, default_model_path
 
 # -----------------------------------
 # App config
@@ -22,14 +26,114 @@ component_materials = {
 st.set_page_config(page_title="Antenna Designer", page_icon="📡", layout="centered")
 st.title("📡 Microstrip Patch Antenna Dimension Calculator")
 
-# Load materials
-df = load_materials("cst_materials_extracted.csv")
-if df is None:
+# Load materials once per server process; lookups go through the DB's indexes
+@st.cache_resource(show_spinner=True)
+def load_material_db(csv_path):
+    try:
+        return MaterialDB.load(csv_path)
+    except Exception as e:
+        st.error(f"❌ Failed to load material data: {e}")
+        return None
+
+db = load_material_db("cst_materials_extracted.csv")
+if db is None:
     st.warning("CSV file not found or failed to load.")
     st.stop()
 
 # Load tissue dataset
-tissue_df = load_tissue_data("tissues_properties.csv")
+@st.cache_resource(show_spinner=False)
+def load_tissue_index(csv_path):
+    return build_tissue_index(csv_path, use_cache=True)
+
+tissue_index = load_tissue_index("tissue_properties.csv")
+
+@st.cache_resource(show_spinner=False)
+def load_tissue_search(csv_path):
+    return TissueNeighbors(load_tissue_index(csv_path))
+
+# Tissue-class model (compiled forest when exported by train_model.py); optional
+@st.cache_resource(show_spinner=False)
+def load_tissue_classifier(model_path):
+    return TissueClassifier(model_path) if os.path.exists(model_path) else None
+
+# -----------------------------------
+# Result cache (shared by all sessions of this server process)
+# -----------------------------------
+# Set ANTENNA_CACHE_DIR to a shared volume so replicas also reuse each other's results
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    return ResultCache(maxsize=512, disk_dir=os.environ.get("ANTENNA_CACHE_DIR"))
+
+results = get_result_cache()
+
+# Namespaces carry the material table's content hash, so entries computed from an
+# older cst_materials_extracted.csv (edited or regenerated by parse.py) are never served.
+# Cached values are plain data and PNG bytes; Plotly figures are built on each call.
+def design_namespace(name):
+    return f"{name}-{db.digest[:16]}"
+
+@results.memoize(design_namespace("standard_design"))
+def standard_design(freq_ghz, h_mm, substrate):
+    """Dimensions, radiation metrics and figures for Standard mode, keyed by the design inputs"""
+    fr, h = freq_ghz * 1e9, h_mm / 1000
+    epsilon = db.get(substrate)['Epsilon']
+    dims = calculate_patch_dimensions(fr, h, epsilon)
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    metrics = pattern_metrics(raw['W'], raw['L_eff'], h, fr)
+    return {
+        'dims': dims,
+        'directivity_dbi': float(metrics['directivity_dbi'][0]),
+        'hpbw_e_deg': float(metrics['hpbw_e_deg'][0]),
+        'hpbw_h_deg': float(metrics['hpbw_h_deg'][0]),
+        'geometry_png': figure_png(antenna_geometry_figure(*dims)),
+        'pattern_png': figure_png(radiation_pattern_figure(*principal_plane_cuts(raw['W'], raw['L_eff'], h, fr))),
+    }
+
+@results.memoize(design_namespace("constrained_design"))
+def constrained_design(freq_ghz, h_mm, substrate, patch):
+    """Dimensions, inset feed, efficiency and S11 plot for Design-Oriented mode"""
+    fr, h = freq_ghz * 1e9, h_mm / 1000
+    substrate_row = db.get(substrate)
+    dims = calculate_patch_dimensions(fr, h, substrate_row['Epsilon'])
+    design = inset_fed_design(fr, h, substrate_row['Epsilon'], substrate_row['TanD'], db.get(patch)['Sigma'])
+    sweep_f = np.linspace(0.9 * fr, 1.1 * fr, 2001)
+    response = frequency_response(design, sweep_f)
+    return {
+        'dims': dims,
+        'design': design,
+        's11_png': figure_png(s11_figure(sweep_f / 1e9, response['S11_db'])),
+    }
+
+@results.memoize(design_namespace("array_design"))
+def array_design(freq_ghz, h_mm, substrate, nx, ny, dx_wl, dy_wl, taper, sidelobe_db, steer_theta, steer_phi, phase_bits):
+    """Array excitations, pattern metrics and beam-cut plot for Patch Array mode; spacing in free-space wavelengths"""
+    fr, h = freq_ghz * 1e9, h_mm / 1000
+    wavelength = 3e8 / fr
+    design = design_array(fr, h, db.get(substrate)['Epsilon'], nx, ny, dx_wl * wavelength, dy_wl * wavelength,
+                          taper, sidelobe_db, steer_theta, steer_phi, phase_bits)
+    return {
+        'design': design,
+        'metrics': array_metrics(design),
+        'cuts_png': figure_png(beam_cuts_figure(*beam_cuts(design))),
+    }
+
+@results.memoize(design_namespace("tolerance_study"))
+def tolerance_study(freq_ghz, h_mm, substrate, eps_tol, h_tol, etch_tol, tand_tol, distribution, spec_ghz, n_samples):
+    """Yield, resonance statistics, sensitivity and histogram for Tolerance Analysis mode (samples are not kept)"""
+    fr = freq_ghz * 1e9
+    row = db.get(substrate)
+    result = tolerance_analysis(fr, h_mm / 1000, row['Epsilon'], row['TanD'],
+                                {'epsilon': eps_tol, 'h_pct': h_tol, 'etch_mm': etch_tol, 'tand_pct': tand_tol},
+                                (spec_ghz[0] * 1e9, spec_ghz[1] * 1e9), n_samples, distribution, seed=0)
+    counts, edges = result.pop('histogram')
+    del result['f_res'], result['efficiency']
+    result['histogram_png'] = figure_png(tolerance_histogram_figure(counts, edges, result['spec_hz'], fr))
+    return result
+
+@results.memoize(design_namespace("fit_suggestions"))
+def fit_suggestions(freq_ghz, max_mm):
+    return inverse_design(freq_ghz, max_mm, max_mm, db.filter(component_materials["Substrate"]),
+                          h_range_mm=(0.5, 5.0), top_k=5)
 
 # -----------------------------------
 # Mode Selection
@@ -37,7 +141,11 @@ tissue_df = load_tissue_data("tissues_properties.csv")
 mode = st.radio("Choose Calculation Mode:", [
     "Standard Patch Calculator Mode",
     "Design-Oriented Mode",
-    "Tissue Compatibility Checker"
+    "Patch Array Designer",
+    "Tolerance Analysis",
+    "Multi-Objective Optimizer",
+    "Tissue Compatibility Checker",
+    "Body-Worn Detuning"
 ])
 
 # ===================================
@@ -45,29 +153,26 @@ mode = st.radio("Choose Calculation Mode:", [
 # ===================================
 if mode == "Standard Patch Calculator Mode":
     st.markdown("### 📁 Choose Materials for Components")
-    substrate_list = df['Filename'].tolist()
-    patch_materials = find_materials_by_names(df, component_materials["Patch"])
-    ground_materials = find_materials_by_names(df, component_materials["Ground"])
+    substrate_list = db.names.tolist()
+    patch_materials = db.filter_names(component_materials["Patch"])
+    ground_materials = db.filter_names(component_materials["Ground"])
 
     substrate_choice = st.selectbox("Substrate Material", substrate_list)
     patch_choice = st.selectbox("Patch Material", patch_materials)
     ground_choice = st.selectbox("Ground Material", ground_materials)
 
     with st.expander("🔍 Selected Material Properties"):
-        show_material_props(df[df['Filename'] == substrate_choice].iloc[0], "Substrate")
-        show_material_props(df[df['Filename'] == patch_choice].iloc[0], "Patch")
-        show_material_props(df[df['Filename'] == ground_choice].iloc[0], "Ground")
+        show_material_props(db.get(substrate_choice), "Substrate")
+        show_material_props(db.get(patch_choice), "Patch")
+        show_material_props(db.get(ground_choice), "Ground")
 
     st.markdown("### 📥 Enter Design Parameters")
     freq = st.number_input("Operating Frequency (GHz)", min_value=0.1, max_value=100.0, value=2.4, step=0.1)
     h_mm = st.number_input("Substrate Height (mm)", min_value=0.1, max_value=10.0, value=1.6, step=0.1)
 
     if st.button("Calculate"):
-        fr = freq * 1e9
-        h = h_mm / 1000
-        epsilon = df[df['Filename'] == substrate_choice].iloc[0]['Epsilon']
-
-        L, W, g_len, g_wid, fx, fy = calculate_patch_dimensions(fr, h, epsilon)
+        result = standard_design(freq, h_mm, substrate_choice)
+        L, W, g_len, g_wid, fx, fy = result['dims']
 
         st.success("📐 Patch Dimensions")
         st.write(f"📏 Width (W): `{W} mm`")
@@ -75,7 +180,13 @@ if mode == "Standard Patch Calculator Mode":
         st.write(f"📦 Ground Plane: `{g_len} mm x {g_wid} mm`")
         st.write(f"📍 Feed Point: `({fx}, {fy}) mm`")
 
-        plot_antenna_geometry(L, W, g_len, g_wid, fx, fy)
+        st.image(result['geometry_png'])
+
+        st.markdown("### 📡 Radiation (cavity model)")
+        st.write(f"📈 Directivity: `{result['directivity_dbi']:.2f} dBi`")
+        st.write(f"↔️ Half-power beamwidth: `E-plane {format_beamwidth(result['hpbw_e_deg'])}, "
+                 f"H-plane {format_beamwidth(result['hpbw_h_deg'])}`")
+        st.image(result['pattern_png'])
 
 # ===================================
 # 🔹 Design-Oriented Mode (till 8 GHz)
@@ -83,32 +194,30 @@ if mode == "Standard Patch Calculator Mode":
 elif mode == "Design-Oriented Mode":
     st.markdown("### 🎯 Design with Component-Specific Material Restrictions")
 
-    substrate_df = filter_materials(df, component_materials["Substrate"])
-    patch_df = filter_materials(df, component_materials["Patch"])
-    ground_df = filter_materials(df, component_materials["Ground"])
+    substrate_names = db.filter_names(component_materials["Substrate"])
+    patch_names = db.filter_names(component_materials["Patch"])
+    ground_names = db.filter_names(component_materials["Ground"])
 
-    if substrate_df.empty or patch_df.empty or ground_df.empty:
+    if not substrate_names or not patch_names or not ground_names:
         st.error("No materials found matching the component restrictions. Please check your CSV and restrictions.")
         st.stop()
 
-    substrate_choice = st.selectbox("Substrate Material", substrate_df['Filename'].tolist())
-    patch_choice = st.selectbox("Patch Material", patch_df['Filename'].tolist())
-    ground_choice = st.selectbox("Ground Material", ground_df['Filename'].tolist())
+    substrate_choice = st.selectbox("Substrate Material", substrate_names)
+    patch_choice = st.selectbox("Patch Material", patch_names)
+    ground_choice = st.selectbox("Ground Material", ground_names)
 
     st.markdown("### 📊 Selected Material Properties")
-    show_material_props(df[df['Filename'] == substrate_choice].iloc[0], "Substrate")
-    show_material_props(df[df['Filename'] == patch_choice].iloc[0], "Patch")
-    show_material_props(df[df['Filename'] == ground_choice].iloc[0], "Ground")
+    show_material_props(db.get(substrate_choice), "Substrate")
+    show_material_props(db.get(patch_choice), "Patch")
+    show_material_props(db.get(ground_choice), "Ground")
 
     st.markdown("### 📥 Enter Design Parameters")
     freq = st.number_input("Frequency (GHz)", min_value=1.0, max_value=8.0, value=2.4, step=0.1)
     h_mm = st.number_input("Substrate Height (mm)", min_value=0.5, max_value=5.0, value=1.6, step=0.1)
 
     if st.button("Calculate Design"):
-        fr = freq * 1e9
-        h = h_mm / 1000
-        epsilon_sub = df[df['Filename'] == substrate_choice].iloc[0]['Epsilon']
-        L, W, g_len, g_wid, fx, fy = calculate_patch_dimensions(fr, h, epsilon_sub)
+        result = constrained_design(freq, h_mm, substrate_choice, patch_choice)
+        L, W, g_len, g_wid, fx, fy = result['dims']
 
         warnings = []
         if L > 50:
@@ -125,7 +234,135 @@ elif mode == "Design-Oriented Mode":
         for w in warnings:
             st.warning(w)
 
-        plot_antenna_3d(L, W, g_len, g_wid, fx, fy, h_mm)
+        if warnings:
+            suggestions = fit_suggestions(freq, 50)
+            if not suggestions.empty:
+                st.markdown("### 💡 Substrates that fit within 50 mm x 50 mm")
+                st.dataframe(suggestions.round(3))
+
+        st.plotly_chart(antenna_3d_figure(L, W, g_len, g_wid, fx, fy, h_mm), use_container_width=True)
+
+        design = result['design']
+        st.markdown("### 🔌 50 Ω Inset Feed (transmission-line model)")
+        st.write(f"📍 Inset depth from radiating edge: `{design['inset'] * 1000:.3f} mm`")
+        st.write(f" - Edge resistance: `{design['R_edge']:.1f} Ω`")
+        st.write(f" - Radiation efficiency: `{design['efficiency'] * 100:.1f}%`")
+        st.image(result['s11_png'])
+
+# ===================================
+# 🔹 Patch Array Designer
+# ===================================
+elif mode == "Patch Array Designer":
+    st.markdown("### 🧱 N x M Patch Array (array factor x cavity-model element)")
+
+    substrate_choice = st.selectbox("Substrate Material", db.filter_names(component_materials["Substrate"]))
+    freq = st.number_input("Frequency (GHz)", min_value=0.5, max_value=40.0, value=2.4, step=0.1)
+    h_mm = st.number_input("Substrate Height (mm)", min_value=0.1, max_value=5.0, value=1.6, step=0.1)
+
+    st.markdown("### 📐 Layout")
+    nx = st.number_input("Elements along L (rows)", min_value=1, max_value=16, value=4, step=1)
+    ny = st.number_input("Elements along W (columns)", min_value=1, max_value=16, value=4, step=1)
+    dx_wl = st.number_input("Row spacing (λ0)", min_value=0.1, max_value=2.0, value=0.5, step=0.05)
+    dy_wl = st.number_input("Column spacing (λ0)", min_value=0.1, max_value=2.0, value=0.5, step=0.05)
+
+    st.markdown("### 🎚️ Excitation")
+    taper = st.selectbox("Amplitude Taper", TAPERS)
+    sidelobe_db = st.slider("Design Sidelobe Level (dB below peak)", min_value=15, max_value=60, value=30, step=1)
+    steer_theta = st.slider("Steering θ0 (deg)", min_value=0, max_value=60, value=0, step=1)
+    steer_phi = st.slider("Steering φ0 (deg)", min_value=0, max_value=359, value=0, step=1)
+    phase_bits = st.selectbox("Phase Shifter Resolution", ["Ideal", 3, 4, 5, 6])
+
+    if st.button("Calculate Array"):
+        try:
+            result = array_design(freq, h_mm, substrate_choice, int(nx), int(ny), dx_wl, dy_wl, taper,
+                                  float(sidelobe_db), float(steer_theta), float(steer_phi),
+                                  None if phase_bits == "Ideal" else int(phase_bits))
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            st.stop()
+        design, metrics = result['design'], result['metrics']
+
+        st.success(f"📡 {design['nx'] * design['ny']}-element array")
+        st.write(f"📏 Element: `{design['L'] * 1000:.3f} mm x {design['W'] * 1000:.3f} mm`, "
+                 f"spacing `{design['dx'] * 1000:.2f} mm x {design['dy'] * 1000:.2f} mm`")
+        st.write(f"📈 Directivity: `{metrics['directivity_dbi']:.2f} dBi` "
+                 f"(taper efficiency {design['taper_efficiency'] * 100:.1f}%)")
+        st.write(f"🎯 Beam peak: `θ = {metrics['peak_theta_deg']:.0f}°, φ = {metrics['peak_phi_deg']:.0f}°`")
+        st.write(f"↔️ Half-power beamwidth: `scan plane {format_beamwidth(metrics['hpbw_scan_deg'])}, "
+                 f"cross plane {format_beamwidth(metrics['hpbw_cross_deg'])}`")
+        st.write(f"〰️ Peak sidelobe: `scan plane {metrics['sll_scan_db']:.1f} dB, "
+                 f"cross plane {metrics['sll_cross_db']:.1f} dB`")
+        if design['grating_lobes']:
+            st.warning("⚠️ Spacing admits grating lobes at this steering angle (keep d/λ0 < 1 / (1 + sin θ0))")
+
+        st.plotly_chart(array_layout_figure(design), use_container_width=True)
+        st.plotly_chart(array_3d_figure(design, h_mm), use_container_width=True)
+        st.image(result['cuts_png'])
+
+# ===================================
+# 🔹 Tolerance Analysis
+# ===================================
+elif mode == "Tolerance Analysis":
+    st.markdown("### 🎲 Fabrication Tolerance (Monte Carlo)")
+    st.write("Designs the patch at the nominal substrate values, then samples fabrication variations of the built board.")
+
+    substrate_choice = st.selectbox("Substrate Material", db.filter_names(component_materials["Substrate"]))
+    show_material_props(db.get(substrate_choice), "Substrate")
+    freq = st.number_input("Frequency (GHz)", min_value=0.5, max_value=40.0, value=2.4, step=0.1)
+    h_mm = st.number_input("Substrate Height (mm)", min_value=0.1, max_value=10.0, value=1.6, step=0.1)
+
+    st.markdown("### 📏 Tolerances")
+    eps_tol = st.number_input("εr tolerance (±)", min_value=0.0, max_value=2.0, value=0.2, step=0.05)
+    h_tol = st.number_input("Height tolerance (± %)", min_value=0.0, max_value=50.0, value=10.0, step=1.0)
+    etch_tol = st.number_input("Etch tolerance (± mm per edge)", min_value=0.0, max_value=1.0, value=0.05, step=0.01)
+    tand_tol = st.number_input("tanδ tolerance (± %)", min_value=0.0, max_value=100.0, value=20.0, step=5.0)
+    distribution = st.selectbox("Distribution", DISTRIBUTIONS,
+                                help="uniform within the tolerance, or normal with the tolerance at 3σ")
+
+    st.markdown("### 🎯 Frequency Spec")
+    spec_lo = st.number_input("Lowest acceptable resonance (GHz)", value=round(freq * 0.99, 4), format="%.4f")
+    spec_hi = st.number_input("Highest acceptable resonance (GHz)", value=round(freq * 1.01, 4), format="%.4f")
+    n_samples = st.select_slider("Samples", options=[10_000, 100_000, 1_000_000], value=1_000_000)
+
+    if st.button("Run Tolerance Analysis"):
+        if spec_hi <= spec_lo:
+            st.error("❌ The spec's upper frequency must be above the lower one")
+            st.stop()
+        with st.spinner("Sampling..."):
+            result = tolerance_study(freq, h_mm, substrate_choice, eps_tol, h_tol, etch_tol, tand_tol,
+                                     distribution, (spec_lo, spec_hi), int(n_samples))
+        p = result['percentiles_hz']
+        st.success(f"✅ Yield: {result['yield'] * 100:.2f}% of {result['n_samples']:,} boards "
+                   f"resonate in {spec_lo:.4f}–{spec_hi:.4f} GHz")
+        st.write(f"📡 Resonance: mean `{result['mean_hz'] / 1e9:.4f} GHz`, σ `{result['std_hz'] / 1e6:.1f} MHz`, "
+                 f"1–99% `{p[1] / 1e9:.4f}–{p[99] / 1e9:.4f} GHz`")
+        st.write(f"⚡ Radiation efficiency: mean `{result['efficiency_mean'] * 100:.1f}%`, "
+                 f"5th percentile `{result['efficiency_p5'] * 100:.1f}%`")
+        st.image(result['histogram_png'])
+
+        st.markdown("### 🔍 Most Sensitive Parameters")
+        for row in result['sensitivity']:
+            st.write(f" - **{row['parameter']}**: {row['share'] * 100:.1f}% of the resonance variance")
+
+# ===================================
+# 🔹 Multi-Objective Optimizer
+# ===================================
+elif mode == "Multi-Objective Optimizer":
+    st.markdown("### 🧬 Size / Efficiency / Bandwidth Trade-off (NSGA-II)")
+    st.write("Searches substrate, patch and ground materials, substrate height and feed inset.")
+
+    freq = st.number_input("Frequency (GHz)", min_value=0.5, max_value=20.0, value=2.4, step=0.1)
+    h_min, h_max = st.slider("Substrate Height Range (mm)", min_value=0.1, max_value=10.0, value=(0.5, 3.2), step=0.1)
+    generations = st.number_input("Generations", min_value=10, max_value=500, value=100, step=10)
+    pop_size = st.number_input("Population Size", min_value=20, max_value=1000, value=200, step=20)
+
+    if st.button("Optimize"):
+        with st.spinner("Evolving designs..."):
+            front = optimize_design(freq, db, int(generations), int(pop_size), h_range_mm=(h_min, h_max))
+
+        st.success(f"📈 {len(front)} Pareto-optimal designs")
+        plot_pareto_front(front)
+        st.dataframe(front.round(3))
 
 # ===================================
 # 🔹 Tissue Compatibility Checker
@@ -133,17 +370,19 @@ elif mode == "Design-Oriented Mode":
 elif mode == "Tissue Compatibility Checker":
     st.header("🧪 Dielectric Tissue Compatibility Checker")
 
-    unique_tissues = sorted(tissue_df['tissue'].unique())
+    unique_tissues = sorted(tissue_index.names)
     tissue_choice = st.selectbox("Select Tissue/Organ", unique_tissues)
 
     permittivity = st.number_input("Enter measured Permittivity", min_value=0.0, value=1.0, format="%.4f")
     elec_cond = st.number_input("Enter measured Electrical Conductivity (S/m)", min_value=0.0, value=0.1, format="%.4f")
     freq = st.number_input("Operating Frequency (GHz)", min_value=0.1, max_value=10.0, value=2.4, format="%.3f")
     threshold = st.number_input("Tolerance Threshold (e.g. 0.15 = 15%)", min_value=0.0, value=0.15, format="%.2f")
+    method = st.selectbox("Reference Frequency Matching", ["nearest", "linear", "loglog"],
+                          help="nearest: closest tabulated frequency; linear / loglog: interpolate between tabulated points")
 
     if st.button("Check Compatibility"):
         compatible, diffs, avg_diff, fig = check_compatibility(
-            tissue_df, tissue_choice, permittivity, elec_cond, freq, threshold
+            tissue_index, tissue_choice, permittivity, elec_cond, freq, threshold, method
         )
 
         if compatible is None:
@@ -151,12 +390,7 @@ elif mode == "Tissue Compatibility Checker":
         else:
             st.markdown(f"### Results for {tissue_choice}:")
             fields = ['permittivity', 'elec_cond']
-            matching_rows = tissue_df[tissue_df['tissue'].str.lower() == tissue_choice.lower()]
-            if matching_rows.empty:
-                st.error("No matching tissue data found.")
-                st.stop()
-
-            row = matching_rows.iloc[(matching_rows['frequency'] - freq).abs().argsort().iloc[0]]
+            row = tissue_index.lookup(tissue_choice, freq, method)
 
             for i, field in enumerate(fields):
                 user_val = permittivity if field == 'permittivity' else elec_cond
@@ -168,3 +402,74 @@ elif mode == "Tissue Compatibility Checker":
             st.write(f"**Overall similarity score:** {max(0, 100 - avg_diff * 100):.2f}%")
             st.write("✅ Compatible!" if compatible else "❌ Not compatible.")
             st.pyplot(fig)
+
+        st.markdown("### 🔎 Closest Reference Tissues (all tissues and frequencies)")
+        import pandas as pd
+        matches = load_tissue_search("tissue_properties.csv").query(freq, permittivity, elec_cond, k=5)
+        st.dataframe(pd.DataFrame(matches).rename(columns={
+            'tissue': 'Tissue', 'frequency': 'Frequency (GHz)', 'permittivity': 'Permittivity',
+            'elec_cond': 'Conductivity (S/m)', 'distance': 'Distance'}))
+
+        classifier = load_tissue_classifier(default_model_path())
+        if classifier is not None:
+            st.write(f"🧠 Predicted tissue class: `{classifier.predict_one(freq, permittivity, elec_cond)}`")
+
+# ===================================
+# 🔹 Body-Worn Detuning
+# ===================================
+elif mode == "Body-Worn Detuning":
+    st.markdown("### 🧍 Patch Worn Over Tissue Layers")
+    st.write("The patch faces the body across a gap; tissue properties come from the tissue dataset.")
+
+    substrate_choice = st.selectbox("Substrate Material", db.filter_names(component_materials["Substrate"]))
+    substrate_row = db.get(substrate_choice)
+    freq = st.number_input("Target Frequency (GHz)", min_value=0.5, max_value=40.0, value=2.4, step=0.05)
+    h_mm = st.number_input("Substrate Height (mm)", min_value=0.1, max_value=10.0, value=1.6, step=0.1)
+    f_lo, f_hi = float(tissue_index.frequency.min()), float(tissue_index.frequency.max())
+    if not f_lo <= freq <= f_hi:
+        st.warning(f"⚠️ Tissue data covers {f_lo:g}–{f_hi:g} GHz; properties are clamped to the nearest end")
+
+    st.markdown("### 🧱 Stack (body surface inward)")
+    gap_mm = st.number_input("Gap to skin (mm)", min_value=0.0, max_value=50.0, value=2.0, step=0.5)
+    gap_eps = st.number_input("Gap permittivity (1 = air)", min_value=1.0, max_value=10.0, value=1.0, step=0.1)
+    tissues = sorted(tissue_index.names)
+    layers = []
+    for i, (default, thickness) in enumerate(DEFAULT_STACK):
+        name = st.selectbox(f"Layer {i + 1}", tissues, index=tissues.index(default))
+        if thickness is None:
+            st.caption("Last layer is semi-infinite")
+        else:
+            thickness = st.number_input(f"Layer {i + 1} thickness (mm)", min_value=0.1, max_value=100.0,
+                                        value=thickness, step=0.5)
+        layers.append((name, thickness))
+
+    if st.button("Compute Detuning"):
+        try:
+            ids, thicknesses = resolve_stack(tissue_index, layers)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            st.stop()
+        fr, h, gap = freq * 1e9, h_mm / 1000, gap_mm / 1000
+        r = detuned_patch(fr, h, substrate_row['Epsilon'], tissue_index, ids, thicknesses, gap, gap_eps,
+                          substrate_row['TanD'])
+        st.write(f"📏 Open-air design: `L = {float(r['L']) * 1000:.3f} mm`, `W = {float(r['W']) * 1000:.3f} mm`, "
+                 f"εeff `{float(r['eff_er_free']):.3f}`, efficiency `{float(r['efficiency_free']) * 100:.1f}%`")
+        st.write(f"📉 Worn resonance: `{float(r['f_worn']) / 1e9:.4f} GHz` ({float(r['shift_pct']):+.2f}%), "
+                 f"εeff `{float(r['eff_er_worn']):.3f}`, efficiency `{float(r['efficiency_worn']) * 100:.1f}%`")
+        st.success(f"✅ Pre-compensated length `{float(r['L_compensated']) * 1000:.3f} mm` "
+                   f"(design for {float(r['fr_compensated']) / 1e9:.4f} GHz in open air) resonates at {freq:g} GHz when worn")
+
+        st.markdown("### 🔎 Every Tissue as the Body (behind the same gap)")
+        sweep = tissue_sweep(tissue_index, h, substrate_row['Epsilon'], gap, gap_eps, substrate_row['TanD'],
+                             freq_ghz=freq)
+        st.dataframe(sweep.sort_values('shift_pct').drop(columns=['freq_ghz']).rename(columns={
+            'tissue': 'Tissue', 'freq_worn_ghz': 'Worn Resonance (GHz)', 'shift_pct': 'Shift (%)',
+            'fr_compensated_ghz': 'Compensated Design (GHz)', 'eff_er_worn': 'εeff', 'loss_tangent_worn': 'tanδ eff',
+            'efficiency_free': 'Efficiency (air)', 'efficiency_worn': 'Efficiency (worn)', 'L_mm': 'L (mm)',
+            'L_compensated_mm': 'Compensated L (mm)'}).round(4))
+
+# -----------------------------------
+# Cache monitoring
+# -----------------------------------
+with st.sidebar.expander("⚡ Result cache"):
+    st.json(results.stats())
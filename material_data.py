@@ -0,0 +1,152 @@
+import numpy as np
+from table_cache import load_cached_table, table_digest
+from dispersion import MaterialModel
+
+# -----------------------------------
+# Component-specific restrictions
+# -----------------------------------
+component_materials = {
+    "Substrate": ["FR4", "Rogers RO4003C", "Taconic TLY-5", "Alumina", "PTFE", "Ceramic", "FR-4"],
+    "Patch": ["Copper", "Silver", "Gold", "Aluminum", "FR-4"],
+    "Ground": ["Copper", "Silver", "Gold", "Aluminum", "FR-4"]
+}
+
+# Load material table (only the fields the calculators use)
+def load_materials(csv_path):
+    import pandas as pd
+    try:
+        df = pd.read_csv(csv_path)
+        df = df[['Filename', 'Epsilon', 'Mu', 'TanD', 'Sigma']].dropna(subset=['Epsilon'])
+        return df
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        return None
+
+# Materials whose name contains any of the allowed substrings (case-insensitive)
+def filter_materials(df, allowed_materials):
+    return df[df['Filename'].apply(lambda x: any(mat.lower() in x.lower() for mat in allowed_materials))]
+
+def find_materials_by_names(df, names):
+    return filter_materials(df, names)['Filename'].tolist()
+
+# -----------------------------------
+# Indexed In-Memory Material Database
+# -----------------------------------
+BOOL_FIELDS = ['UseGeneralDispersionEps']
+TEXT_FIELDS = ['Filename', 'DispModelEps']
+
+def _typed_columns(df):
+    import pandas as pd
+    df = df.reset_index(drop=True)
+    columns = {}
+    for col in df.columns:
+        if col in TEXT_FIELDS:
+            columns[col] = df[col].fillna('').astype(str).to_numpy(dtype=object)
+        elif col in BOOL_FIELDS:
+            columns[col] = df[col].astype(str).str.lower().eq('true').to_numpy()
+        else:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+    return columns
+
+def _read_material_columns(csv_path):
+    import pandas as pd
+    # "N/A" is one of pandas' default NaN markers, so numeric fields load as float
+    return _typed_columns(pd.read_csv(csv_path).dropna(subset=['Epsilon']))
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class MaterialDB:
+    """Material table held as typed column arrays with name and substring indexes.
+
+    Name lookups go through a dict (O(1)); component filtering uses a trigram
+    index so a pattern only verifies the rows that share all its trigrams.
+    """
+
+    def __init__(self, columns, digest=None):
+        self.columns = columns
+        # Content hash of the source CSV when loaded from a file (None for frames)
+        self.digest = digest
+        self.names = columns['Filename']
+        self._lower = [name.lower() for name in self.names]
+        self._by_name = {name: i for i, name in enumerate(self.names)}
+
+        self._trigram_index = {}
+        for i, name in enumerate(self._lower):
+            for gram in _trigrams(name):
+                self._trigram_index.setdefault(gram, []).append(i)
+        self._trigram_index = {gram: np.array(rows) for gram, rows in self._trigram_index.items()}
+        self._search_cache = {}
+        self._models = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(_typed_columns(df))
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        return cls(_read_material_columns(csv_path))
+
+    @classmethod
+    def load(cls, csv_path, cache_dir=None):
+        """Load through the memory-mapped binary cache, rebuilding it if the CSV changed"""
+        return cls(load_cached_table(csv_path, _read_material_columns, cache_dir), table_digest(csv_path, cache_dir))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def index_of(self, name):
+        return self._by_name[name]
+
+    def get(self, name):
+        """All fields of one material as a dict (raises KeyError if unknown)"""
+        i = self._by_name[name]
+        return {col: values[i] for col, values in self.columns.items()}
+
+    def model(self, name):
+        """Cached frequency-dependent εr(f) / tanδ(f) model for one material"""
+        if name not in self._models:
+            self._models[name] = MaterialModel(self.get(name))
+        return self._models[name]
+
+    def column(self, name, indices=None):
+        values = self.columns[name]
+        return values if indices is None else values[indices]
+
+    def search(self, patterns):
+        """Sorted row indices whose name contains any pattern (case-insensitive)"""
+        key = tuple(sorted(p.lower() for p in patterns))
+        if key in self._search_cache:
+            return self._search_cache[key]
+
+        hits = set()
+        for pattern in key:
+            if len(pattern) < 3:
+                hits.update(i for i, name in enumerate(self._lower) if pattern in name)
+                continue
+            candidates = None
+            for gram in _trigrams(pattern):
+                rows = self._trigram_index.get(gram)
+                if rows is None:
+                    candidates = np.array([], dtype=int)
+                    break
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            hits.update(i for i in candidates.tolist() if pattern in self._lower[i])
+
+        result = np.array(sorted(hits), dtype=int)
+        self._search_cache[key] = result
+        return result
+
+    def filter_names(self, patterns):
+        return self.names[self.search(patterns)].tolist()
+
+    def to_frame(self, indices=None):
+        import pandas as pd
+        return pd.DataFrame({col: self.column(col, indices) for col in self.columns})
+
+    def filter(self, patterns):
+        """DataFrame equivalent of filter_materials(df, patterns)"""
+        return self.to_frame(self.search(patterns))
@@ -0,0 +1,228 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from antenna_calc import mu0, patch_dimensions_raw, surface_resistance
+from impedance import edge_resistance, quality_factors, matched_bandwidth
+from material_data import MaterialDB, component_materials
+
+OBJECTIVES = ['area_mm2', 'efficiency', 'bandwidth_pct']
+
+# -----------------------------------
+# Problem definition
+# -----------------------------------
+def candidate_materials(db):
+    """Substrate / conductor candidates from component_materials as plain arrays"""
+    substrates = db.search(component_materials["Substrate"])
+    # Conductors need a usable σ; FR-4 is listed for Patch/Ground but has none
+    patches = [i for i in db.search(component_materials["Patch"]) if db.columns['Sigma'][i] > 0]
+    grounds = [i for i in db.search(component_materials["Ground"]) if db.columns['Sigma'][i] > 0]
+    column = lambda name, rows: np.asarray(db.columns[name])[rows]
+    return {
+        'substrate_names': column('Filename', substrates).tolist(),
+        'substrate_eps': column('Epsilon', substrates),
+        'substrate_tand': np.nan_to_num(column('TanD', substrates)),
+        'patch_names': column('Filename', patches).tolist(),
+        'patch_sigma': column('Sigma', patches),
+        'ground_names': column('Filename', grounds).tolist(),
+        'ground_sigma': column('Sigma', grounds),
+    }
+
+def evaluate(genes, fr, candidates, Z0=50.0):
+    """Objectives for a population; genes = dict of substrate/patch/ground indices, h (m), inset fraction.
+
+    Returns (n, 3) minimization objectives: patch area, -efficiency, -bandwidth.
+    """
+    eps = candidates['substrate_eps'][genes['substrate']]
+    tand = candidates['substrate_tand'][genes['substrate']]
+    h = genes['h']
+    raw = patch_dimensions_raw(fr, h, eps)
+    W, L = raw['W'], raw['L']
+
+    # Patch and ground each carry half the conductor loss: average their Rs
+    Rs = (surface_resistance(fr, candidates['patch_sigma'][genes['patch']]) +
+          surface_resistance(fr, candidates['ground_sigma'][genes['ground']])) / 2
+    sigma_eff = np.pi * fr * mu0 / Rs ** 2
+
+    Q_rad, _, _, Q_t = quality_factors(fr, h, raw['eff_er'], tand, sigma_eff)
+    efficiency = Q_t / Q_rad
+    R_edge = edge_resistance(fr, W, L) * efficiency
+    R_in = R_edge * np.cos(np.pi * genes['inset']) ** 2
+    bandwidth = matched_bandwidth(R_in, Q_t, Z0)
+
+    return np.column_stack([W * L * 1e6, -efficiency, -bandwidth * 100])
+
+def _evaluate_chunk(args):
+    return evaluate(*args)
+
+# -----------------------------------
+# NSGA-II
+# -----------------------------------
+def non_dominated_ranks(F):
+    """Pareto rank of every row of F (0 = first front), via a vectorized dominance matrix"""
+    n = len(F)
+    le = (F[:, None, :] <= F[None, :, :]).all(axis=2)
+    lt = (F[:, None, :] < F[None, :, :]).any(axis=2)
+    dominates = le & lt  # dominates[i, j]: i dominates j
+    dominated_by = dominates.sum(axis=0)
+    ranks = np.full(n, -1)
+    rank = 0
+    current = np.flatnonzero(dominated_by == 0)
+    while current.size:
+        ranks[current] = rank
+        dominated_by = dominated_by - dominates[current].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        current = np.flatnonzero(dominated_by == 0)
+        rank += 1
+    return ranks
+
+def crowding_distance(F, ranks):
+    distance = np.zeros(len(F))
+    for rank in np.unique(ranks):
+        front = np.flatnonzero(ranks == rank)
+        if len(front) <= 2:
+            distance[front] = np.inf
+            continue
+        for k in range(F.shape[1]):
+            order = front[np.argsort(F[front, k])]
+            span = F[order[-1], k] - F[order[0], k]
+            distance[order[[0, -1]]] = np.inf
+            if span > 0:
+                distance[order[1:-1]] += (F[order[2:], k] - F[order[:-2], k]) / span
+    return distance
+
+def _tournament(rng, ranks, distance, n):
+    a, b = rng.integers(0, len(ranks), (2, n))
+    better = (ranks[a] < ranks[b]) | ((ranks[a] == ranks[b]) & (distance[a] > distance[b]))
+    return np.where(better, a, b)
+
+class ParetoOptimizer:
+    """NSGA-II over (substrate, patch, ground, substrate height, inset fraction).
+
+    Populations are evaluated as one vectorized batch, split across a process
+    pool when workers > 1.
+    """
+
+    def __init__(self, freq_ghz, candidates, h_range_mm=(0.2, 5.0), pop_size=200,
+                 mutation_rate=0.2, workers=1, seed=None):
+        self.fr = freq_ghz * 1e9
+        self.candidates = candidates
+        self.h_range = np.asarray(h_range_mm) / 1000
+        self.inset_range = np.array([0.0, 0.5])  # fraction of L
+        self.pop_size = pop_size
+        self.mutation_rate = mutation_rate
+        self.workers = workers
+        self.rng = np.random.default_rng(seed)
+        self.sizes = {
+            'substrate': len(candidates['substrate_eps']),
+            'patch': len(candidates['patch_sigma']),
+            'ground': len(candidates['ground_sigma']),
+        }
+
+    def _random(self, n):
+        genes = {key: self.rng.integers(0, size, n) for key, size in self.sizes.items()}
+        genes['h'] = self.rng.uniform(*self.h_range, n)
+        genes['inset'] = self.rng.uniform(*self.inset_range, n)
+        return genes
+
+    def _evaluate(self, genes, pool):
+        n = len(genes['h'])
+        if pool is None or n < 2 * self.workers:
+            return evaluate(genes, self.fr, self.candidates)
+        bounds = np.linspace(0, n, self.workers + 1).astype(int)
+        jobs = [({k: v[lo:hi] for k, v in genes.items()}, self.fr, self.candidates)
+                for lo, hi in zip(bounds[:-1], bounds[1:])]
+        return np.vstack(list(pool.map(_evaluate_chunk, jobs)))
+
+    def _offspring(self, genes, ranks, distance):
+        n = self.pop_size
+        p1 = _tournament(self.rng, ranks, distance, n)
+        p2 = _tournament(self.rng, ranks, distance, n)
+        child = {}
+        for key, size in self.sizes.items():
+            pick = self.rng.random(n) < 0.5
+            child[key] = np.where(pick, genes[key][p1], genes[key][p2])
+            reset = self.rng.random(n) < self.mutation_rate
+            child[key][reset] = self.rng.integers(0, size, reset.sum())
+        for key, (lo, hi) in (('h', self.h_range), ('inset', self.inset_range)):
+            # Blend crossover plus Gaussian mutation, clipped to bounds
+            alpha = self.rng.uniform(-0.25, 1.25, n)
+            value = alpha * genes[key][p1] + (1 - alpha) * genes[key][p2]
+            mutate = self.rng.random(n) < self.mutation_rate
+            value[mutate] += self.rng.normal(0, 0.1 * (hi - lo), mutate.sum())
+            child[key] = np.clip(value, lo, hi)
+        return child
+
+    def run(self, generations=100):
+        """Evolve and return the final first Pareto front as a DataFrame"""
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            genes = self._random(self.pop_size)
+            F = self._evaluate(genes, pool)
+            for _ in range(generations):
+                ranks = non_dominated_ranks(F)
+                distance = crowding_distance(F, ranks)
+                child = self._offspring(genes, ranks, distance)
+                child_F = self._evaluate(child, pool)
+
+                genes = {k: np.concatenate([genes[k], child[k]]) for k in genes}
+                F = np.vstack([F, child_F])
+                ranks = non_dominated_ranks(F)
+                distance = crowding_distance(F, ranks)
+                keep = np.lexsort((-distance, ranks))[:self.pop_size]
+                genes = {k: v[keep] for k, v in genes.items()}
+                F = F[keep]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        front = non_dominated_ranks(F) == 0
+        return self._to_frame({k: v[front] for k, v in genes.items()}, F[front])
+
+    def _to_frame(self, genes, F):
+        import pandas as pd
+        cand = self.candidates
+        raw = patch_dimensions_raw(self.fr, genes['h'], cand['substrate_eps'][genes['substrate']])
+        df = pd.DataFrame({
+            'substrate': np.array(cand['substrate_names'], dtype=object)[genes['substrate']],
+            'patch': np.array(cand['patch_names'], dtype=object)[genes['patch']],
+            'ground': np.array(cand['ground_names'], dtype=object)[genes['ground']],
+            'Epsilon': cand['substrate_eps'][genes['substrate']],
+            'h_mm': genes['h'] * 1000,
+            'inset_mm': genes['inset'] * raw['L'] * 1000,
+            'L': raw['L'] * 1000,
+            'W': raw['W'] * 1000,
+            'area_mm2': F[:, 0],
+            'efficiency': -F[:, 1],
+            'bandwidth_pct': -F[:, 2],
+        })
+        return df.drop_duplicates().sort_values('area_mm2').reset_index(drop=True)
+
+def optimize_design(freq_ghz, db, generations=100, pop_size=200, workers=1, seed=None, h_range_mm=(0.2, 5.0)):
+    optimizer = ParetoOptimizer(freq_ghz, candidate_materials(db), h_range_mm, pop_size, workers=workers, seed=seed)
+    return optimizer.run(generations)
+
+# -----------------------------------
+# CLI
+# -----------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-objective patch antenna optimizer (NSGA-II)")
+    parser.add_argument("--freq", type=float, required=True, help="Target frequency in GHz")
+    parser.add_argument("--height", type=float, nargs=2, default=(0.2, 5.0), metavar=("MIN", "MAX"), help="Substrate height range in mm")
+    parser.add_argument("--pop", type=int, default=200, help="Population size")
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Evaluation processes")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--materials-csv", default="cst_materials_extracted.csv")
+    parser.add_argument("--out", help="Write the Pareto front to this CSV")
+    args = parser.parse_args(argv)
+
+    db = MaterialDB.load(args.materials_csv)
+    front = optimize_design(args.freq, db, args.generations, args.pop, args.workers, args.seed, tuple(args.height))
+    if args.out:
+        front.to_csv(args.out, index=False)
+        print(f"Pareto front ({len(front)} designs) saved to: {args.out}")
+    else:
+        print(front.to_string())
+
+if __name__ == "__main__":
+    main()
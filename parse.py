@@ -1,8 +1,9 @@
 import os
 import csv
-
-# Folder containing the .mtd files
-folder_path = r'Path/to/the/folder/here'
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # Fields to extract
 target_fields = [
@@ -12,39 +13,202 @@ target_fields = [
     'HeatCapacity', 'ThermalExpansionRate', 'Emissivity', 'YoungsModulus',
     'PoissonsRatio', 'Rho'
 ]
+fieldnames = ['Filename'] + target_fields
+
+MANIFEST_VERSION = 2
+
+# -----------------------------------
+# Single-file parser
+# -----------------------------------
+def parse_mtd_text(filename, text):
+    material_info = {'Filename': filename}
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith(".") and '"' in line:
+            try:
+                key, val = line.split(" ", 1)
+                key = key[1:]  # Remove leading dot
+                val = val.strip().strip('"')
+                if key in target_fields:
+                    material_info[key] = val
+            except ValueError:
+                continue
+    return material_info
+
+def parse_mtd_file(file_path):
+    """Parse one .mtd file; returns (path, sha1, material row or None on error)"""
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"Error reading {os.path.basename(file_path)}: {e}")
+        return file_path, None, None
+    digest = hashlib.sha1(data).hexdigest()
+    text = data.decode('utf-8', errors='ignore')
+    return file_path, digest, parse_mtd_text(os.path.basename(file_path), text)
+
+def _hash_file(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# -----------------------------------
+# Manifest (size / mtime / hash and parsed row per source file)
+# -----------------------------------
+def manifest_path_for(csv_path):
+    return csv_path + ".manifest.json"
+
+def load_manifest(path):
+    """Manifest entries by source path, or None when the manifest is missing, unreadable or of another version"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest.get('files', {})
+
+def save_manifest(path, files):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def find_mtd_files(folders, recursive=False):
+    paths = []
+    for folder in folders:
+        if recursive:
+            for root, _, files in os.walk(folder):
+                paths.extend(os.path.join(root, name) for name in files if name.endswith(".mtd"))
+        else:
+            paths.extend(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".mtd"))
+    return sorted(paths)
+
+def _in_scanned_folder(path, folders, recursive):
+    """True if a scan of folders would have found path"""
+    parent = os.path.dirname(os.path.abspath(path))
+    for folder in folders:
+        folder = os.path.abspath(folder)
+        if parent == folder or (recursive and parent.startswith(folder + os.sep)):
+            return True
+    return False
 
-# List to store extracted data
-materials_data = []
+# -----------------------------------
+# Output table
+# -----------------------------------
+def read_table(csv_path):
+    """Existing output rows keyed by Filename (values kept as written, e.g. 'N/A')"""
+    if not os.path.exists(csv_path):
+        return {}
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        return {row['Filename']: row for row in csv.DictReader(csvfile)}
 
-for filename in os.listdir(folder_path):
-    if filename.endswith(".mtd"):
-        file_path = os.path.join(folder_path, filename)
-        material_info = {'Filename': filename}
+def write_table(csv_path, rows):
+    tmp_path = csv_path + ".tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for name in sorted(rows):
+            writer.writerow({key: rows[name].get(key, 'N/A') for key in fieldnames})
+    os.replace(tmp_path, csv_path)
+
+# -----------------------------------
+# Incremental, parallel refresh
+# -----------------------------------
+def update_material_table(folders, csv_path, workers=None, recursive=False, full=False):
+    """Re-parse only new or changed .mtd files and merge them into csv_path.
+
+    Files are compared against the manifest by size and mtime first and by
+    content hash second, so touched-but-identical files are not re-parsed.
+    The manifest keeps each file's parsed row keyed by its path, so a run
+    over some folders leaves rows from other folders alone; rows are dropped
+    when their file is gone from a scanned folder or from disk. Without a
+    valid manifest (or with full=True) the table is rebuilt from the scanned
+    folders alone. Returns a summary dict.
+    """
+    manifest_path = manifest_path_for(csv_path)
+    manifest = None if full else load_manifest(manifest_path)
+    if manifest is None:
+        # Without a valid manifest the CSV's rows cannot be traced to files: rebuild from the scanned folders
+        manifest, unmanaged = {}, {}
+    else:
+        # Rows not produced by this manifest (e.g. added by hand) are kept as they are
+        managed_names = {entry['row']['Filename'] for entry in manifest.values()}
+        unmanaged = {name: row for name, row in read_table(csv_path).items() if name not in managed_names}
+
+    paths = find_mtd_files(folders, recursive)
+    current = set()
+    to_parse = []
+    new_manifest = {}
+    for path in paths:
+        entry = manifest.get(path)
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith(".") and '"' in line:
-                        try:
-                            key, val = line.split(" ", 1)
-                            key = key[1:]  # Remove leading dot
-                            val = val.strip().strip('"')
-                            if key in target_fields:
-                                material_info[key] = val
-                        except ValueError:
-                            continue
-            materials_data.append(material_info)
-        except Exception as e:
-            print(f"Error reading {filename}: {e}")
-
-# Save to CSV
-csv_file_path = "data/cst_materials_extracted.csv"
-fieldnames = ['Filename'] + target_fields
+            stat = os.stat(path)
+            unchanged = entry and entry['size'] == stat.st_size and (
+                entry['mtime'] == stat.st_mtime or _hash_file(path) == entry['sha1'])
+        except OSError:
+            continue  # deleted while scanning: handled like any removed file
+        current.add(path)
+        if unchanged:
+            new_manifest[path] = dict(entry, mtime=stat.st_mtime)
+        else:
+            to_parse.append((path, stat))
+
+    # Entries outside this run's folders survive unless their file is gone
+    removed = []
+    for path, entry in manifest.items():
+        if path in current:
+            continue
+        if _in_scanned_folder(path, folders, recursive) or not os.path.exists(path):
+            removed.append(path)
+        else:
+            new_manifest[path] = entry
+
+    if to_parse:
+        batch = [path for path, _ in to_parse]
+        if len(batch) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(parse_mtd_file, batch, chunksize=max(1, len(batch) // 64)))
+        else:
+            results = [parse_mtd_file(path) for path in batch]
+
+        for (path, stat), (_, digest, material_info) in zip(to_parse, results):
+            if material_info is None:
+                # Unreadable this time: keep the last good row and retry next run (unless it is gone)
+                if path in manifest and os.path.exists(path):
+                    new_manifest[path] = manifest[path]
+                continue
+            new_manifest[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': digest, 'row': material_info}
+
+    # The CSV is keyed by file name: on a clash the first path (sorted) wins
+    sources = {}
+    for path in sorted(new_manifest):
+        sources.setdefault(new_manifest[path]['row']['Filename'], []).append(path)
+    rows = dict(unmanaged)
+    for name, clashing in sources.items():
+        if len(clashing) > 1:
+            print(f"Warning: {name} is in {len(clashing)} libraries ({', '.join(clashing)}); keeping {clashing[0]}")
+        rows[name] = new_manifest[clashing[0]]['row']
+
+    write_table(csv_path, rows)
+    save_manifest(manifest_path, new_manifest)
+    return {'scanned': len(current), 'parsed': len(to_parse), 'removed': len(removed), 'rows': len(rows)}
+
+# -----------------------------------
+# CLI
+# -----------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract material properties from CST .mtd files")
+    parser.add_argument("folders", nargs='+', help="Folders containing .mtd files")
+    parser.add_argument("-o", "--output", default="cst_materials_extracted.csv", help="Output CSV path")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Parser processes (default: all cores)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search folders recursively")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-parse everything")
+    args = parser.parse_args(argv)
 
-with open(csv_file_path, 'w', newline='', encoding='utf-8') as csvfile:
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    for material in materials_data:
-        writer.writerow({key: material.get(key, 'N/A') for key in fieldnames})
+    summary = update_material_table(args.folders, args.output, args.workers, args.recursive, args.full)
+    print(f"Scanned {summary['scanned']} files, parsed {summary['parsed']}, removed {summary['removed']}")
+    print(f"CSV file saved to: {args.output} ({summary['rows']} materials)")
 
-print(f"CSV file saved to: {csv_file_path}")
+if __name__ == "__main__":
+    main()
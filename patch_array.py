@@ -0,0 +1,217 @@
+import numpy as np
+from antenna_calc import c, patch_dimensions_raw
+from radiation import angle_grid, _pattern_factor
+
+# Elements sit on a rectangular lattice in the x-y plane with the same
+# orientation as radiation.py: L (resonant) along x, W along y, broadside +z.
+# Coupling between elements is ignored: total pattern = element pattern × |AF|².
+
+TAPERS = ('uniform', 'taylor', 'chebyshev')
+
+# -----------------------------------
+# Amplitude tapers (peak 1)
+# -----------------------------------
+def taylor_taper(n, sidelobe_db=30.0, nbar=4):
+    """Taylor n̄ taper: sidelobes near -sidelobe_db, the first nbar - 1 of them held level"""
+    if n == 1:
+        return np.ones(1)
+    A = np.arccosh(10 ** (sidelobe_db / 20)) / np.pi
+    sigma2 = nbar ** 2 / (A ** 2 + (nbar - 0.5) ** 2)
+    m = np.arange(1, nbar)
+    F = np.empty(len(m))
+    for i, mi in enumerate(m):
+        num = np.prod(1 - mi ** 2 / (sigma2 * (A ** 2 + (m - 0.5) ** 2)))
+        den = np.prod(1 - mi ** 2 / m[m != mi] ** 2)
+        F[i] = (-1) ** (mi + 1) * num / (2 * den)
+    xi = (np.arange(n) - (n - 1) / 2) / n
+    w = 1 + 2 * F @ np.cos(2 * np.pi * m[:, None] * xi[None, :])
+    return w / w.max()
+
+def chebyshev_taper(n, sidelobe_db=30.0):
+    """Dolph-Chebyshev taper: every sidelobe at exactly -sidelobe_db (same weights as scipy's chebwin)"""
+    if n == 1:
+        return np.ones(1)
+    order = n - 1
+    beta = np.cosh(np.arccosh(10 ** (sidelobe_db / 20)) / order)
+    x = beta * np.cos(np.pi * np.arange(n) / n)
+    p = np.empty(n)
+    above, below, inside = x > 1, x < -1, np.abs(x) <= 1
+    p[above] = np.cosh(order * np.arccosh(x[above]))
+    p[below] = (2 * (n % 2) - 1) * np.cosh(order * np.arccosh(-x[below]))
+    p[inside] = np.cos(order * np.arccos(x[inside]))
+    if n % 2:
+        w = np.real(np.fft.fft(p))
+        half = (n + 1) // 2
+        w = np.concatenate((w[half - 1:0:-1], w[:half]))
+    else:
+        w = np.real(np.fft.fft(p * np.exp(1j * np.pi / n * np.arange(n))))
+        half = n // 2 + 1
+        w = np.concatenate((w[half - 1:0:-1], w[1:half]))
+    return w / w.max()
+
+def amplitude_taper(n, kind='uniform', sidelobe_db=30.0):
+    if kind == 'uniform':
+        return np.ones(n)
+    if kind == 'taylor':
+        return taylor_taper(n, sidelobe_db)
+    if kind == 'chebyshev':
+        return chebyshev_taper(n, sidelobe_db)
+    raise ValueError(f"Unknown taper '{kind}' (expected one of {', '.join(TAPERS)})")
+
+# -----------------------------------
+# Array design
+# -----------------------------------
+def design_array(fr, h, epsilon, nx, ny, dx=None, dy=None, taper='uniform', sidelobe_db=30.0,
+                 steer_theta_deg=0.0, steer_phi_deg=0.0, phase_bits=None):
+    """nx × ny array of identical patches with separable taper and progressive phase.
+
+    Lengths in metres; spacing defaults to λ0/2 on both axes. The beam is
+    steered to (θ0, φ0); phase_bits quantizes the element phases like a
+    digital phase shifter. Returns a dict with the element geometry, element
+    centres x (nx,) and y (ny,) and complex excitations 'weights' (nx, ny).
+    """
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    W, L, L_eff = (float(raw[k]) for k in ('W', 'L', 'L_eff'))
+    wavelength = c / fr
+    dx = wavelength / 2 if dx is None else dx
+    dy = wavelength / 2 if dy is None else dy
+    if nx < 1 or ny < 1:
+        raise ValueError("An array needs at least one element per axis")
+    if (nx > 1 and dx <= L) or (ny > 1 and dy <= W):
+        raise ValueError(f"Spacing ({dx * 1000:.2f} x {dy * 1000:.2f} mm) must exceed the patch size "
+                         f"({L * 1000:.2f} x {W * 1000:.2f} mm)")
+
+    x = (np.arange(nx) - (nx - 1) / 2) * dx
+    y = (np.arange(ny) - (ny - 1) / 2) * dy
+    amplitude = np.outer(amplitude_taper(nx, taper, sidelobe_db), amplitude_taper(ny, taper, sidelobe_db))
+
+    k0 = 2 * np.pi / wavelength
+    theta0, phi0 = np.deg2rad(steer_theta_deg), np.deg2rad(steer_phi_deg)
+    u0, v0 = np.sin(theta0) * np.cos(phi0), np.sin(theta0) * np.sin(phi0)
+    phase = -k0 * (x[:, None] * u0 + y[None, :] * v0)
+    if phase_bits:
+        step = 2 * np.pi / 2 ** phase_bits
+        phase = np.round(phase / step) * step
+    phase = np.angle(np.exp(1j * phase))  # wrap to (-π, π]
+
+    # No grating lobe in visible space while d/λ < 1 / (1 + |sin θ0|) along each axis
+    limit = 1 / (1 + abs(np.sin(theta0)))
+    grating = (nx > 1 and dx / wavelength >= limit) or (ny > 1 and dy / wavelength >= limit)
+
+    return {
+        'fr': fr, 'h': h, 'epsilon': epsilon,
+        'W': W, 'L': L, 'L_eff': L_eff,
+        'nx': nx, 'ny': ny, 'dx': dx, 'dy': dy,
+        'x': x, 'y': y,
+        'amplitude': amplitude,
+        'phase': phase,
+        'weights': amplitude * np.exp(1j * phase),
+        'steer_theta_deg': steer_theta_deg, 'steer_phi_deg': steer_phi_deg,
+        'grating_lobes': bool(grating),
+        # Aperture efficiency of the taper (1 for uniform)
+        'taper_efficiency': float(np.abs(amplitude.sum()) ** 2 / (amplitude.size * (amplitude ** 2).sum())),
+    }
+
+# -----------------------------------
+# Array factor and total pattern
+# -----------------------------------
+def array_factor(design, u, v):
+    """Complex array factor at direction cosines u (along x) and v (along y), any matching shape.
+
+    The lattice is separable, so AF = Σ_ij w_ij e^{jk x_i u} e^{jk y_j v} needs
+    only (nx + ny) exponentials per direction plus one matrix product.
+    """
+    u, v = np.broadcast_arrays(np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64))
+    k0 = 2 * np.pi * design['fr'] / c
+    Px = np.exp(1j * k0 * design['x'][:, None] * u.ravel()[None, :])  # (nx, P)
+    Py = np.exp(1j * k0 * design['y'][:, None] * v.ravel()[None, :])  # (ny, P)
+    AF = np.einsum('jp,jp->p', design['weights'].T @ Px, Py)
+    return AF.reshape(u.shape)
+
+def element_pattern(design, u, v, pol):
+    """Single-patch radiation intensity (cavity model, unnormalized)"""
+    F = _pattern_factor(design['W'], design['L_eff'], design['h'], design['fr'], u, v)
+    return F * F * pol
+
+def array_pattern(design, step_deg=1.0):
+    """Normalized total intensity U(θ, φ) on the θ ∈ [0°, 90°] × φ ∈ [0°, 360°) grid.
+
+    Returns theta, phi (rad), U (peak 1) and the directivity of the array.
+    """
+    g = angle_grid(step_deg)
+    AF = array_factor(design, g['u'], g['v'])
+    U = (AF.real ** 2 + AF.imag ** 2) * element_pattern(design, g['u'], g['v'], g['pol'])
+    U_max = U.max()
+    directivity = 4 * np.pi * U_max / np.sum(U * g['weights'])
+    return g['theta'], g['phi'], U / U_max, directivity
+
+def _intensity(design, u, v, w):
+    """Total intensity at direction (u, v, w = cos θ); zero below the ground plane"""
+    sin2 = u * u + v * v
+    # cos²φ + cos²θ sin²φ written in direction cosines (1 at broadside)
+    pol = np.where(sin2 > 0, (u * u + w * w * v * v) / np.where(sin2 > 0, sin2, 1.0), 1.0)
+    AF = array_factor(design, u, v)
+    U = (AF.real ** 2 + AF.imag ** 2) * element_pattern(design, u, v, pol)
+    return np.where(w >= 0, U, 0.0)
+
+def beam_cuts(design, step_deg=0.1):
+    """Normalized intensity along two great circles through the steered beam.
+
+    'scan': the plane φ = φ0 through zenith, angle = signed θ (the E-plane for
+    φ0 = 0°). 'cross': the orthogonal cut through the beam direction, angle
+    measured from the beam (the H-plane at broadside). Returns angles (deg)
+    and both cuts.
+    """
+    t = np.deg2rad(np.arange(-90, 90 + step_deg / 2, step_deg))
+    theta0, phi0 = np.deg2rad(design['steer_theta_deg']), np.deg2rad(design['steer_phi_deg'])
+    along = np.array([np.cos(phi0), np.sin(phi0), 0.0])
+    beam = np.array([np.sin(theta0) * np.cos(phi0), np.sin(theta0) * np.sin(phi0), np.cos(theta0)])
+    across = np.array([-np.sin(phi0), np.cos(phi0), 0.0])
+    cuts = []
+    for start, direction in ((np.array([0.0, 0.0, 1.0]), along), (beam, across)):
+        r = np.cos(t)[:, None] * start + np.sin(t)[:, None] * direction
+        U = _intensity(design, r[:, 0], r[:, 1], r[:, 2])
+        cuts.append(U / U.max())
+    return np.rad2deg(t), cuts[0], cuts[1]
+
+def _beam_metrics(theta_deg, U):
+    """Half-power beamwidth (deg; NaN if the cut never drops to half power) and peak sidelobe level (dB) of a normalized cut"""
+    peak = int(np.argmax(U))
+    # Main lobe ends at the first local minimum on each side of the peak
+    left = peak
+    while left > 0 and U[left - 1] <= U[left]:
+        left -= 1
+    right = peak
+    while right < len(U) - 1 and U[right + 1] <= U[right]:
+        right += 1
+    outside = np.concatenate([U[:left], U[right + 1:]])
+    sll_db = 10 * np.log10(outside.max()) if outside.size and outside.max() > 0 else -np.inf
+
+    def crossing(indices):
+        for i0, i1 in zip(indices[:-1], indices[1:]):
+            if U[i1] < 0.5:
+                return theta_deg[i0] + (U[i0] - 0.5) / (U[i0] - U[i1]) * (theta_deg[i1] - theta_deg[i0])
+        # Still above half power at the end of the cut: no beamwidth to report
+        return np.nan
+
+    hpbw = abs(crossing(np.arange(peak, len(U))) - crossing(np.arange(peak, -1, -1)))
+    return hpbw, sll_db
+
+def array_metrics(design, step_deg=1.0, cut_step_deg=0.1):
+    """Directivity, beam direction, and beamwidth / peak sidelobe level in the two beam cuts (see beam_cuts)"""
+    theta, phi, U, directivity = array_pattern(design, step_deg)
+    i, j = np.unravel_index(np.argmax(U), U.shape)
+    angle, scan, cross = beam_cuts(design, cut_step_deg)
+    hpbw_scan, sll_scan = _beam_metrics(angle, scan)
+    hpbw_cross, sll_cross = _beam_metrics(angle, cross)
+    return {
+        'directivity': directivity,
+        'directivity_dbi': 10 * np.log10(directivity),
+        'peak_theta_deg': float(np.rad2deg(theta[i])),
+        # φ is undefined at zenith
+        'peak_phi_deg': float(np.rad2deg(phi[j])) if i > 0 else 0.0,
+        'hpbw_scan_deg': hpbw_scan,
+        'sll_scan_db': sll_scan,
+        'hpbw_cross_deg': hpbw_cross,
+        'sll_cross_db': sll_cross,
+    }
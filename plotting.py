@@ -1,8 +1,19 @@
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+import numpy as np
 import streamlit as st
 
-def plot_antenna_geometry(L, W, g_len, g_wid, fx, fy):
+# Matplotlib and Plotly are imported inside each function, on the first figure actually drawn
+
+def figure_png(fig):
+    """Render a Matplotlib figure to PNG bytes and release it (cacheable, unlike the figure)"""
+    import io
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def antenna_geometry_figure(L, W, g_len, g_wid, fx, fy):
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots()
     ax.set_title("Antenna Geometry")
     ax.add_patch(plt.Rectangle((0, 0), g_wid, g_len, fill=False, edgecolor='black', linewidth=2, label='Ground Plane'))
@@ -16,9 +27,13 @@ def plot_antenna_geometry(L, W, g_len, g_wid, fx, fy):
     ax.set_xlabel("Width (mm)")
     ax.set_ylabel("Length (mm)")
     ax.legend()
-    st.pyplot(fig)
+    return fig
 
-def plot_antenna_3d(L, W, g_len, g_wid, fx, fy, substrate_height_mm):
+def plot_antenna_geometry(L, W, g_len, g_wid, fx, fy):
+    st.pyplot(antenna_geometry_figure(L, W, g_len, g_wid, fx, fy))
+
+def antenna_3d_figure(L, W, g_len, g_wid, fx, fy, substrate_height_mm):
+    import plotly.graph_objects as go
     patch_height = 0.035  # metal thickness in mm
     patch_x = (g_wid - W) / 2
     patch_y = (g_len - L) / 2
@@ -83,6 +98,157 @@ def plot_antenna_3d(L, W, g_len, g_wid, fx, fy, substrate_height_mm):
         height=600,
         margin=dict(l=0, r=0, t=40, b=0)
     )
+    return fig
+
+def plot_antenna_3d(L, W, g_len, g_wid, fx, fy, substrate_height_mm):
+    st.plotly_chart(antenna_3d_figure(L, W, g_len, g_wid, fx, fy, substrate_height_mm), use_container_width=True)
 
-    st.plotly_chart(fig, use_container_width=True) 
 
+def radiation_pattern_figure(theta_deg, e_plane_db, h_plane_db, floor_db=-30):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(subplot_kw={'projection': 'polar'})
+    ax.set_title("Radiation Pattern (normalized, dB)")
+    theta = np.deg2rad(theta_deg)
+    ax.plot(theta, np.maximum(e_plane_db, floor_db), label='E-plane (φ = 0°)', color='royalblue', linewidth=2)
+    ax.plot(theta, np.maximum(h_plane_db, floor_db), label='H-plane (φ = 90°)', color='red', linewidth=2, linestyle='--')
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_thetamin(-90)
+    ax.set_thetamax(90)
+    ax.set_rlim(floor_db, 0)
+    ax.legend(loc='lower center')
+    return fig
+
+def plot_radiation_pattern(theta_deg, e_plane_db, h_plane_db, floor_db=-30):
+    st.pyplot(radiation_pattern_figure(theta_deg, e_plane_db, h_plane_db, floor_db))
+
+def s11_figure(freq_ghz, s11_db):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    ax.set_title("Reflection Coefficient")
+    ax.plot(freq_ghz, s11_db, color='royalblue', linewidth=2, label='S11')
+    ax.axhline(-10, color='gray', linestyle='--', label='-10 dB')
+    ax.set_xlabel("Frequency (GHz)")
+    ax.set_ylabel("|S11| (dB)")
+    ax.set_ylim(max(s11_db.min(), -50) - 2, 0)
+    ax.grid(True)
+    ax.legend()
+    return fig
+
+def plot_s11(freq_ghz, s11_db):
+    st.pyplot(s11_figure(freq_ghz, s11_db))
+
+def tolerance_histogram_figure(counts, edges_hz, spec_hz, nominal_hz):
+    """Resonance distribution from tolerance_analysis, with the spec band shaded"""
+    import matplotlib.pyplot as plt
+    edges = np.asarray(edges_hz) / 1e9
+    fig, ax = plt.subplots()
+    ax.set_title("Resonance Distribution")
+    ax.axvspan(spec_hz[0] / 1e9, spec_hz[1] / 1e9, color='seagreen', alpha=0.25, zorder=3, label='Spec')
+    ax.stairs(counts / counts.sum() * 100, edges, fill=True, color='royalblue', alpha=0.8, label='Samples')
+    ax.axvline(nominal_hz / 1e9, color='gray', linestyle='--', label='Nominal')
+    ax.set_xlabel("Resonance Frequency (GHz)")
+    ax.set_ylabel("Samples (%)")
+    ax.grid(True)
+    ax.legend()
+    return fig
+
+def pareto_front_figure(front):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    ax.set_title("Pareto Front")
+    points = ax.scatter(front['area_mm2'], front['bandwidth_pct'], c=front['efficiency'] * 100, cmap='viridis')
+    fig.colorbar(points, ax=ax, label='Efficiency (%)')
+    ax.set_xlabel("Patch Area (mm²)")
+    ax.set_ylabel("-10 dB Bandwidth (%)")
+    ax.grid(True)
+    return fig
+
+def plot_pareto_front(front):
+    st.pyplot(pareto_front_figure(front))
+
+def _array_element_centres(design):
+    # Plot axes follow antenna_geometry_figure: width (y, along W) horizontal, length (x, along L) vertical
+    cx, cy = np.meshgrid(design['x'] * 1000, design['y'] * 1000, indexing='ij')
+    return cy.ravel(), cx.ravel()
+
+def _array_ground(design):
+    """Ground-plane extent (mm): elements plus the single patch's 3h margin"""
+    margin = 3 * design['h'] * 1000
+    half_w = design['y'].max() * 1000 + design['W'] * 500 + margin
+    half_l = design['x'].max() * 1000 + design['L'] * 500 + margin
+    return half_w, half_l
+
+def array_layout_figure(design):
+    """Top view of an array: every patch outline in one filled trace, feeds coloured by amplitude"""
+    import plotly.graph_objects as go
+    ex, ey = _array_element_centres(design)
+    W, L = design['W'] * 1000, design['L'] * 1000
+    # One polyline for all patches; NaN breaks the line between rectangles
+    outline_x = np.array([-W / 2, W / 2, W / 2, -W / 2, -W / 2, np.nan])
+    outline_y = np.array([-L / 2, -L / 2, L / 2, L / 2, -L / 2, np.nan])
+    half_w, half_l = _array_ground(design)
+    amplitude = design['amplitude'].ravel()
+    phase = np.rad2deg(design['phase']).ravel()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=[-half_w, half_w, half_w, -half_w, -half_w], y=[-half_l, -half_l, half_l, half_l, -half_l],
+        mode='lines', line=dict(color='black', width=2), name='Ground Plane', hoverinfo='skip'))
+    fig.add_trace(go.Scatter(
+        x=(ex[:, None] + outline_x).ravel(), y=(ey[:, None] + outline_y).ravel(),
+        mode='lines', fill='toself', fillcolor='skyblue', line=dict(color='royalblue', width=1),
+        name=f"Patches ({design['nx']} x {design['ny']})", hoverinfo='skip'))
+    fig.add_trace(go.Scatter(
+        x=ex, y=ey, mode='markers', name='Feeds',
+        marker=dict(size=7, color=amplitude, colorscale='Viridis', cmin=0, cmax=1, colorbar=dict(title='Amplitude')),
+        customdata=np.column_stack([amplitude, phase]),
+        hovertemplate="Amplitude %{customdata[0]:.3f}<br>Phase %{customdata[1]:.1f}°<extra></extra>"))
+    fig.update_layout(title="Array Layout", xaxis_title="Width (mm)", yaxis_title="Length (mm)",
+                      yaxis=dict(scaleanchor='x'), height=600, margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+def array_3d_figure(design, substrate_height_mm):
+    """3D view of an array: all patches in one Mesh3d trace shaded by amplitude"""
+    import plotly.graph_objects as go
+    ex, ey = _array_element_centres(design)
+    W, L = design['W'] * 1000, design['L'] * 1000
+    n = ex.size
+    corners_x = np.array([-W / 2, W / 2, W / 2, -W / 2])
+    corners_y = np.array([-L / 2, -L / 2, L / 2, L / 2])
+    base = 4 * np.arange(n)[:, None]
+    triangles = np.concatenate([base + [0, 1, 2], base + [0, 2, 3]])
+    half_w, half_l = _array_ground(design)
+
+    fig = go.Figure()
+    fig.add_trace(go.Mesh3d(
+        x=[-half_w, half_w, half_w, -half_w], y=[-half_l, -half_l, half_l, half_l], z=[0, 0, 0, 0],
+        i=[0, 0], j=[1, 2], k=[2, 3], color='gray', opacity=0.4, name='Ground Plane', hoverinfo='skip'))
+    fig.add_trace(go.Mesh3d(
+        x=(ex[:, None] + corners_x).ravel(), y=(ey[:, None] + corners_y).ravel(),
+        z=np.full(4 * n, substrate_height_mm),
+        i=triangles[:, 0], j=triangles[:, 1], k=triangles[:, 2],
+        intensity=np.repeat(design['amplitude'].ravel(), 4), colorscale='Viridis', cmin=0, cmax=1,
+        colorbar=dict(title='Amplitude'), name='Patches', hoverinfo='skip'))
+    fig.update_layout(
+        title="3D Patch Array",
+        scene=dict(xaxis_title='Width (mm)', yaxis_title='Length (mm)', zaxis_title='Height (mm)',
+                   aspectmode='manual', aspectratio=dict(x=1, y=half_l / half_w, z=0.1)),
+        height=600, margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+def beam_cuts_figure(angle_deg, scan, cross, floor_db=-40):
+    """Normalized array pattern (dB) in the scan plane and the cross plane through the beam"""
+    import matplotlib.pyplot as plt
+    to_db = lambda U: np.maximum(10 * np.log10(np.maximum(U, 1e-12)), floor_db)
+    fig, ax = plt.subplots()
+    ax.set_title("Array Pattern (normalized)")
+    ax.plot(angle_deg, to_db(scan), color='royalblue', linewidth=1.5, label='Scan plane (θ)')
+    ax.plot(angle_deg, to_db(cross), color='red', linewidth=1.5, linestyle='--', label='Cross plane (from beam)')
+    ax.set_xlabel("Angle (deg)")
+    ax.set_ylabel("Relative intensity (dB)")
+    ax.set_xlim(-90, 90)
+    ax.set_ylim(floor_db, 1)
+    ax.grid(True)
+    ax.legend()
+    return fig
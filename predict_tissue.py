@@ -1,29 +1,56 @@
-import joblib
-import pandas as pd
+import argparse
+import time
 import numpy as np
+from tissue_model import TissueClassifier
 
-model = joblib.load("tissue_classifier.pkl")
-
-eps0 = 8.854e-12
+# Loaded on the first prediction, not at import
+classifier = TissueClassifier()
 
 def predict_tissue(freq, eps, sigma):
-    omega = 2 * np.pi * freq * 1e9
-    penetration_depth = np.sqrt(2 / (omega * 4*np.pi*1e-7 * max(sigma, 1e-9)))
-    loss_tangent = sigma / (omega * eps0 * eps)
-
-    X = pd.DataFrame([{
-        "Frequency": freq,
-        "Permittivity": eps,
-        "elec_cond": sigma,
-        "penetration_depth": penetration_depth,
-        "loss_tangent": loss_tangent
-    }])
-
-    return model.predict(X)[0]
-
-
-# ---- Example tests ----
-print(predict_tissue(2.4, 38.3, 1.35))  # Skin
-print(predict_tissue(2.4, 10.8, 0.23))  # Fat
-print(predict_tissue(2.4, 11.5, 0.34))  # Bone
-print(predict_tissue(2.4, 1.0, 0.0))    # Air
+    return classifier.predict_one(freq, eps, sigma)
+
+def predict_tissues(freq, eps, sigma):
+    """Vectorized predict_tissue over arrays of frequency (GHz), permittivity and conductivity"""
+    return classifier.predict(freq, eps, sigma)
+
+# -----------------------------------
+# Latency / throughput benchmark
+# -----------------------------------
+def benchmark(clf, n_single=200, batch_size=100_000, seed=0):
+    """Time single-sample predictions and one large batch on random inputs"""
+    rng = np.random.default_rng(seed)
+    freq = rng.uniform(2.0, 3.0, batch_size)
+    eps = rng.uniform(1.0, 80.0, batch_size)
+    sigma = rng.uniform(0.0, 4.0, batch_size)
+
+    clf.predict_one(freq[0], eps[0], sigma[0])  # load the model outside the timings
+    start = time.perf_counter()
+    for i in range(n_single):
+        clf.predict_one(freq[i], eps[i], sigma[i])
+    single_ms = (time.perf_counter() - start) / n_single * 1000
+
+    start = time.perf_counter()
+    clf.predict(freq, eps, sigma)
+    batch_s = time.perf_counter() - start
+    return {'single_ms': single_ms, 'batch_rows_per_s': batch_size / batch_s}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict the dielectric tissue class of measured properties")
+    parser.add_argument("--model", help="Model file (.npz compiled forest or .pkl); defaults to the compiled forest if present")
+    parser.add_argument("--benchmark", action="store_true", help="Report single-sample latency and batch throughput")
+    args = parser.parse_args(argv)
+
+    clf = TissueClassifier(args.model)
+    if args.benchmark:
+        result = benchmark(clf)
+        print(f"Single sample: {result['single_ms']:.2f} ms")
+        print(f"Batch: {result['batch_rows_per_s']:,.0f} rows/s")
+        return
+
+    # ---- Example tests ----
+    labels = clf.predict([2.4, 2.4, 2.4, 2.4], [38.3, 10.8, 11.5, 1.0], [1.35, 0.23, 0.34, 0.0])
+    for name, label in zip(["Skin", "Fat", "Bone", "Air"], labels):
+        print(f"{name}: {label}")
+
+if __name__ == "__main__":
+    main()
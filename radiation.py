@@ -0,0 +1,132 @@
+from functools import lru_cache
+import numpy as np
+from antenna_calc import c, patch_dimensions_raw
+
+# Patch lies in the x-y plane over an infinite ground: L (resonant) along x,
+# W along y, broadside along +z. E-plane is φ = 0°, H-plane is φ = 90°.
+
+# -----------------------------------
+# Angle grid and trig tables
+# -----------------------------------
+@lru_cache(maxsize=8)
+def angle_grid(step_deg=1.0, quadrant=False):
+    """θ ∈ [0°, 90°] × φ grid with precomputed trig tables (read-only).
+
+    φ covers [0°, 360°), or [0°, 90°] inclusive when quadrant=True; the
+    cavity-model pattern is symmetric about both principal planes, so one
+    quadrant is enough for integrals and beamwidths.
+    """
+    theta = np.deg2rad(np.arange(0, 90 + step_deg / 2, step_deg))
+    if quadrant:
+        phi = np.deg2rad(np.arange(0, 90 + step_deg / 2, step_deg))
+    else:
+        phi = np.deg2rad(np.arange(0, 360, step_deg))
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    tables = {
+        'theta': theta,
+        'phi': phi,
+        'cos_t': np.cos(t),
+        'cos_p': np.cos(p),
+        'sin_p': np.sin(p),
+        'u': np.sin(t) * np.cos(p),  # direction cosine along L
+        'v': np.sin(t) * np.sin(p),  # direction cosine along W
+        # |E|² polarization factor: cos²φ + cos²θ sin²φ
+        'pol': np.cos(p) ** 2 + np.cos(t) ** 2 * np.sin(p) ** 2,
+    }
+    # Integration weights for ∫∫ U sinθ dθ dφ (trapezoid; periodic in φ on the full grid)
+    d = np.deg2rad(step_deg)
+    w_theta = np.sin(theta) * d
+    w_theta[[0, -1]] /= 2
+    w_phi = np.full(len(phi), d)
+    if quadrant:
+        w_phi[[0, -1]] /= 2
+        w_phi *= 4
+    tables['weights'] = w_theta[:, None] * w_phi[None, :]
+    for values in tables.values():
+        values.flags.writeable = False
+    return tables
+
+# -----------------------------------
+# Cavity-model far field
+# -----------------------------------
+def _sinc(x):
+    # np.sinc is sin(πx)/(πx)
+    return np.sinc(x / np.pi)
+
+def _pattern_factor(W, L_eff, h, fr, u, v):
+    """Slot-pair factor shared by E_θ and E_φ"""
+    k0 = 2 * np.pi * fr / c
+    return np.cos(k0 * L_eff / 2 * u) * _sinc(k0 * W / 2 * v) * _sinc(k0 * h / 2 * u)
+
+def far_field(W, L_eff, h, fr, cos_t, cos_p, sin_p, u, v):
+    """E_θ, E_φ of the two radiating slots (unnormalized), broadcast over designs and angles"""
+    F = _pattern_factor(W, L_eff, h, fr, u, v)
+    return cos_p * F, -cos_t * sin_p * F
+
+def power_pattern(W, L_eff, h, fr, step_deg=1.0):
+    """Normalized radiation intensity U(θ, φ) of one design on the full angle grid"""
+    g = angle_grid(step_deg)
+    U = _pattern_factor(W, L_eff, h, fr, g['u'], g['v']) ** 2 * g['pol']
+    return g['theta'], g['phi'], U / U.max()
+
+def _half_power_width(cut, theta):
+    """Full beamwidth (deg) where a normalized cut starting at broadside drops to 0.5; NaN if it never does within 90°"""
+    below = cut < 0.5
+    first = np.argmax(below, axis=-1)
+    hit = below.any(axis=-1)
+    i = np.maximum(first, 1)
+    rows = np.arange(cut.shape[0])
+    y0, y1 = cut[rows, i - 1], cut[rows, i]
+    t0, t1 = theta[i - 1], theta[i]
+    t_half = t0 + (y0 - 0.5) / (y0 - y1) * (t1 - t0)
+    return np.where(hit, 2 * np.rad2deg(t_half), np.nan)
+
+def pattern_metrics(W, L_eff, h, fr, step_deg=1.0, chunk_size=64):
+    """Directivity and E/H-plane half-power beamwidths for a batch of designs.
+
+    Inputs are broadcastable arrays in metres / Hz. Designs are evaluated
+    chunk_size at a time on the shared trig tables, so memory is bounded by
+    chunk_size × grid size. Returns a dict of arrays; a beamwidth is NaN
+    when the cut stays above half power out to the horizon.
+    """
+    W, L_eff, h, fr = (a.ravel() for a in np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (W, L_eff, h, fr))))
+    g = angle_grid(step_deg, quadrant=True)
+    n = len(W)
+    directivity = np.empty(n)
+    hpbw_e = np.empty(n)
+    hpbw_h = np.empty(n)
+
+    for start in range(0, n, chunk_size):
+        s = slice(start, start + chunk_size)
+        shape = (-1, 1, 1)
+        F = _pattern_factor(W[s].reshape(shape), L_eff[s].reshape(shape), h[s].reshape(shape),
+                            fr[s].reshape(shape), g['u'], g['v'])
+        U = F * F
+        U *= g['pol']
+        U_max = U.max(axis=(1, 2))
+        directivity[s] = 4 * np.pi * U_max / np.einsum('ntp,tp->n', U, g['weights'])
+
+        hpbw_e[s] = _half_power_width(U[:, :, 0] / U_max[:, None], g['theta'])
+        hpbw_h[s] = _half_power_width(U[:, :, -1] / U_max[:, None], g['theta'])
+
+    return {
+        'directivity': directivity,
+        'directivity_dbi': 10 * np.log10(directivity),
+        'hpbw_e_deg': hpbw_e,
+        'hpbw_h_deg': hpbw_h,
+    }
+
+def principal_plane_cuts(W, L_eff, h, fr, step_deg=1.0):
+    """Normalized E-plane (φ = 0°) and H-plane (φ = 90°) patterns in dB over θ ∈ [-90°, 90°]"""
+    theta = np.deg2rad(np.arange(-90, 90 + step_deg / 2, step_deg))
+    st, ct = np.sin(theta), np.cos(theta)
+    E_plane, _ = far_field(W, L_eff, h, fr, ct, 1.0, 0.0, st, 0.0)
+    _, H_plane = far_field(W, L_eff, h, fr, ct, 0.0, 1.0, 0.0, st)
+    to_db = lambda E: 10 * np.log10(np.maximum(E ** 2 / np.max(E ** 2), 1e-6))
+    return np.rad2deg(theta), to_db(E_plane), to_db(H_plane)
+
+def design_pattern_metrics(fr, h, epsilon, step_deg=1.0):
+    """pattern_metrics straight from (fr, h, εr) via the patch model"""
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    return pattern_metrics(raw['W'], raw['L_eff'], h, fr, step_deg)
@@ -0,0 +1,152 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+
+# Bump when cached value layouts change so old disk entries are ignored
+CACHE_VERSION = 2
+_MISSING = object()
+
+# -----------------------------------
+# Key normalization
+# -----------------------------------
+def normalize_key(value):
+    """Hashable, canonical form of call arguments.
+
+    Floats are rounded to 12 significant digits so 2.4 and 2.4000000000001
+    (typical widget round-off) share an entry; names are stripped.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(f"{float(value):.12g}") + 0.0
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (tuple, list)):
+        return tuple(normalize_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize_key(v)) for k, v in value.items()))
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.shape, value.dtype.str, hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+    if value is None:
+        return None
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+def _digest(namespace, key):
+    return hashlib.sha1(repr((CACHE_VERSION, namespace, key)).encode()).hexdigest()
+
+# -----------------------------------
+# LRU result cache with optional disk backing
+# -----------------------------------
+class ResultCache:
+    """Thread-safe in-memory LRU of computed results, optionally backed by a shared directory.
+
+    With disk_dir set, misses fall through to pickled entries under
+    disk_dir/<namespace>/ (written atomically), so replicas sharing the
+    directory serve each other's results. Only share a directory you trust:
+    entries are unpickled.
+    """
+
+    def __init__(self, maxsize=1024, disk_dir=None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _disk_path(self, namespace, key):
+        return os.path.join(self.disk_dir, namespace, _digest(namespace, key) + ".pkl")
+
+    def get(self, namespace, key, default=None):
+        key = normalize_key(key)
+        with self._lock:
+            if (namespace, key) in self._entries:
+                self._entries.move_to_end((namespace, key))
+                self._stats['hits'] += 1
+                return self._entries[(namespace, key)]
+
+        if self.disk_dir:
+            path = self._disk_path(namespace, key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                # Truncated or stale entry: drop it and recompute
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                self._remember(namespace, key, value)
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+                return value
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return default
+
+    def put(self, namespace, key, value):
+        key = normalize_key(key)
+        self._remember(namespace, key, value)
+        if self.disk_dir:
+            path = self._disk_path(namespace, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    def _remember(self, namespace, key, value):
+        with self._lock:
+            self._entries[(namespace, key)] = value
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_or_compute(self, namespace, key, compute):
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(namespace, key, value)
+        return value
+
+    def memoize(self, namespace):
+        """Decorator caching a function's results under namespace, keyed by its normalized arguments"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.get_or_compute(namespace, (args, kwargs), lambda: func(*args, **kwargs))
+            wrapper.cache = self
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Hit/miss counters for monitoring; hit_rate counts memory and disk hits"""
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), maxsize=self.maxsize)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop in-memory entries and reset counters (disk entries are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import numpy as np
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from antenna_calc import calculate_patch_dimensions, PATCH_FIELDS
+from material_data import MaterialDB, component_materials
+from tissue_checker import build_tissue_index, check_compatibility, column_key, similarity_score
+from tissue_index import METHODS
+
+MATERIALS_CSV = "cst_materials_extracted.csv"
+TISSUE_CSV = "tissue_properties.csv"
+# Rows per process-pool task: large enough to amortize pickling, small enough to stream steadily
+SWEEP_TASK_ROWS = 50_000
+TISSUE_TASK_ROWS = 20_000
+MAX_SWEEP_ROWS = 50_000_000
+NDJSON = "application/x-ndjson"
+MEASUREMENT_FIELDS = {'frequency', 'permittivity', 'elec_cond'}
+
+# -----------------------------------
+# Process-pool workers (batch requests)
+# -----------------------------------
+_worker = {}
+
+def _init_worker(materials_csv, tissue_csv):
+    """Load the tables once per worker process (memory-mapped binary cache)"""
+    _worker['materials'] = MaterialDB.load(materials_csv).to_frame()
+    _worker['tissues'] = build_tissue_index(tissue_csv)
+
+def _sweep_task(freqs_ghz, heights_mm, material_rows, dispersive):
+    """NDJSON lines of sweep.sweep_designs over one block of frequencies"""
+    from sweep import sweep_designs
+    materials = _worker['materials'].iloc[material_rows]
+    chunks = sweep_designs(freqs_ghz, heights_mm, materials, SWEEP_TASK_ROWS, dispersive)
+    return b"".join(chunk.to_json(orient='records', lines=True).encode() for chunk in chunks)
+
+def _tissue_task(records, tolerance, tissues, method, top_k):
+    """NDJSON lines of check_compatibility_batch over one block of measurements"""
+    import pandas as pd
+    from tissue_checker import check_compatibility_batch
+    results = check_compatibility_batch(_worker['tissues'], pd.DataFrame.from_records(records),
+                                        tolerance, tissues, method, top_k)
+    return results.to_json(orient='records', lines=True).encode()
+
+async def _stream(pool, tasks, window):
+    """Run (fn, *args) tasks on the pool, at most window in flight, yielding results in order.
+
+    Pending tasks are cancelled if the client disconnects.
+    """
+    loop = asyncio.get_running_loop()
+    pending = []
+    tasks = iter(tasks)
+    try:
+        for task in tasks:
+            pending.append(loop.run_in_executor(pool, *task))
+            if len(pending) >= window:
+                yield await pending.pop(0)
+        while pending:
+            yield await pending.pop(0)
+    finally:
+        for future in pending:
+            future.cancel()
+
+# -----------------------------------
+# Request parsing
+# -----------------------------------
+def _error(status_code, detail):
+    raise HTTPException(status_code=status_code, detail=detail)
+
+async def _params(request):
+    """Query parameters for GET, JSON object body otherwise"""
+    if request.method == "GET":
+        return dict(request.query_params)
+    try:
+        body = await request.json()
+    except ValueError:
+        _error(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        _error(400, "Request body must be a JSON object")
+    return body
+
+def _number(params, name, default=None, minimum=None):
+    value = params.get(name, default)
+    if value is None:
+        _error(400, f"Missing parameter '{name}'")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        _error(400, f"Parameter '{name}' must be a number")
+    if not math.isfinite(value) or (minimum is not None and value <= minimum):
+        _error(400, f"Parameter '{name}' must be a finite number above {minimum}")
+    return value
+
+def _integer(params, name, default=None, minimum=None):
+    value = _number(params, name, default, minimum)
+    if not value.is_integer():
+        _error(400, f"Parameter '{name}' must be a whole number")
+    return int(value)
+
+def _string(params, name, default=None):
+    value = params.get(name, default)
+    if value is not None and not isinstance(value, str):
+        _error(400, f"Parameter '{name}' must be a string")
+    return value
+
+def _string_list(params, name):
+    """Optional list-of-strings parameter (None when absent); anything else is a 400"""
+    values = params.get(name)
+    if values is not None and (not isinstance(values, list) or not all(isinstance(v, str) for v in values)):
+        _error(400, f"Parameter '{name}' must be a list of strings")
+    return values
+
+def _range(params, name):
+    """Number, [VALUE] or [START, STOP, STEP] of positive values -> (values, grid size), checked before any grid is built"""
+    from sweep import range_size
+    values = params.get(name)
+    if values is None:
+        _error(400, f"Missing parameter '{name}'")
+    values = values if isinstance(values, list) else [values]
+    try:
+        values = [float(v) for v in values]
+        size = range_size(values)
+    except (TypeError, ValueError) as e:
+        _error(400, f"Parameter '{name}': {e}")
+    if values[0] <= 0:
+        _error(400, f"Parameter '{name}' must describe positive values")
+    return values, size
+
+def _measurements(records):
+    """Check every batch measurement before streaming starts; a bad one is a 400 naming its index"""
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        _error(400, "'measurements' must be a list of objects")
+    if not records:
+        _error(400, "'measurements' is empty")
+    for i, record in enumerate(records):
+        fields = {column_key(k): v for k, v in record.items()}
+        missing = MEASUREMENT_FIELDS - fields.keys()
+        if missing:
+            _error(400, f"Measurement {i} lacks fields: {', '.join(sorted(missing))}")
+        for name in sorted(MEASUREMENT_FIELDS):
+            value = fields[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                _error(400, f"Measurement {i}: '{name}' must be a finite number")
+        if fields['frequency'] <= 0:
+            _error(400, f"Measurement {i}: 'frequency' must be above 0")
+        if fields.get('tissue') is not None and not isinstance(fields['tissue'], str):
+            _error(400, f"Measurement {i}: 'tissue' must be a string")
+    return records
+
+def _json_record(record):
+    # NaN/inf are not valid JSON
+    return {k: (None if isinstance(v, float) and not math.isfinite(v) else
+                v.item() if isinstance(v, np.generic) else v)
+            for k, v in record.items()}
+
+# -----------------------------------
+# Endpoints
+# -----------------------------------
+async def health(request):
+    return JSONResponse({'status': 'ok', 'materials': len(request.app.state.materials),
+                         'tissues': len(request.app.state.tissues)})
+
+async def patch(request):
+    """Single design: freq_ghz, h_mm and either material (database name) or epsilon"""
+    params = await _params(request)
+    freq_ghz = _number(params, 'freq_ghz', minimum=0)
+    h_mm = _number(params, 'h_mm', minimum=0)
+    db = request.app.state.materials
+    material = _string(params, 'material')
+    if material is not None:
+        if material not in db:
+            _error(404, f"Unknown material '{material}'")
+        epsilon = float(db.column('Epsilon')[db.index_of(material)])
+    else:
+        epsilon = _number(params, 'epsilon', minimum=0)
+    dims = calculate_patch_dimensions(freq_ghz * 1e9, h_mm / 1000, epsilon)
+    return JSONResponse({'freq_ghz': freq_ghz, 'h_mm': h_mm, 'material': material, 'epsilon': epsilon,
+                         **dict(zip(PATCH_FIELDS, dims))})
+
+def _select_materials(db, component=None, patterns=None):
+    """MaterialDB row indices, restricted like sweep.select_materials"""
+    rows = np.arange(len(db))
+    if component:
+        if component not in component_materials:
+            _error(400, f"Unknown component '{component}' (expected one of {', '.join(component_materials)})")
+        rows = np.intersect1d(rows, db.search(component_materials[component]))
+    if patterns:
+        rows = np.intersect1d(rows, db.search(patterns))
+    return rows
+
+async def sweep(request):
+    """Frequency × height × material grid as NDJSON, computed on the process pool.
+
+    Body: {"freq": [START, STOP, STEP] | VALUE, "height": ..., "component": ...,
+    "materials": [substrings], "dispersive": false}. Rows arrive in flat grid
+    order (frequency outermost), with the columns of sweep.py.
+    """
+    from sweep import parse_range
+    params = await _params(request)
+    freq_range, n_freqs = _range(params, 'freq')
+    height_range, n_heights = _range(params, 'height')
+    rows = _select_materials(request.app.state.materials, _string(params, 'component'), _string_list(params, 'materials'))
+    if rows.size == 0:
+        _error(404, "No materials match the given filters")
+    # Sized from the ranges, so an oversized request never allocates its grid
+    total = n_freqs * n_heights * rows.size
+    if total > MAX_SWEEP_ROWS:
+        _error(413, f"Sweep of {total} designs exceeds the limit of {MAX_SWEEP_ROWS}")
+    freqs, heights = parse_range(freq_range), parse_range(height_range)
+
+    dispersive = bool(params.get('dispersive', False))
+    per_task = max(1, SWEEP_TASK_ROWS // (heights.size * rows.size))
+    tasks = ((_sweep_task, freqs[i:i + per_task], heights, rows, dispersive)
+             for i in range(0, freqs.size, per_task))
+    state = request.app.state
+    return StreamingResponse(_stream(state.pool, tasks, state.window), media_type=NDJSON,
+                             headers={'X-Total-Rows': str(total)})
+
+async def materials(request):
+    """Material lookup: ?q=substring (repeatable) and/or ?component=Substrate|Patch|Ground"""
+    db = request.app.state.materials
+    rows = _select_materials(db, request.query_params.get('component'), request.query_params.getlist('q'))
+    fields = ['Epsilon', 'Mu', 'TanD', 'Sigma']
+    return JSONResponse([_json_record({'name': db.names[i], **{f: db.column(f)[i] for f in fields}})
+                         for i in rows.tolist()])
+
+async def material(request):
+    db = request.app.state.materials
+    name = request.path_params['name']
+    if name not in db:
+        _error(404, f"Unknown material '{name}'")
+    return JSONResponse(_json_record(db.get(name)))
+
+async def tissue_check(request):
+    """Tissue compatibility.
+
+    A single measurement (tissue, freq_ghz, permittivity, elec_cond; query or
+    JSON) is checked inline. A JSON body with "measurements" (list of objects
+    with frequency, permittivity, elec_cond and optionally tissue) is scored
+    with check_compatibility_batch on the process pool and streamed as NDJSON.
+    """
+    params = await _params(request)
+    tolerance = _number(params, 'tolerance', default=0.15, minimum=0)
+    method = _string(params, 'method', 'nearest')
+    if method not in METHODS:
+        _error(400, f"Unknown method '{method}' (expected one of {', '.join(METHODS)})")
+    state = request.app.state
+
+    if 'measurements' not in params:
+        tissue = _string(params, 'tissue')
+        if tissue is None:
+            _error(400, "Missing parameter 'tissue' (or a 'measurements' list)")
+        freq_ghz = _number(params, 'freq_ghz', minimum=0)
+        permittivity = _number(params, 'permittivity')
+        elec_cond = _number(params, 'elec_cond')
+        compatible, diffs, avg_diff, _ = check_compatibility(state.tissues, tissue, permittivity, elec_cond,
+                                                             freq_ghz, tolerance, method, plot=False)
+        if compatible is None:
+            _error(404, f"Unknown tissue '{tissue}'")
+        return JSONResponse({'tissue': tissue, 'compatible': bool(compatible),
+                             'permittivity_diff': float(diffs[0]), 'elec_cond_diff': float(diffs[1]),
+                             'score': float(similarity_score(avg_diff))})
+
+    records = _measurements(params['measurements'])
+    tissues = _string_list(params, 'tissues')
+    if tissues is not None and not any(t in state.tissues for t in tissues):
+        _error(404, "None of the requested tissues are in the tissue table")
+    top_k = _integer(params, 'top_k', default=3, minimum=0)
+    tasks = ((_tissue_task, records[i:i + TISSUE_TASK_ROWS], tolerance, tissues, method, top_k)
+             for i in range(0, len(records), TISSUE_TASK_ROWS))
+    return StreamingResponse(_stream(state.pool, tasks, state.window), media_type=NDJSON)
+
+async def http_error(request, exc):
+    return JSONResponse({'error': exc.detail}, status_code=exc.status_code)
+
+# -----------------------------------
+# Application
+# -----------------------------------
+def create_app(materials_csv=MATERIALS_CSV, tissue_csv=TISSUE_CSV, workers=None):
+    """Starlette app; tables load and the worker pool starts when the server starts"""
+    workers = workers or os.cpu_count() or 1
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.materials = MaterialDB.load(materials_csv)
+        app.state.tissues = build_tissue_index(tissue_csv)
+        # Spawned (not forked) workers: the server process runs an event loop and threads
+        app.state.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(materials_csv, tissue_csv))
+        app.state.window = 2 * workers
+        try:
+            yield
+        finally:
+            app.state.pool.shutdown(cancel_futures=True)
+
+    routes = [
+        Route("/health", health),
+        Route("/patch", patch, methods=["GET", "POST"]),
+        Route("/sweep", sweep, methods=["POST"]),
+        Route("/materials", materials),
+        Route("/materials/{name:path}", material),
+        Route("/tissue/check", tissue_check, methods=["GET", "POST"]),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan, exception_handlers={HTTPException: http_error})
+
+# For `uvicorn service:app --workers N` (each HTTP worker gets its own pool)
+app = create_app()
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description="HTTP API for patch design, sweeps, materials and tissue checks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Process-pool size for batch requests (default: all cores)")
+    parser.add_argument("--materials-csv", default=MATERIALS_CSV)
+    parser.add_argument("--tissue-csv", default=TISSUE_CSV)
+    args = parser.parse_args(argv)
+
+    uvicorn.run(create_app(args.materials_csv, args.tissue_csv, args.workers),
+                host=args.host, port=args.port, log_level="warning", access_log=False)
+
+if __name__ == "__main__":
+    main()
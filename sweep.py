@@ -0,0 +1,151 @@
+import argparse
+import math
+import numpy as np
+import pandas as pd
+from antenna_calc import calculate_patch_dimensions_batch, PATCH_FIELDS
+from material_data import MaterialDB, filter_materials, component_materials
+from dispersion import permittivity_table, loss_tangent
+
+# -----------------------------------
+# Parametric Sweep
+# -----------------------------------
+def sweep_designs(freqs_ghz, heights_mm, materials, chunk_size=1_000_000, dispersive=False):
+    """Yield DataFrame chunks of the patch model over a frequency × height × material grid.
+
+    The grid is walked in flat-index order (frequency outermost, material
+    innermost), so memory stays bounded by chunk_size however large the sweep.
+    With dispersive=True, εr(f) and tanδ(f) come from each material's
+    dispersion model, evaluated once per (material, frequency) up front.
+    """
+    freqs_ghz = np.asarray(freqs_ghz, dtype=np.float64).ravel()
+    heights_mm = np.asarray(heights_mm, dtype=np.float64).ravel()
+    names = pd.Categorical(materials['Filename'].tolist())
+    eps = materials['Epsilon'].to_numpy(dtype=np.float64)
+
+    if dispersive:
+        eps_c = permittivity_table(materials, freqs_ghz * 1e9)
+        eps_grid = eps_c.real
+        tand_grid = loss_tangent(eps_c)
+
+    shape = (len(freqs_ghz), len(heights_mm), len(eps))
+    total = int(np.prod(shape))
+
+    for start in range(0, total, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, total))
+        fi, hi, mi = np.unravel_index(flat, shape)
+
+        fr = freqs_ghz[fi]
+        h = heights_mm[hi]
+        eps_r = eps_grid[mi, fi] if dispersive else eps[mi]
+        dims = calculate_patch_dimensions_batch(fr * 1e9, h / 1000, eps_r)
+
+        chunk = pd.DataFrame({
+            'Filename': pd.Categorical.from_codes(names.codes[mi], names.categories),
+            'Epsilon': eps_r,
+            'freq_ghz': fr,
+            'h_mm': h,
+        })
+        if dispersive:
+            chunk['TanD'] = tand_grid[mi, fi]
+        for name in PATCH_FIELDS:
+            chunk[name] = dims[name]
+        yield chunk
+
+def write_sweep(chunks, out_path):
+    """Stream sweep chunks to CSV or Parquet (by file extension); returns the row count"""
+    rows = 0
+    if out_path.endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+
+        writer = None
+        try:
+            for chunk in chunks:
+                chunk = chunk.astype({'Filename': str})
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(out_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+            rows += len(chunk)
+    return rows
+
+def range_size(values):
+    """Number of points parse_range(values) yields, without building the grid; bad ranges raise ValueError"""
+    if len(values) not in (1, 3):
+        raise ValueError("Ranges take either one value or START STOP STEP")
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError("Range values must be finite")
+    if len(values) == 1:
+        return 1
+    start, stop, step = values
+    if step <= 0:
+        raise ValueError("STEP must be positive")
+    if stop < start:
+        raise ValueError("STOP must not be below START")
+    # Tolerate round-off so a STOP on the grid is included (e.g. 0.2 to 3.2 in 0.1 steps)
+    return math.floor((stop - start) / step + 1e-9) + 1
+
+def parse_range(values):
+    """START STOP STEP -> inclusive grid; a single value -> one-point grid"""
+    n = range_size(values)
+    if len(values) == 1:
+        return np.array(values, dtype=np.float64)
+    start, _, step = values
+    return start + step * np.arange(n, dtype=np.float64)
+
+def select_materials(df, component=None, patterns=None):
+    if component:
+        df = filter_materials(df, component_materials[component])
+    if patterns:
+        df = filter_materials(df, patterns)
+    return df
+
+# -----------------------------------
+# CLI
+# -----------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parametric patch antenna sweep")
+    parser.add_argument("--freq", type=float, nargs='+', required=True, help="Frequency in GHz: VALUE or START STOP STEP")
+    parser.add_argument("--height", type=float, nargs='+', required=True, help="Substrate height in mm: VALUE or START STOP STEP")
+    parser.add_argument("--component", choices=list(component_materials), help="Restrict to a component's allowed materials")
+    parser.add_argument("--material", nargs='+', help="Restrict to materials whose name contains any of these")
+    parser.add_argument("--materials-csv", default="cst_materials_extracted.csv")
+    parser.add_argument("--dispersive", action="store_true", help="Use each material's εr(f) dispersion model")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--out", required=True, help="Output .csv or .parquet path")
+    args = parser.parse_args(argv)
+
+    try:
+        df = MaterialDB.load(args.materials_csv).to_frame()
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        return 1
+    df = select_materials(df, args.component, args.material)
+    if df.empty:
+        print("No materials match the given filters.")
+        return 1
+
+    try:
+        freqs = parse_range(args.freq)
+        heights = parse_range(args.height)
+    except ValueError as e:
+        parser.error(str(e))
+    chunks = sweep_designs(freqs, heights, df, args.chunk_size, args.dispersive)
+    rows = write_sweep(chunks, args.out)
+    print(f"Wrote {rows} designs to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
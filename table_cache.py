@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import shutil
+import numpy as np
+
+# Bump when the on-disk layout or column typing changes; old caches are ignored
+CACHE_VERSION = 1
+
+# -----------------------------------
+# Binary column cache for CSV tables
+# -----------------------------------
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _source_digest(csv_path, cache_dir, stem):
+    """SHA-1 of the source CSV, reusing the stamped value while size and mtime are unchanged"""
+    stat = os.stat(csv_path)
+    stamp_path = os.path.join(cache_dir, f"{stem}.stamp.json")
+    try:
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+        if stamp['size'] == stat.st_size and stamp['mtime_ns'] == stat.st_mtime_ns:
+            return stamp['sha1']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha1 = _file_sha1(csv_path)
+    tmp_path = f"{stamp_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': sha1}, f)
+    os.replace(tmp_path, stamp_path)
+    return sha1
+
+def _to_storable(values):
+    values = np.asarray(values)
+    if values.dtype == object:
+        # Fixed-width unicode so the column can be memory-mapped; missing text is stored as ''
+        return np.array(['' if v is None or v != v else str(v) for v in values], dtype=str)
+    return values
+
+def _build(table_dir, columns, csv_path, sha1):
+    tmp_dir = f"{table_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    meta = {'version': CACHE_VERSION, 'source': os.path.basename(csv_path), 'sha1': sha1, 'columns': []}
+    for i, (name, values) in enumerate(columns.items()):
+        values = _to_storable(values)
+        np.save(os.path.join(tmp_dir, f"{i}.npy"), values)
+        meta['columns'].append({'name': name, 'file': f"{i}.npy", 'dtype': values.dtype.str, 'length': len(values)})
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    try:
+        os.rename(tmp_dir, table_dir)
+    except OSError:
+        # Another process published the same table first; theirs is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def _load(table_dir):
+    with open(os.path.join(table_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    return {col['name']: np.load(os.path.join(table_dir, col['file']), mmap_mode='r')
+            for col in meta['columns']}
+
+def _cache_location(csv_path, cache_dir):
+    csv_path = os.path.abspath(csv_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(csv_path), ".table_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return csv_path, cache_dir, os.path.splitext(os.path.basename(csv_path))[0]
+
+def table_digest(csv_path, cache_dir=None):
+    """SHA-1 of csv_path's content (stamped in cache_dir, so unchanged files are not re-hashed)"""
+    csv_path, cache_dir, stem = _cache_location(csv_path, cache_dir)
+    return _source_digest(csv_path, cache_dir, stem)
+
+def load_cached_table(csv_path, build_columns, cache_dir=None):
+    """Columns of csv_path as read-only memory-mapped arrays.
+
+    build_columns(csv_path) -> dict of column arrays is only called when no
+    cache exists for the current CSV content. Tables are stored per content
+    hash and format version, so replicas sharing cache_dir never see a
+    half-written or stale table.
+    """
+    csv_path, cache_dir, stem = _cache_location(csv_path, cache_dir)
+    sha1 = _source_digest(csv_path, cache_dir, stem)
+    table_dir = os.path.join(cache_dir, f"{stem}-v{CACHE_VERSION}-{sha1[:16]}")
+
+    if not os.path.exists(os.path.join(table_dir, 'meta.json')):
+        _build(table_dir, build_columns(csv_path), csv_path, sha1)
+        _prune(cache_dir, stem, keep=table_dir)
+    return _load(table_dir)
+
+def _prune(cache_dir, stem, keep):
+    # Old tables can go even if mapped elsewhere: unlinked files stay valid for existing maps
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(f"{stem}-v") and not name.endswith(".tmp") and path != keep:
+            shutil.rmtree(path, ignore_errors=True)
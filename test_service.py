@@ -0,0 +1,92 @@
+import json
+import pytest
+from starlette.testclient import TestClient
+from service import create_app
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(create_app(workers=1)) as client:
+        yield client
+
+MEASUREMENT = {'frequency': 2.4, 'permittivity': 38.0, 'elec_cond': 1.4}
+
+# -----------------------------------
+# /tissue/check
+# -----------------------------------
+def test_tissue_check_single(client):
+    response = client.get("/tissue/check", params={'tissue': 'Skin', 'freq_ghz': 2.4,
+                                                   'permittivity': 38.0, 'elec_cond': 1.4})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['tissue'] == 'Skin'
+    assert isinstance(body['compatible'], bool)
+
+def test_tissue_check_unknown_tissue(client):
+    response = client.get("/tissue/check", params={'tissue': 'Nope', 'freq_ghz': 2.4,
+                                                   'permittivity': 38.0, 'elec_cond': 1.4})
+    assert response.status_code == 404
+
+def test_tissue_check_batch(client):
+    response = client.post("/tissue/check", json={'measurements': [MEASUREMENT, dict(MEASUREMENT, frequency=5.0)],
+                                                  'tissues': ['Skin', 'Muscle'], 'top_k': 1})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2
+
+@pytest.mark.parametrize("tissues", ["Skin", ["Skin", 1], {'Skin': 1}])
+def test_tissue_check_tissues_must_be_string_list(client, tissues):
+    response = client.post("/tissue/check", json={'measurements': [MEASUREMENT], 'tissues': tissues})
+    assert response.status_code == 400
+    assert 'tissues' in response.json()['error']
+
+def test_tissue_check_tissue_must_be_string(client):
+    response = client.post("/tissue/check", json={'tissue': ['Skin'], 'freq_ghz': 2.4,
+                                                  'permittivity': 38.0, 'elec_cond': 1.4})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("bad", [dict(MEASUREMENT, frequency="abc"), {'frequency': 2.4},
+                                 dict(MEASUREMENT, permittivity=None)])
+def test_tissue_check_rejects_bad_measurement_before_streaming(client, bad):
+    response = client.post("/tissue/check", json={'measurements': [MEASUREMENT, bad]})
+    assert response.status_code == 400
+    assert "Measurement 1" in response.json()['error']
+
+@pytest.mark.parametrize("top_k", [0.5, 2.5, 0, "x"])
+def test_tissue_check_top_k_must_be_positive_integer(client, top_k):
+    response = client.post("/tissue/check", json={'measurements': [MEASUREMENT], 'top_k': top_k})
+    assert response.status_code == 400
+
+def test_tissue_check_measurements_must_be_objects(client):
+    response = client.post("/tissue/check", json={'measurements': "not a list"})
+    assert response.status_code == 400
+
+# -----------------------------------
+# /sweep, /patch
+# -----------------------------------
+def test_sweep_materials_must_be_string_list(client):
+    response = client.post("/sweep", json={'freq': 2.4, 'height': 1.6, 'materials': "FR-4"})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("freq", [[2, 3, 0], [2, 3, -0.1], [3, 2, 0.1], [2, "inf", 0.1], [0, 3, 0.1]])
+def test_sweep_rejects_bad_range(client, freq):
+    response = client.post("/sweep", json={'freq': freq, 'height': 1.6})
+    assert response.status_code == 400
+
+def test_sweep_too_large_is_rejected_before_building_the_grid(client):
+    response = client.post("/sweep", json={'freq': [0.1, 1e5, 1e-4], 'height': 1.6})
+    assert response.status_code == 413
+
+def test_sweep(client):
+    response = client.post("/sweep", json={'freq': [2.0, 2.5, 0.1], 'height': 1.6, 'materials': ["FR-4"]})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == int(response.headers['X-Total-Rows'])
+
+def test_patch(client):
+    response = client.get("/patch", params={'freq_ghz': 2.4, 'h_mm': 1.6, 'epsilon': 4.3})
+    assert response.status_code == 200
+    assert response.json()['W'] > 0
+
+def test_patch_material_must_be_string(client):
+    response = client.post("/patch", json={'freq_ghz': 2.4, 'h_mm': 1.6, 'material': ["FR-4 (lossy).mtd"]})
+    assert response.status_code == 400
@@ -1,12 +1,31 @@
-import pandas as pd
+import argparse
+import os
 import numpy as np
-import matplotlib.pyplot as plt
+from table_cache import load_cached_table
+from tissue_index import TissueIndex, FIELDS
 
-def load_tissue_data(csv_path="tissues_properties.csv"):
+def load_tissue_data(csv_path="tissue_properties.csv", use_cache=False):
+    import pandas as pd
+    if use_cache:
+        df = pd.DataFrame(load_cached_table(csv_path, _read_tissue_columns))
+        text = df.select_dtypes(exclude='number').columns
+        df[text] = df[text].replace('', np.nan)
+        return df
     df = pd.read_csv(csv_path)
     df.columns = [col.strip().lower().replace("(", "").replace(")", "").replace(" ", "_") for col in df.columns]
     return df
 
+def build_tissue_index(csv_path="tissue_properties.csv", use_cache=True):
+    """TissueIndex for the tissue table; from the binary cache this needs no pandas"""
+    if not use_cache:
+        return TissueIndex.from_frame(load_tissue_data(csv_path))
+    columns = load_cached_table(csv_path, _read_tissue_columns)
+    return TissueIndex(columns['tissue'], columns['frequency'], columns['permittivity'], columns['elec_cond'])
+
+def _read_tissue_columns(csv_path):
+    df = load_tissue_data(csv_path)
+    return {col: df[col].to_numpy(dtype=object if df[col].dtype.kind not in 'biuf' else None) for col in df.columns}
+
 def compare_values(user_val, ref_val, tolerance):
     rel_diff = abs(user_val - ref_val) / (abs(ref_val) + 1e-8)
     return rel_diff <= tolerance, rel_diff
@@ -22,6 +41,8 @@ def generate_report(user_vals, row, tolerance):
     return all(compatibility), rel_diffs, avg_diff
 
 def plot_comparison(user_vals, ref_vals, tissue_name, compat_list):
+    import matplotlib.pyplot as plt  # only needed when a figure is requested
+
     fields = list(user_vals.keys())
     user_y = [user_vals[f] for f in fields]
     ref_y = [ref_vals[f] for f in fields]
@@ -47,24 +68,142 @@ def plot_comparison(user_vals, ref_vals, tissue_name, compat_list):
 
     return fig
 
-def find_closest_frequency_row(df, tissue_name, user_freq):
-    tissue_rows = df[df['tissue'].str.lower() == tissue_name.lower()]
-    if tissue_rows.empty:
-        return None
+def _as_index(tissue_data):
+    # Accept either a prebuilt TissueIndex or a load_tissue_data frame
+    if isinstance(tissue_data, TissueIndex):
+        return tissue_data
+    return TissueIndex.from_frame(tissue_data)
 
-    tissue_rows = tissue_rows.copy()
-    tissue_rows['freq_diff'] = abs(tissue_rows['frequency'] - user_freq)
-    closest_row = tissue_rows.loc[tissue_rows['freq_diff'].idxmin()]
-    return closest_row
+def find_closest_frequency_row(tissue_data, tissue_name, user_freq, method='nearest'):
+    return _as_index(tissue_data).lookup(tissue_name, user_freq, method)
 
-def check_compatibility(df, tissue_choice, permittivity, elec_cond, freq_ghz, tolerance):
+def check_compatibility(tissue_data, tissue_choice, permittivity, elec_cond, freq_ghz, tolerance, method='nearest', plot=True):
     user_vals = {'permittivity': permittivity, 'elec_cond': elec_cond}
-    row = find_closest_frequency_row(df, tissue_choice, freq_ghz)
+    row = find_closest_frequency_row(tissue_data, tissue_choice, freq_ghz, method)
     if row is None:
         return None, None, None, None
 
     compatible, diffs, avg_diff = generate_report(user_vals, row, tolerance)
     compat_list = [d <= tolerance for d in diffs]
-    fig = plot_comparison(user_vals, row, tissue_choice, compat_list)
+    fig = plot_comparison(user_vals, row, tissue_choice, compat_list) if plot else None
 
     return compatible, diffs, avg_diff, fig
+
+# -----------------------------------
+# Batch compatibility checking
+# -----------------------------------
+def similarity_score(avg_diff):
+    return np.maximum(0, 100 - avg_diff * 100)
+
+def column_key(name):
+    """Measurement column name as check_compatibility_batch reads it ('Frequency (GHz)' -> 'frequency_ghz')"""
+    return name.strip().lower().replace("(", "").replace(")", "").replace(" ", "_")
+
+def _normalize_columns(df):
+    df = df.copy()
+    df.columns = [column_key(col) for col in df.columns]
+    return df
+
+def check_compatibility_batch(tissue_data, measurements, tolerance=0.15, tissues=None,
+                              method='nearest', top_k=3, chunk_size=20_000):
+    """Score a table of measurements against reference tissues in vectorized form.
+
+    measurements needs frequency (GHz), permittivity and elec_cond columns
+    (load_tissue_data naming; original CSV capitalization is accepted). If it
+    also has a tissue column, each row is checked against that tissue like
+    check_compatibility: relative differences, per-field pass/fail, overall
+    compatibility and similarity score. Every row is also scored against all
+    tissues (or the given subset) and the top_k best matches are reported.
+    No figures are drawn; see plot_batch_results.
+    """
+    index = _as_index(tissue_data)
+    df = _normalize_columns(measurements).reset_index(drop=True)
+    freq = df['frequency'].to_numpy(dtype=np.float64)
+    user = {field: df[field].to_numpy(dtype=np.float64) for field in FIELDS}
+
+    if tissues is None:
+        candidates = np.arange(len(index))
+    else:
+        candidates = np.array([index.tissue_id(t) for t in tissues if t in index], dtype=np.int64)
+        if candidates.size == 0:
+            raise ValueError("None of the requested tissues are in the tissue table")
+    top_k = min(top_k, len(candidates))
+
+    out = df.copy()
+    if 'tissue' in df:
+        ids = np.array([index.tissue_id(t) if isinstance(t, str) else None for t in df['tissue']], dtype=object)
+        known = np.array([i is not None for i in ids])
+        ref = index.lookup_many(np.where(known, ids, 0).astype(np.int64), freq, method)
+        diffs = []
+        for field in FIELDS:
+            diff = np.abs(user[field] - ref[field]) / (np.abs(ref[field]) + 1e-8)
+            diff[~known] = np.nan
+            out[f'ref_{field}'] = np.where(known, ref[field], np.nan)
+            out[f'{field}_diff'] = diff
+            out[f'{field}_ok'] = diff <= tolerance
+            diffs.append(diff)
+        avg_diff = np.mean(diffs, axis=0)
+        out['compatible'] = np.all([d <= tolerance for d in diffs], axis=0)
+        out['score'] = similarity_score(avg_diff)
+
+    match_ids = np.empty((len(df), top_k), dtype=np.int64)
+    match_scores = np.empty((len(df), top_k))
+    for start in range(0, len(df), chunk_size):
+        s = slice(start, start + chunk_size)
+        ref = index.lookup_many(candidates[None, :], freq[s, None], method)
+        avg_diff = np.mean([np.abs(user[field][s, None] - ref[field]) / (np.abs(ref[field]) + 1e-8)
+                            for field in FIELDS], axis=0)
+        best = np.argpartition(avg_diff, top_k - 1, axis=1)[:, :top_k]
+        best_diff = np.take_along_axis(avg_diff, best, axis=1)
+        order = np.argsort(best_diff, axis=1)
+        match_ids[s] = candidates[np.take_along_axis(best, order, axis=1)]
+        match_scores[s] = similarity_score(np.take_along_axis(best_diff, order, axis=1))
+
+    names = np.array(index.names, dtype=object)
+    for k in range(top_k):
+        out[f'match_{k + 1}'] = names[match_ids[:, k]]
+        out[f'match_{k + 1}_score'] = match_scores[:, k]
+    return out
+
+def plot_batch_results(results, tolerance, out_dir):
+    """Save one comparison figure per measurement that names a tissue; returns the file paths"""
+    import matplotlib.pyplot as plt
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, row in results.iterrows():
+        if 'tissue' not in row or not isinstance(row['tissue'], str) or np.isnan(row['ref_permittivity']):
+            continue
+        user_vals = {field: row[field] for field in FIELDS}
+        ref_vals = {field: row[f'ref_{field}'] for field in FIELDS}
+        fig = plot_comparison(user_vals, ref_vals, row['tissue'], [row[f'{field}_diff'] <= tolerance for field in FIELDS])
+        path = os.path.join(out_dir, f"measurement_{i}.png")
+        fig.savefig(path)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+def main(argv=None):
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="Batch dielectric tissue compatibility checker")
+    parser.add_argument("measurements", help="CSV with frequency (GHz), permittivity, elec_cond and optionally tissue")
+    parser.add_argument("--tissue-csv", default="tissue_properties.csv")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--tissues", nargs='+', help="Only rank matches among these tissues")
+    parser.add_argument("--method", choices=['nearest', 'linear', 'loglog'], default='nearest')
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--plots-dir", help="Also save a comparison figure per measurement here")
+    parser.add_argument("-o", "--out", default="compatibility_results.csv")
+    args = parser.parse_args(argv)
+
+    index = build_tissue_index(args.tissue_csv, use_cache=False)
+    results = check_compatibility_batch(index, pd.read_csv(args.measurements), args.tolerance,
+                                        args.tissues, args.method, args.top_k)
+    results.to_csv(args.out, index=False)
+    print(f"Checked {len(results)} measurements; results saved to: {args.out}")
+    if args.plots_dir:
+        paths = plot_batch_results(results, args.tolerance, args.plots_dir)
+        print(f"Saved {len(paths)} figures to: {args.plots_dir}")
+
+if __name__ == "__main__":
+    main()
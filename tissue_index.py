@@ -0,0 +1,151 @@
+from bisect import bisect_left
+import numpy as np
+
+FIELDS = ['permittivity', 'elec_cond']
+METHODS = ('nearest', 'linear', 'loglog')
+
+def normalize_name(name):
+    return str(name).strip().lower()
+
+# -----------------------------------
+# Tissue property index
+# -----------------------------------
+class TissueIndex:
+    """Tissue table grouped by normalized name into sorted frequency arrays.
+
+    Rows live in flat arrays ordered by (tissue, frequency); each tissue owns
+    a contiguous slice, so a lookup is a dict hit plus a binary search over
+    that tissue's frequencies, independent of table size.
+
+    Methods: 'nearest' (table row closest in frequency, lower one on ties),
+    'linear' (linear in frequency) and 'loglog' (linear in log f / log value,
+    i.e. a local power law as Cole-Cole dispersion behaves between points;
+    falls back to linear where a value is zero). Queries outside a tissue's
+    frequency range clamp to the end rows.
+    """
+
+    def __init__(self, tissue, frequency, permittivity, elec_cond):
+        tissue = np.asarray(tissue, dtype=object)
+        keys = np.array([normalize_name(t) for t in tissue], dtype=object)
+        frequency = np.asarray(frequency, dtype=np.float64)
+
+        names, tissue_ids = np.unique(keys, return_inverse=True)
+        order = np.lexsort((frequency, tissue_ids))
+        self.tissue_ids = tissue_ids[order]
+        self.frequency = frequency[order]
+        self.values = {
+            'permittivity': np.asarray(permittivity, dtype=np.float64)[order],
+            'elec_cond': np.asarray(elec_cond, dtype=np.float64)[order],
+        }
+
+        counts = np.bincount(self.tissue_ids, minlength=len(names))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.keys = names.tolist()
+        # Display name: first spelling seen for each normalized key
+        first = {}
+        for key, name in zip(keys.tolist(), tissue.tolist()):
+            first.setdefault(key, name)
+        self.names = [first[key] for key in self.keys]
+        self._id = {key: i for i, key in enumerate(self.keys)}
+        self._freq_lists = [self.frequency[a:b].tolist() for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+        # Composite sort key (tissue id, frequency) for vectorized searches
+        self._f0 = self.frequency.min() if len(self.frequency) else 0.0
+        self._scale = 2 * (np.ptp(self.frequency) if len(self.frequency) else 0.0) + 1.0
+        self._composite = self.tissue_ids * self._scale + (self.frequency - self._f0)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a frame with load_tissue_data column names"""
+        return cls(df['tissue'].to_numpy(), df['frequency'].to_numpy(),
+                   df['permittivity'].to_numpy(), df['elec_cond'].to_numpy())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, tissue):
+        return normalize_name(tissue) in self._id
+
+    def tissue_id(self, tissue):
+        return self._id.get(normalize_name(tissue))
+
+    def frequencies(self, tissue):
+        i = self._id[normalize_name(tissue)]
+        return self.frequency[self.offsets[i]:self.offsets[i + 1]]
+
+    def lookup(self, tissue, freq_ghz, method='nearest'):
+        """Properties of one tissue at freq_ghz as a dict, or None for an unknown tissue"""
+        i = self._id.get(normalize_name(tissue))
+        if i is None:
+            return None
+        freqs = self._freq_lists[i]
+        base = int(self.offsets[i])
+        j = bisect_left(freqs, freq_ghz)
+
+        if method == 'nearest' or len(freqs) == 1 or j == 0 or j == len(freqs) or freqs[j] == freq_ghz:
+            if 0 < j < len(freqs) and freqs[j] != freq_ghz and freq_ghz - freqs[j - 1] <= freqs[j] - freq_ghz:
+                j -= 1
+            row = base + min(j, len(freqs) - 1)
+            return self._row(i, row, self.frequency[row] if method == 'nearest' else freq_ghz)
+
+        lo, hi = base + j - 1, base + j
+        result = {'tissue': self.names[i], 'frequency': freq_ghz}
+        for field in FIELDS:
+            result[field] = float(self._interpolate(self.frequency[lo], self.frequency[hi],
+                                                    self.values[field][lo], self.values[field][hi],
+                                                    freq_ghz, method))
+        return result
+
+    def _row(self, i, row, frequency):
+        result = {'tissue': self.names[i], 'frequency': float(frequency)}
+        for field in FIELDS:
+            result[field] = float(self.values[field][row])
+        return result
+
+    @staticmethod
+    def _interpolate(f0, f1, y0, y1, f, method):
+        if method not in METHODS:
+            raise ValueError(f"Unknown interpolation method '{method}' (expected one of {', '.join(METHODS)})")
+        t = (f - f0) / (f1 - f0)
+        linear = y0 + t * (y1 - y0)
+        if method != 'loglog':
+            return linear
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_log = np.log(f / f0) / np.log(f1 / f0)
+            power = np.exp(np.log(y0) + t_log * (np.log(y1) - np.log(y0)))
+        return np.where((y0 > 0) & (y1 > 0) & (f0 > 0), power, linear)
+
+    def lookup_many(self, tissue_ids, freq_ghz, method='nearest'):
+        """Vectorized lookup for arrays of tissue ids (see tissue_id) and frequencies.
+
+        Returns a dict of arrays: 'row' (nearest table row), 'frequency',
+        'permittivity' and 'elec_cond'.
+        """
+        tissue_ids = np.asarray(tissue_ids, dtype=np.int64)
+        freq_ghz = np.asarray(freq_ghz, dtype=np.float64)
+        tissue_ids, freq_ghz = np.broadcast_arrays(tissue_ids, freq_ghz)
+        start = self.offsets[tissue_ids]
+        end = self.offsets[tissue_ids + 1] - 1
+
+        offset = np.clip(freq_ghz - self._f0, -0.25 * self._scale, 0.75 * self._scale)
+        j = np.searchsorted(self._composite, tissue_ids * self._scale + offset, side='left')
+        hi = np.clip(j, start, end)
+        lo = np.clip(j - 1, start, end)
+
+        nearest = np.where(np.abs(freq_ghz - self.frequency[lo]) <= np.abs(self.frequency[hi] - freq_ghz), lo, hi)
+        result = {'row': nearest}
+        if method == 'nearest':
+            result['frequency'] = self.frequency[nearest]
+            for field in FIELDS:
+                result[field] = self.values[field][nearest]
+            return result
+
+        result['frequency'] = freq_ghz
+        same = lo == hi
+        f0, f1 = self.frequency[lo], np.where(same, self.frequency[lo] + 1.0, self.frequency[hi])
+        for field in FIELDS:
+            y0, y1 = self.values[field][lo], self.values[field][hi]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                value = self._interpolate(f0, f1, y0, y1, freq_ghz, method)
+            result[field] = np.where(same, y0, value)
+        return result
@@ -0,0 +1,113 @@
+import json
+import os
+import numpy as np
+
+mu0 = 4 * np.pi * 1e-7
+eps0 = 8.854e-12
+
+# Column order the classifier is trained and scored on
+FEATURES = ["Frequency", "Permittivity", "elec_cond", "penetration_depth", "loss_tangent"]
+MODEL_PATH = "tissue_classifier.pkl"
+# Flattened forest written by train_model.py (see forest_scorer.py)
+COMPILED_MODEL_PATH = "tissue_classifier.npz"
+# Layout of the JSON metadata written next to the model by train_model.py
+ARTIFACT_VERSION = 1
+
+# -----------------------------------
+# Shared feature engineering (train_model.py / predict_tissue.py)
+# -----------------------------------
+def classifier_features(freq_ghz, eps, sigma):
+    """Feature matrix (n, len(FEATURES)) from frequency (GHz), permittivity and conductivity (S/m) arrays"""
+    freq_ghz, eps, sigma = (a.ravel() for a in np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (freq_ghz, eps, sigma))))
+    omega = 2 * np.pi * freq_ghz * 1e9
+    with np.errstate(divide='ignore', invalid='ignore'):
+        penetration_depth = np.sqrt(2 / (omega * mu0 * np.maximum(sigma, 1e-9)))
+        loss_tangent = sigma / (omega * eps0 * eps)
+    return np.column_stack([freq_ghz, eps, sigma, penetration_depth, loss_tangent])
+
+def feature_frame(freq_ghz, eps, sigma):
+    import pandas as pd
+    return pd.DataFrame(classifier_features(freq_ghz, eps, sigma), columns=FEATURES)
+
+def tissue_class(tissue):
+    """Coarse dielectric class used as the training label"""
+    if "Fat" in tissue or "SAT" in tissue or "Breast Fat" in tissue:
+        return "Fatty"
+    elif "Bone" in tissue or "Tooth" in tissue or "Skull" in tissue:
+        return "Hard"
+    elif "Air" in tissue or "Lumen" in tissue:
+        return "Air"
+    else:
+        return "HighWater"
+
+# -----------------------------------
+# Batched predictor
+# -----------------------------------
+def metadata_path_for(model_path):
+    """tissue_classifier.pkl / .npz -> tissue_classifier.json"""
+    return os.path.splitext(model_path)[0] + ".json"
+
+def load_metadata(model_path):
+    """Training metadata for a model, or None for models saved without it"""
+    path = metadata_path_for(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        metadata = json.load(f)
+    if metadata.get("artifact_version") != ARTIFACT_VERSION:
+        raise ValueError(f"{path}: unsupported artifact version {metadata.get('artifact_version')} (expected {ARTIFACT_VERSION})")
+    if metadata.get("features") != FEATURES:
+        raise ValueError(f"{path}: model was trained on features {metadata.get('features')}, expected {FEATURES}")
+    return metadata
+
+def default_model_path():
+    """Compiled forest when one has been exported, else the joblib model"""
+    return COMPILED_MODEL_PATH if os.path.exists(COMPILED_MODEL_PATH) else MODEL_PATH
+
+class TissueClassifier:
+    """Tissue-class predictor that loads the model on first use and scores whole batches.
+
+    A .npz path loads a CompiledForest (NumPy only); anything else is
+    unpickled with joblib and needs scikit-learn.
+    """
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or default_model_path()
+        self._model = None
+        self.metadata = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.metadata = load_metadata(self.model_path)
+            if self.model_path.endswith(".npz"):
+                from forest_scorer import CompiledForest
+                self._model = CompiledForest.load(self.model_path)
+            else:
+                import joblib
+                self._model = joblib.load(self.model_path)
+        return self._model
+
+    def _inputs(self, freq_ghz, eps, sigma):
+        X = classifier_features(freq_ghz, eps, sigma)
+        # Models fitted on a DataFrame expect the same column names back (the compiled forest does not)
+        if hasattr(self.model, "feature_names_in_"):
+            import pandas as pd
+            return pd.DataFrame(X, columns=FEATURES)
+        return X
+
+    def predict(self, freq_ghz, eps, sigma):
+        """Class labels for arrays of (freq GHz, εr, σ S/m), broadcast together"""
+        return self.model.predict(self._inputs(freq_ghz, eps, sigma))
+
+    def predict_proba(self, freq_ghz, eps, sigma):
+        """Class probabilities, columns in the order of self.classes"""
+        return self.model.predict_proba(self._inputs(freq_ghz, eps, sigma))
+
+    @property
+    def classes(self):
+        return self.model.classes_
+
+    def predict_one(self, freq_ghz, eps, sigma):
+        return self.predict(freq_ghz, eps, sigma)[0]
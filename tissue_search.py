@@ -0,0 +1,181 @@
+import argparse
+import numpy as np
+from tissue_index import TissueIndex
+
+# Conductivities at or below this (e.g. air) are clamped before taking the log
+MIN_COND = 1e-6
+
+def tissue_features(freq_ghz, permittivity, elec_cond):
+    """Raw (frequency, permittivity, log10 conductivity) feature rows, shape (n, 3)"""
+    freq_ghz, permittivity, elec_cond = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (freq_ghz, permittivity, elec_cond)))
+    return np.column_stack([freq_ghz.ravel(), permittivity.ravel(),
+                            np.log10(np.maximum(elec_cond.ravel(), MIN_COND))])
+
+# -----------------------------------
+# Nearest-neighbour tissue search
+# -----------------------------------
+class TissueNeighbors:
+    """Which tissues does a measurement look like, searched over every (tissue, frequency) row.
+
+    Features are z-score normalized over the table and multiplied by weights
+    (frequency, permittivity, log-conductivity). Queries go through a
+    scipy cKDTree when scipy is installed, otherwise a brute-force NumPy scan
+    (the table is only a few thousand rows).
+
+    With distinct=True each tissue appears at most once in the top-k, at its
+    closest frequency row.
+    """
+
+    def __init__(self, index, weights=(1.0, 1.0, 1.0)):
+        self.index = index
+        points = tissue_features(index.frequency, index.values['permittivity'], index.values['elec_cond'])
+        self.mean = points.mean(axis=0)
+        std = points.std(axis=0)
+        self.scale = np.asarray(weights, dtype=np.float64) / np.where(std > 0, std, 1.0)
+        self.points = (points - self.mean) * self.scale
+        self.max_rows = int(np.diff(index.offsets).max()) if len(index) else 0
+        self._names = np.array(index.names, dtype=object)
+        try:
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(self.points)
+        except ImportError:
+            self.tree = None
+
+    @classmethod
+    def from_frame(cls, df, weights=(1.0, 1.0, 1.0)):
+        return cls(TissueIndex.from_frame(df), weights)
+
+    def _nearest_rows(self, q, k):
+        """Indices and distances of the k nearest rows for normalized queries q, sorted by distance"""
+        k = min(k, len(self.points))
+        if self.tree is not None:
+            dist, rows = self.tree.query(q, k=k)
+            return rows.reshape(len(q), k), dist.reshape(len(q), k)
+        d2 = ((q[:, None, :] - self.points[None, :, :]) ** 2).sum(axis=2)
+        rows = np.argpartition(d2, k - 1, axis=1)[:, :k] if k < d2.shape[1] else np.argsort(d2, axis=1)
+        order = np.argsort(np.take_along_axis(d2, rows, axis=1), axis=1, kind='stable')
+        rows = np.take_along_axis(rows, order, axis=1)
+        return rows, np.sqrt(np.take_along_axis(d2, rows, axis=1))
+
+    def query_many(self, freq_ghz, permittivity, elec_cond, k=5, distinct=True, chunk_size=10_000):
+        """Top-k matches for arrays of measurements.
+
+        Returns a dict of (n, k) arrays: 'row' (table row), 'tissue_id',
+        'tissue', 'frequency', 'permittivity', 'elec_cond' and 'distance'
+        (in normalized feature units), best match first.
+        """
+        q = (tissue_features(freq_ghz, permittivity, elec_cond) - self.mean) * self.scale
+        k = min(k, len(self.index) if distinct else len(self.points))
+        rows = np.empty((len(q), k), dtype=np.int64)
+        dist = np.empty((len(q), k))
+
+        for start in range(0, len(q), chunk_size):
+            s = slice(start, start + chunk_size)
+            if not distinct:
+                rows[s], dist[s] = self._nearest_rows(q[s], k)
+                continue
+            # Each tissue owns at most max_rows rows, so this many neighbours hold k distinct tissues
+            r, d = self._nearest_rows(q[s], k * self.max_rows)
+            ids = self.index.tissue_ids[r]
+            # First occurrence of each id along the (distance-sorted) row
+            order = np.argsort(ids, axis=1, kind='stable')
+            sorted_ids = np.take_along_axis(ids, order, axis=1)
+            first_sorted = np.ones(ids.shape, dtype=bool)
+            first_sorted[:, 1:] = sorted_ids[:, 1:] != sorted_ids[:, :-1]
+            first = np.empty_like(first_sorted)
+            np.put_along_axis(first, order, first_sorted, axis=1)
+            keep = np.argsort(~first, axis=1, kind='stable')[:, :k]
+            rows[s] = np.take_along_axis(r, keep, axis=1)
+            dist[s] = np.take_along_axis(d, keep, axis=1)
+
+        tissue_ids = self.index.tissue_ids[rows]
+        return {
+            'row': rows,
+            'tissue_id': tissue_ids,
+            'tissue': self._names[tissue_ids],
+            'frequency': self.index.frequency[rows],
+            'permittivity': self.index.values['permittivity'][rows],
+            'elec_cond': self.index.values['elec_cond'][rows],
+            'distance': dist,
+        }
+
+    def query(self, freq_ghz, permittivity, elec_cond, k=5, distinct=True):
+        """Top-k matches for one measurement as a list of dicts, best first.
+
+        Scalar fast path: one tree query on a plain point plus a Python
+        de-duplication, without the batch machinery of query_many.
+        """
+        if self.tree is None:
+            result = self.query_many(freq_ghz, permittivity, elec_cond, k, distinct)
+            rows, dist = result['row'][0].tolist(), result['distance'][0].tolist()
+        else:
+            point = (np.array([freq_ghz, permittivity, np.log10(max(elec_cond, MIN_COND))]) - self.mean) * self.scale
+            # A few extra neighbours usually cover repeated tissues; widen to the worst case if not
+            rows, dist = self._distinct(point, k, 2 * k) if distinct else self._plain(point, k)
+            if distinct and len(rows) < min(k, len(self.index)):
+                rows, dist = self._distinct(point, k, k * self.max_rows)
+
+        tissue_ids = self.index.tissue_ids
+        frequency, values = self.index.frequency, self.index.values
+        return [{'tissue': self.index.names[tissue_ids[r]], 'frequency': float(frequency[r]),
+                 'permittivity': float(values['permittivity'][r]), 'elec_cond': float(values['elec_cond'][r]),
+                 'distance': d} for r, d in zip(rows, dist)]
+
+    def _plain(self, point, k):
+        dist, rows = self.tree.query(point, k=min(k, len(self.points)))
+        return np.atleast_1d(rows).tolist(), np.atleast_1d(dist).tolist()
+
+    def _distinct(self, point, k, n_rows):
+        all_rows, all_dist = self._plain(point, n_rows)
+        rows, dist, seen = [], [], set()
+        tissue_ids = self.index.tissue_ids
+        for r, d in zip(all_rows, all_dist):
+            t = tissue_ids[r]
+            if t not in seen:
+                seen.add(t)
+                rows.append(r)
+                dist.append(d)
+                if len(rows) == k:
+                    break
+        return rows, dist
+
+    def query_frame(self, measurements, k=5, distinct=True):
+        """Bulk query for a frame with frequency / permittivity / elec_cond columns; one row per (measurement, rank)"""
+        import pandas as pd
+        result = self.query_many(measurements['frequency'], measurements['permittivity'],
+                                 measurements['elec_cond'], k, distinct)
+        n, k = result['row'].shape
+        return pd.DataFrame({
+            'measurement': np.repeat(np.arange(n), k),
+            'rank': np.tile(np.arange(1, k + 1), n),
+            'tissue': result['tissue'].ravel(),
+            'frequency': result['frequency'].ravel(),
+            'permittivity': result['permittivity'].ravel(),
+            'elec_cond': result['elec_cond'].ravel(),
+            'distance': result['distance'].ravel(),
+        })
+
+# -----------------------------------
+# CLI
+# -----------------------------------
+def main(argv=None):
+    import pandas as pd
+    from tissue_checker import load_tissue_data, _normalize_columns
+
+    parser = argparse.ArgumentParser(description="Find the closest reference tissues for measured dielectric properties")
+    parser.add_argument("measurements", help="CSV with frequency (GHz), permittivity and elec_cond columns")
+    parser.add_argument("--tissue-csv", default="tissue_properties.csv")
+    parser.add_argument("-k", "--top-k", type=int, default=5)
+    parser.add_argument("--all-rows", action="store_true", help="Allow the same tissue at several frequencies")
+    parser.add_argument("--weights", type=float, nargs=3, default=(1.0, 1.0, 1.0), metavar=("FREQ", "EPS", "LOG_COND"))
+    parser.add_argument("-o", "--out", default="tissue_matches.csv")
+    args = parser.parse_args(argv)
+
+    search = TissueNeighbors.from_frame(load_tissue_data(args.tissue_csv), args.weights)
+    matches = search.query_frame(_normalize_columns(pd.read_csv(args.measurements)), args.top_k, not args.all_rows)
+    matches.to_csv(args.out, index=False)
+    print(f"Top-{args.top_k} matches for {matches['measurement'].nunique()} measurements saved to: {args.out}")
+
+if __name__ == "__main__":
+    main()
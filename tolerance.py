@@ -0,0 +1,157 @@
+import argparse
+import time
+import numpy as np
+from antenna_calc import patch_dimensions_raw, resonant_frequency
+from impedance import quality_factors
+
+# Fabrication variables: εr (absolute), substrate height and tanδ (relative),
+# and etch, the copper over/under-etch that changes L and W together.
+PARAMETERS = ('epsilon', 'h', 'etch', 'tand')
+DEFAULT_TOLERANCES = {'epsilon': 0.2, 'h_pct': 10.0, 'etch_mm': 0.05, 'tand_pct': 20.0}
+DISTRIBUTIONS = ('uniform', 'normal')
+CHUNK_SAMPLES = 100_000
+
+# -----------------------------------
+# Sampling
+# -----------------------------------
+def _deviations(rng, n, limits, distribution):
+    """(n, len(limits)) deviations: uniform within ±limit, or normal with the limit at 3σ"""
+    limits = np.asarray(limits, dtype=np.float64)
+    if distribution == 'uniform':
+        return rng.uniform(-1.0, 1.0, (n, len(limits))) * limits
+    if distribution == 'normal':
+        return rng.standard_normal((n, len(limits))) * (limits / 3)
+    raise ValueError(f"Unknown distribution '{distribution}' (expected one of {', '.join(DISTRIBUTIONS)})")
+
+def tolerance_analysis(fr, h, epsilon, tand=0.0, tolerances=None, spec_hz=None, n_samples=1_000_000,
+                       distribution='uniform', metal_sigma=5.8e7, seed=None, chunk=CHUNK_SAMPLES):
+    """Monte Carlo of the built patch's resonance over fabrication tolerances.
+
+    The patch is designed at the nominal fr, h (m), εr and tanδ; each sample
+    perturbs εr, h, tanδ and the etch (see DEFAULT_TOLERANCES for the keys)
+    and re-solves the model for its resonance. spec_hz = (lo, hi) is the
+    accepted resonance band, default fr ± 1%. Samples run in chunks of
+    `chunk`; sensitivity is each parameter's share of the resonance variance
+    from a linear fit over all samples.
+    """
+    tol = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    tand = float(np.nan_to_num(tand))
+    spec_hz = spec_hz or (0.99 * fr, 1.01 * fr)
+    if spec_hz[0] > spec_hz[1]:
+        raise ValueError("The spec band's lower frequency is above its upper one")
+    raw = patch_dimensions_raw(fr, h, epsilon)
+    L, W = float(raw['L']), float(raw['W'])
+    limits = [tol['epsilon'], tol['h_pct'] / 100 * h, tol['etch_mm'] / 1000, tol['tand_pct'] / 100 * tand]
+
+    rng = np.random.default_rng(seed)
+    f_res = np.empty(n_samples, np.float32)
+    efficiency = np.empty(n_samples, np.float32)
+    k = len(PARAMETERS)
+    # Normal equations of the linear fit, accumulated chunk by chunk
+    XtX = np.zeros((k + 1, k + 1))
+    Xty = np.zeros(k + 1)
+
+    start = time.perf_counter()
+    for lo in range(0, n_samples, chunk):
+        n = min(chunk, n_samples - lo)
+        d = _deviations(rng, n, limits, distribution)
+        eps_s = np.maximum(epsilon + d[:, 0], 1.0)
+        h_s = np.maximum(h + d[:, 1], 1e-6)
+        # Over-etch (positive) removes copper from every edge, so both ends of L and W
+        L_s, W_s = L - 2 * d[:, 2], W - 2 * d[:, 2]
+        tand_s = np.maximum(tand + d[:, 3], 0.0)
+
+        f = resonant_frequency(L_s, W_s, h_s, eps_s)
+        eff_er = (eps_s + 1) / 2 + (eps_s - 1) / 2 * np.power(1 + 12 * h_s / W_s, -0.5)
+        Q_rad, _, _, Q_t = quality_factors(f, h_s, eff_er, tand_s, metal_sigma)
+        f_res[lo:lo + n] = f
+        efficiency[lo:lo + n] = Q_t / Q_rad
+
+        X = np.column_stack([np.ones(n), d])
+        XtX += X.T @ X
+        Xty += X.T @ (f - fr)
+    elapsed = time.perf_counter() - start
+
+    # Variance share of each parameter: (slope × its spread)² over the variance of the resonance
+    coef = np.linalg.lstsq(XtX, Xty, rcond=None)[0][1:]
+    spread = np.sqrt(np.maximum(np.diag(XtX)[1:] / n_samples - (XtX[0, 1:] / n_samples) ** 2, 0))
+    variance = float(np.var(f_res, dtype=np.float64))
+    contribution = (coef * spread) ** 2
+    sensitivity = sorted(({'parameter': name, 'share': float(s / variance) if variance > 0 else 0.0,
+                           'slope': float(b)} for name, s, b in zip(PARAMETERS, contribution, coef)),
+                         key=lambda row: -row['share'])
+
+    in_spec = (f_res >= spec_hz[0]) & (f_res <= spec_hz[1])
+    # With every tolerance at zero all samples coincide; centre the bins on that value
+    span = None if np.ptp(f_res) > 0 else (float(f_res[0]) * (1 - 1e-3), float(f_res[0]) * (1 + 1e-3))
+    counts, edges = np.histogram(f_res, bins=100, range=span)
+    return {
+        'fr': fr, 'L': L, 'W': W,
+        'nominal_f_res': float(resonant_frequency(L, W, h, epsilon)),
+        'n_samples': n_samples,
+        'elapsed_s': elapsed,
+        'f_res': f_res,
+        'efficiency': efficiency,
+        'mean_hz': float(f_res.mean(dtype=np.float64)),
+        'std_hz': float(np.sqrt(variance)),
+        'percentiles_hz': dict(zip((1, 5, 50, 95, 99), np.percentile(f_res, [1, 5, 50, 95, 99]).tolist())),
+        'spec_hz': spec_hz,
+        'yield': float(in_spec.mean()),
+        'efficiency_mean': float(efficiency.mean(dtype=np.float64)),
+        'efficiency_p5': float(np.percentile(efficiency, 5)),
+        # Slope units: Hz per unit εr, per metre of height or of etch per edge, per unit tanδ
+        'sensitivity': sensitivity,
+        'histogram': (counts, edges),
+    }
+
+def main(argv=None):
+    from material_data import MaterialDB
+    parser = argparse.ArgumentParser(description="Monte Carlo fabrication tolerance analysis of a patch resonance")
+    parser.add_argument("--freq", type=float, required=True, help="Design frequency in GHz")
+    parser.add_argument("--height", type=float, required=True, help="Nominal substrate height in mm")
+    parser.add_argument("--material", help="Substrate name in the materials CSV (nominal εr and tanδ)")
+    parser.add_argument("--epsilon", type=float, help="Nominal εr (instead of --material)")
+    parser.add_argument("--tand", type=float, default=0.0, help="Nominal loss tangent (with --epsilon)")
+    parser.add_argument("--materials-csv", default="cst_materials_extracted.csv")
+    parser.add_argument("--eps-tol", type=float, default=DEFAULT_TOLERANCES['epsilon'], help="εr tolerance (±, absolute)")
+    parser.add_argument("--h-tol", type=float, default=DEFAULT_TOLERANCES['h_pct'], help="Height tolerance (±%%)")
+    parser.add_argument("--etch-tol", type=float, default=DEFAULT_TOLERANCES['etch_mm'], help="Etch tolerance (± mm per edge)")
+    parser.add_argument("--tand-tol", type=float, default=DEFAULT_TOLERANCES['tand_pct'], help="tanδ tolerance (±%%)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default='uniform',
+                        help="uniform within the tolerance, or normal with the tolerance at 3σ")
+    parser.add_argument("--spec", type=float, nargs=2, metavar=("LO", "HI"), help="Accepted resonance band in GHz (default ±1%%)")
+    parser.add_argument("-n", "--samples", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.material:
+        material = MaterialDB.load(args.materials_csv).get(args.material)
+        epsilon, tand = material['Epsilon'], material['TanD']
+    elif args.epsilon:
+        epsilon, tand = args.epsilon, args.tand
+    else:
+        parser.error("give --material or --epsilon")
+    if args.spec and args.spec[0] > args.spec[1]:
+        parser.error("--spec LO must not be above HI")
+
+    fr = args.freq * 1e9
+    tolerances = {'epsilon': args.eps_tol, 'h_pct': args.h_tol, 'etch_mm': args.etch_tol, 'tand_pct': args.tand_tol}
+    result = tolerance_analysis(fr, args.height / 1000, epsilon, tand, tolerances,
+                                tuple(f * 1e9 for f in args.spec) if args.spec else None,
+                                args.samples, args.distribution, seed=args.seed)
+
+    lo, hi = result['spec_hz']
+    p = result['percentiles_hz']
+    print(f"{result['n_samples']:,} samples in {result['elapsed_s']:.2f} s "
+          f"(εr {epsilon:g} ± {args.eps_tol:g}, h {args.height:g} mm ± {args.h_tol:g}%, "
+          f"etch ± {args.etch_tol:g} mm per edge, {args.distribution})")
+    print(f"Resonance: mean {result['mean_hz'] / 1e9:.4f} GHz, σ {result['std_hz'] / 1e6:.1f} MHz, "
+          f"1–99% {p[1] / 1e9:.4f}–{p[99] / 1e9:.4f} GHz")
+    print(f"✅ Yield in {lo / 1e9:.4f}–{hi / 1e9:.4f} GHz: {result['yield'] * 100:.2f}%")
+    print(f"Radiation efficiency: mean {result['efficiency_mean'] * 100:.1f}%, 5th percentile {result['efficiency_p5'] * 100:.1f}%")
+    print("Most sensitive parameters (share of resonance variance):")
+    for row in result['sensitivity']:
+        print(f"  {row['parameter']:<8} {row['share'] * 100:6.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,203 @@
-import pandas as pd
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report
+import pandas as pd
 import joblib
+import sklearn
+from sklearn.model_selection import GridSearchCV, StratifiedGroupKFold
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from tissue_model import (feature_frame, tissue_class, FEATURES, MODEL_PATH, COMPILED_MODEL_PATH,
+                          ARTIFACT_VERSION, metadata_path_for)
+from forest_scorer import export_forest, CompiledForest
+
+# Candidate forests, from tiny to the previous 300-tree default
+PARAM_GRID = {
+    "n_estimators": [10, 25, 50, 100, 300],
+    "max_depth": [None, 6, 10],
+    "min_samples_leaf": [1, 3],
+}
+BASELINE_PARAMS = {"n_estimators": 300, "max_depth": None, "min_samples_leaf": 1}
+# Metrics that only depend on the data and parameters; timings go to the run log
+REPRODUCIBLE_METRICS = ("test_accuracy", "pkl_bytes", "npz_bytes")
+RUN_LOG = "tissue_classifier_runs.jsonl"
+
+# ---------------- Data ----------------
+def load_training_data(csv_path):
+    """Features, class labels and tissue groups from the tissue table"""
+    df = pd.read_csv(csv_path)
+    X = feature_frame(df["Frequency"], df["Permittivity"], df["elec_cond"])
+    y = df["Tissue"].apply(tissue_class).to_numpy()
+    return X, y, df["Tissue"].to_numpy()
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ---------------- Model selection ----------------
+def fastest_above(min_accuracy):
+    """GridSearchCV refit rule: cheapest candidate whose CV accuracy meets min_accuracy.
+
+    Cost is the number of trees, then the depth cap; measured timings are
+    reported but not used, so the choice is reproducible. Falls back to the
+    most accurate candidate when none meets the floor.
+    """
+    def select(cv_results):
+        accuracy = np.asarray(cv_results["mean_test_score"])
+        ok = np.flatnonzero(accuracy >= min_accuracy)
+        if ok.size == 0:
+            return int(np.argmax(accuracy))
+        trees = np.array([p["n_estimators"] for p in cv_results["params"]])[ok]
+        depth = np.array([p["max_depth"] or np.inf for p in cv_results["params"]], dtype=float)[ok]
+        # Fewest trees, then shallowest, then most accurate
+        return int(ok[np.lexsort((-accuracy[ok], depth, trees))[0]])
+    return select
+
+def search_models(X, y, groups, min_accuracy, folds=5, seed=42, workers=-1):
+    # Rows of one tissue at neighbouring frequencies are near-duplicates, so
+    # folds split by tissue: the score is accuracy on tissues never seen in training
+    cv = StratifiedGroupKFold(n_splits=folds, shuffle=True, random_state=seed)
+    search = GridSearchCV(
+        RandomForestClassifier(random_state=seed, n_jobs=1),
+        PARAM_GRID,
+        scoring="accuracy",
+        cv=cv,
+        n_jobs=workers,
+        refit=fastest_above(min_accuracy),
+    )
+    search.fit(X, y, groups=groups)
+    return search
+
+# ---------------- Profiling ----------------
+def profile_model(model, X_test, y_test, n_single=20):
+    """Accuracy, inference timings and on-disk sizes of a fitted forest (scikit-learn and compiled)"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    compiled_buffer = io.BytesIO()
+    export_forest(model, compiled_buffer, feature_names=FEATURES)
+    compiled_buffer.seek(0)
+    compiled = CompiledForest.load(compiled_buffer)
+
+    X_values = X_test.to_numpy()
+    report = {"test_accuracy": accuracy_score(y_test, model.predict(X_test)),
+              "pkl_bytes": buffer.tell(), "npz_bytes": compiled_buffer.getbuffer().nbytes}
+    for name, predict, X in (("sklearn", model.predict, X_test), ("compiled", compiled.predict, X_values)):
+        start = time.perf_counter()
+        for i in range(n_single):
+            predict(X[i:i + 1])
+        report[f"{name}_single_ms"] = (time.perf_counter() - start) / n_single * 1000
+        start = time.perf_counter()
+        predict(X)
+        report[f"{name}_rows_per_s"] = len(X) / (time.perf_counter() - start)
+    return report
+
+# ---------------- Artifact ----------------
+def model_version(metadata):
+    """Content-derived version: hash of everything in the metadata that determines the model"""
+    inputs = {key: metadata[key] for key in ("artifact_version", "features", "params", "seed", "folds",
+                                             "min_accuracy", "data", "sklearn_version")}
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:12]
 
-# ---------------- Load data ----------------
-df = pd.read_csv("Tissues_propeties (2).csv")
+def save_artifact(model, metadata, out_dir="."):
+    """Write the joblib model, the compiled forest and the JSON schema/metadata side by side.
 
-mu0 = 4 * np.pi * 1e-7
-eps0 = 8.854e-12
+    Same data, parameters and library versions give byte-identical files;
+    wall-clock details belong in the run log (append_run_log).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = os.path.join(out_dir, MODEL_PATH)
+    compiled_path = os.path.join(out_dir, COMPILED_MODEL_PATH)
+    joblib.dump(model, model_path)
+    export_forest(model, compiled_path, feature_names=FEATURES)
+    with open(metadata_path_for(model_path), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    return model_path, compiled_path
 
-# ---------------- Physics features ----------------
-df["freq_hz"] = df["Frequency"] * 1e9
-omega = 2 * np.pi * df["freq_hz"]
+def append_run_log(entry, out_dir="."):
+    """Append one JSON line (training time, timings) per run to out_dir/RUN_LOG"""
+    path = os.path.join(out_dir, RUN_LOG)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+    return path
 
-sigma = df["elec_cond"].replace(0, 1e-9)
+# ---------------- CLI ----------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the tissue-class model with cross-validated model selection")
+    parser.add_argument("--data", default="tissue_properties.csv", help="Tissue table (Frequency, Tissue, Permittivity, elec_cond)")
+    parser.add_argument("--min-accuracy", type=float, default=0.83,
+                        help="Accuracy floor (grouped CV); the smallest forest above it is kept")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("-j", "--workers", type=int, default=-1, help="Parallel fits (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args(argv)
 
-df["penetration_depth"] = np.sqrt(2 / (omega * mu0 * sigma))
-df["loss_tangent"] = df["elec_cond"] / (omega * eps0 * df["Permittivity"])
+    X, y, groups = load_training_data(args.data)
 
-# ---------------- Create classes from tissue names ----------------
-def classify(tissue):
-    if "Fat" in tissue or "SAT" in tissue or "Breast Fat" in tissue:
-        return "Fatty"
-    elif "Bone" in tissue or "Tooth" in tissue or "Skull" in tissue:
-        return "Hard"
-    elif "Air" in tissue or "Lumen" in tissue:
-        return "Air"
-    else:
-        return "HighWater"
+    # Hold out one tissue-grouped fold for the final report
+    splitter = StratifiedGroupKFold(n_splits=5, shuffle=True, random_state=args.seed)
+    train_idx, test_idx = next(splitter.split(X, y, groups))
+    X_train, X_test, y_train, y_test = X.iloc[train_idx], X.iloc[test_idx], y[train_idx], y[test_idx]
 
-df["TissueClass"] = df["Tissue"].apply(classify)
+    start = time.perf_counter()
+    search = search_models(X_train, y_train, groups[train_idx], args.min_accuracy, args.folds, args.seed, args.workers)
+    print(f"Searched {len(search.cv_results_['params'])} candidates in {time.perf_counter() - start:.1f} s")
 
-# ---------------- Train model ----------------
-X = df[[
-    "Frequency",
-    "Permittivity",
-    "elec_cond",
-    "penetration_depth",
-    "loss_tangent"
-]]
+    results = pd.DataFrame([{key: "None" if value is None else value for key, value in params.items()}
+                            for params in search.cv_results_["params"]])
+    results["cv_accuracy"] = search.cv_results_["mean_test_score"]
+    results["fit_s"] = search.cv_results_["mean_fit_time"]
+    results["score_s"] = search.cv_results_["mean_score_time"]
+    print(results.sort_values("score_s").to_string(index=False, float_format=lambda v: f"{v:.4f}"))
 
-y = df["TissueClass"]
+    best = search.best_estimator_
+    best_cv = search.cv_results_["mean_test_score"][search.best_index_]
+    if best_cv < args.min_accuracy:
+        print(f"⚠️ No candidate reached {args.min_accuracy:.3f} CV accuracy; keeping the most accurate one")
+    print(f"Selected {search.best_params_} (CV accuracy {best_cv:.4f}, refit {search.refit_time_:.2f} s)")
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
+    baseline = RandomForestClassifier(random_state=args.seed, n_jobs=1, **BASELINE_PARAMS)
+    start = time.perf_counter()
+    baseline.fit(X_train, y_train)
+    baseline_fit_s = time.perf_counter() - start
 
-model = RandomForestClassifier(n_estimators=300)
-model.fit(X_train, y_train)
+    profiles = pd.DataFrame({
+        "selected": {"fit_s": search.refit_time_, **profile_model(best, X_test, y_test)},
+        "baseline (300 trees)": {"fit_s": baseline_fit_s, **profile_model(baseline, X_test, y_test)},
+    })
+    print(profiles.to_string(float_format=lambda v: f"{v:,.4f}"))
+    print(classification_report(y_test, best.predict(X_test), zero_division=0))
 
-print(classification_report(y_test, model.predict(X_test)))
+    selected = profiles["selected"]
+    metadata = {
+        "artifact_version": ARTIFACT_VERSION,
+        "features": FEATURES,
+        "classes": best.classes_.tolist(),
+        "params": search.best_params_,
+        "seed": args.seed,
+        "folds": args.folds,
+        "min_accuracy": args.min_accuracy,
+        "cv_accuracy": float(best_cv),
+        "metrics": {key: float(selected[key]) for key in REPRODUCIBLE_METRICS},
+        "data": {"path": os.path.basename(args.data), "sha1": file_sha1(args.data), "rows": len(X)},
+        "sklearn_version": sklearn.__version__,
+    }
+    metadata["model_version"] = model_version(metadata)
+    model_path, compiled_path = save_artifact(best, metadata, args.out_dir)
+    log_path = append_run_log({
+        "model_version": metadata["model_version"],
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "timings": {key: float(value) for key, value in selected.items() if key not in REPRODUCIBLE_METRICS},
+    }, args.out_dir)
+    print(f"Model {metadata['model_version']} saved as {model_path} and {compiled_path} (run logged to {log_path})")
 
-joblib.dump(model, "tissue_classifier.pkl")
-print("Model trained and saved as tissue_classifier.pkl")
+if __name__ == "__main__":
+    main()
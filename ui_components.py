@@ -1,3 +1,4 @@
+import math
 import streamlit as st
 
 def show_material_props(row, role):
@@ -6,5 +7,6 @@ def show_material_props(row, role):
     st.write(f" - tanδ: {row['TanD']}")
     st.write(f" - σ: {row['Sigma']} S/m")
 
-def filter_materials(df, allowed_materials):
-    return df[df['Filename'].apply(lambda x: any(mat.lower() in x.lower() for mat in allowed_materials))]
+def format_beamwidth(deg):
+    """Half-power beamwidth for display; NaN means the cut never drops to half power"""
+    return "not reached within ±90°" if math.isnan(deg) else f"{deg:.1f}°"